@@ -1,68 +1,383 @@
 # --- Required Imports ---
 import math
+import contextlib
+import bisect
+import functools
+from array import array
 import copy
 import os
-from flask import Flask, render_template, request, url_for, flash
-from datetime import date, timedelta, datetime
+from flask import Flask, Response, render_template, request, url_for, flash, has_request_context, jsonify
+from datetime import date, timedelta, datetime, timezone
 import random
 import itertools
 import logging
+import hashlib
+import json
+import csv
+import io
+import queue
+import sqlite3
+import time
+from collections import OrderedDict
+import contextvars
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 
 # --- App Configuration ---
 app = Flask(__name__)
 # IMPORTANT: Use a strong, unique secret key, preferably from environment variables.
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'default-dev-secret-key-please-change')
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_BYTES', 8 * 1024 * 1024)) # Roster uploads and request bodies
 
 # --- Constants ---
+# Defaults for a ConstraintProfile; each request may override them
 MIN_REST_DAYS = 2  # Minimum number of full days between matches for a team
 WEEKDAY_MATCHES_LIMIT = 1 # Max matches per day (Mon-Fri) ACROSS ALL VENUES
 WEEKEND_MATCHES_LIMIT = 2 # Max matches per day (Sat-Sun) ACROSS ALL VENUES
 PLAYOFF_START_GAP_DAYS = 3 # Minimum days between last league match and first playoff match
+MAX_DAILY_MATCHES = 64 # Upper bound on a constraint profile's matches per day across all venues
+MAX_REST_DAYS = 60 # Upper bound on a constraint profile's rest and playoff gap days
+PLAYOFF_WINDOW_DAYS = 21 # Minimum playoff window after the start gap
+PLAYOFF_FINAL_WEEKDAY = 6 # Playoff finals are aimed at this weekday (Monday = 0, Sunday = 6)
+PLAYOFF_FORMATS = { # Bracket per format: (match id, match type, side, side); a side is a rank or (Winner|Loser, match id). The Final comes last.
+    'top2': {'teams': 2, 'sequential': False, 'matches': (('Final', 'Final', 1, 2),)},
+    'top4': {'teams': 4, 'sequential': True, 'matches': ( # IPL: the top two get a second chance
+        ('Q1', 'Qualifier 1', 1, 2), ('Elim.', 'Eliminator', 3, 4), ('Q2', 'Qualifier 2', ('Loser', 'Q1'), ('Winner', 'Elim.')), ('Final', 'Final', ('Winner', 'Q1'), ('Winner', 'Q2')))},
+    'top6': {'teams': 6, 'sequential': False, 'matches': ( # The top two skip the first round
+        ('EF1', 'Elimination Final 1', 3, 6), ('EF2', 'Elimination Final 2', 4, 5),
+        ('SF1', 'Semi-final 1', 1, ('Winner', 'EF2')), ('SF2', 'Semi-final 2', 2, ('Winner', 'EF1')), ('Final', 'Final', ('Winner', 'SF1'), ('Winner', 'SF2')))},
+    'top8': {'teams': 8, 'sequential': False, 'matches': ( # Seeded knockout, 1 and 2 can only meet in the Final
+        ('QF1', 'Quarter-final 1', 1, 8), ('QF2', 'Quarter-final 2', 4, 5), ('QF3', 'Quarter-final 3', 2, 7), ('QF4', 'Quarter-final 4', 3, 6),
+        ('SF1', 'Semi-final 1', ('Winner', 'QF1'), ('Winner', 'QF2')), ('SF2', 'Semi-final 2', ('Winner', 'QF3'), ('Winner', 'QF4')), ('Final', 'Final', ('Winner', 'SF1'), ('Winner', 'SF2')))},
+}
+SCHEDULING_ENGINES = ('greedy', 'backtrack') # 'greedy' = randomized earliest-slot pass, 'backtrack' = constraint solver
+SOLVER_TIME_BUDGET_SECONDS = float(os.environ.get('SOLVER_TIME_BUDGET_SECONDS', 2.0)) # Wall time the backtracking engine may spend per stage before falling back to greedy
+TOURNAMENT_TYPES = ('round_robin', 'double_round_robin', 'single_elimination', 'double_elimination', 'group_knockout')
+PLAYOFF_TYPES = ('round_robin', 'double_round_robin', 'double_elimination', 'group_knockout') # Types a PLAYOFF_FORMATS stage can follow
+SEARCH_WORKERS = int(os.environ.get('SEARCH_WORKERS', os.cpu_count() or 1)) # Processes used for multi-seed searches
+SEARCH_TIMEOUT_SECONDS = float(os.environ.get('SEARCH_TIMEOUT_SECONDS', 20)) # Seeds unfinished after this are dropped
+MAX_SEARCH_SEEDS = 64 # Upper bound on attempts per multi-seed search
+MAX_SEED = 2 ** 32 - 1 # Seeds are 0..MAX_SEED
+RESCHEDULE_EXTENSION_DAYS = 28 # Default search horizon past the last fixture when re-slotting
+ORDERED_STAGES = ('Knockout', 'Winners Bracket', 'Losers Bracket', 'Grand Final', 'Playoffs') # Stages whose rounds must stay in order when re-slotting
+STAGE_PHASES = {'Knockout': 1, 'Winners Bracket': 1, 'Losers Bracket': 1, 'Playoffs': 1, 'Grand Final': 2} # Stages not listed (league, groups) are phase 0; a phase starts after every earlier one ends
+MAX_BATCH_TOURNAMENTS = 200 # Upper bound on tournaments per /api/fixtures/batch call
+MAX_CALENDARS = int(os.environ.get('MAX_CALENDARS', 64)) # Named shared venue calendars kept in memory
+CALENDAR_BOOKING_ATTEMPTS = 5 # Reschedules allowed when another process books into the same stored calendar mid-run
+ROSTER_FORMATS = ('csv', 'json', 'ndjson') # Accepted roster file formats
+MAX_ROSTER_ERRORS = 100 # Row errors kept (and reported) per roster import; the rest are only counted
+MAX_VENUE_CAPACITY = 24 # Upper bound on a venue's matches per day in a roster
+ROSTER_COLUMNS = { # Accepted header/key spellings per roster field
+    'team': ('team', 'team_name', 'club'), 'venues': ('venue', 'venues', 'home_venue', 'home_venues'),
+    'capacity': ('capacity', 'venue_capacity'), 'blackouts': ('blackouts', 'blackout_dates'),
+}
 
 # --- Configure Logging ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 app.logger.setLevel(logging.INFO) # Ensure Flask logger uses this level
 
+# --- Instrumentation ---
+class Metrics:
+    """
+    Small Prometheus-style registry of labelled counters and histograms, rendered by /metrics.
+    When disabled every recording call returns immediately, and hot loops check 'enabled'
+    before doing any extra work.
+    """
+    DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled; self._lock = threading.Lock()
+        self._meta = {} # name -> (kind, help, buckets)
+        self._counters = {} # (name, labels) -> value
+        self._histograms = {} # (name, labels) -> [bucket counts..., sum, count]
+
+    def describe(self, name, kind, help_text, buckets=None):
+        self._meta[name] = (kind, help_text, tuple(buckets or self.DEFAULT_BUCKETS) if kind == 'histogram' else None)
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled: return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock: self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        if not self.enabled: return
+        buckets = self._meta[name][2]; key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None: series = self._histograms[key] = [0] * (len(buckets) + 3) # buckets, overflow, sum, count
+            series[bisect.bisect_left(buckets, value)] += 1
+            series[-2] += value; series[-1] += 1
+
+    def snapshot(self):
+        """ Copy of every series, for delta_since(). """
+        with self._lock: return dict(self._counters), {key: list(series) for key, series in self._histograms.items()}
+
+    def delta_since(self, snapshot):
+        """ What was recorded since snapshot(), as a picklable (counters, histograms) pair for merge(). """
+        counters, histograms = snapshot
+        with self._lock:
+            counter_delta = {key: value - counters.get(key, 0) for key, value in self._counters.items() if value != counters.get(key, 0)}
+            histogram_delta = {key: [now - then for now, then in zip(series, histograms.get(key, [0] * len(series)))] for key, series in self._histograms.items() if series != histograms.get(key)}
+        return counter_delta, histogram_delta
+
+    def merge(self, delta):
+        """ Adds a delta_since() recorded in another process (seed-search workers) to this registry. """
+        if not self.enabled: return
+        counter_delta, histogram_delta = delta
+        with self._lock:
+            for key, amount in counter_delta.items(): self._counters[key] = self._counters.get(key, 0) + amount
+            for key, series in histogram_delta.items():
+                current = self._histograms.setdefault(key, [0] * len(series))
+                for i, value in enumerate(series): current[i] += value
+
+    @contextlib.contextmanager
+    def timer(self, name, **labels):
+        """ Observes the wall time of the block in seconds (no-op when disabled). """
+        if not self.enabled:
+            yield; return
+        started = time.perf_counter()
+        try: yield
+        finally: self.observe(name, time.perf_counter() - started, **labels)
+
+    def render(self, extra_gauges=()):
+        """ Prometheus text exposition (0.0.4). extra_gauges: (name, help, value) computed by the caller. """
+        def fmt_labels(labels):
+            if not labels: return ''
+            escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+            return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+        lines = []
+        with self._lock:
+            for name, (kind, help_text, buckets) in sorted(self._meta.items()):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                if kind == 'counter':
+                    lines += [f"{name}{fmt_labels(labels)} {value}" for (series_name, labels), value in sorted(self._counters.items()) if series_name == name]
+                    continue
+                for (series_name, labels), series in sorted(self._histograms.items()):
+                    if series_name != name: continue
+                    cumulative = 0
+                    for bound, count in zip(buckets, series):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{fmt_labels(labels + (('le', repr(float(bound))),))} {cumulative}")
+                    lines.append(f"{name}_bucket{fmt_labels(labels + (('le', '+Inf'),))} {series[-1]}")
+                    lines += [f"{name}_sum{fmt_labels(labels)} {series[-2]}", f"{name}_count{fmt_labels(labels)} {series[-1]}"]
+        for name, help_text, value in extra_gauges:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics(enabled=os.environ.get('METRICS_ENABLED', '1') != '0')
+metrics.describe('fixtures_parse_seconds', 'histogram', "Time spent parsing team/venue input.")
+metrics.describe('fixtures_slot_setup_seconds', 'histogram', "Time spent building slot tables.")
+metrics.describe('fixtures_stage_seconds', 'histogram', "Time spent scheduling one schedule_matches call, by stage and engine.")
+metrics.describe('fixtures_generation_seconds', 'histogram', "Wall time of one tournament generation, by type.")
+metrics.describe('fixtures_slot_checks_per_pair', 'histogram', "Slots examined to place one pair.", buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 1024))
+metrics.describe('fixtures_rejections_total', 'counter', "Candidate days passed over while placing pairs: day_limit/venue per skipped day, rest once per pair held back by rest days.")
+metrics.describe('fixtures_pairs_scheduled_total', 'counter', "Match pairs placed, by engine.")
+metrics.describe('fixtures_solver_fallbacks_total', 'counter', "Backtracking solves finished by the greedy engine (out of time, or a round stage at a dead end).")
+metrics.describe('fixtures_generations_total', 'counter', "Tournament generations, by type and outcome.")
+metrics.describe('fixtures_slot_probes_total', 'counter', "Slots examined by SlotIndex.next_free during tournament generations.")
+
+# --- Shared State ---
+_collected_notices = contextvars.ContextVar('collected_notices', default=None) # Set while generate_tournament runs
+_progress_hook = contextvars.ContextVar('progress_hook', default=None) # callable(stage, planned=0, scheduled=0) while a job runs
+_calendar_bookings = contextvars.ContextVar('calendar_bookings', default=None) # (date, venue, time_slot) already booked in a shared calendar
+_stage_sink = contextvars.ContextVar('stage_sink', default=None) # callable(stage, fixtures) while an export streams
+_generation_deadline = contextvars.ContextVar('generation_deadline', default=None) # time.monotonic() after which a seed-search worker gives up
+_slot_tables = contextvars.ContextVar('slot_tables', default=()) # Lists that collect every SlotIndex built in the current run (see count_slot_probes)
+_search_pool = None; _search_pool_lock = threading.Lock()
+
 # --- Helper Functions ---
 
+class RosterError(ValueError):
+    """ Every problem found while importing a roster. errors: [{'line', 'message'}], capped at MAX_ROSTER_ERRORS. """
+    def __init__(self, errors, error_count):
+        self.errors = errors; self.error_count = error_count
+        if error_count == 1: message = errors[0]['message']
+        else:
+            message = f"Found {error_count} problems in the team list: " + " ".join(error['message'] for error in errors[:5])
+            if error_count > 5: message += f" (and {error_count - 5} more)"
+        super().__init__(message)
+
+class RosterBuilder:
+    """
+    One-pass roster validation shared by the textarea and file parsers. add() checks one row and
+    records every problem instead of stopping at the first; result() then raises RosterError with
+    all of them, or returns teams, venues, team_venue_map and venue_rules.
+    A team with several home venues maps to a tuple of venue names.
+    """
+    def __init__(self):
+        self.teams = []; self.venues = []; self.team_venue_map = {}; self.venue_rules = {}
+        self.errors = []; self.error_count = 0
+        self._team_lines = {}; self._capacity_lines = {}
+
+    def error(self, line_num, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ROSTER_ERRORS: self.errors.append({'line': line_num, 'message': message})
+
+    def add(self, line_num, team, venues, capacity=None, blackouts=()):
+        if team in self._team_lines:
+            self.error(line_num, f"Duplicate team name: '{team}' on line {line_num} (first on line {self._team_lines[team]})."); return
+        self._team_lines[team] = line_num
+        self.teams.append(team); self.team_venue_map[team] = venues[0] if len(venues) == 1 else tuple(venues)
+        for venue in venues:
+            if venue not in self.venue_rules: self.venues.append(venue); self.venue_rules[venue] = {'capacity': None, 'blackouts': []}
+            rule = self.venue_rules[venue]
+            if capacity is not None:
+                if rule['capacity'] is not None and rule['capacity'] != capacity:
+                    self.error(line_num, f"Line {line_num}: capacity {capacity} for venue '{venue}' conflicts with {rule['capacity']} on line {self._capacity_lines[venue]}.")
+                else: rule['capacity'] = capacity; self._capacity_lines[venue] = line_num
+            rule['blackouts'].extend(blackouts)
+
+    def result(self, with_rules=True):
+        if self.error_count: raise RosterError(self.errors, self.error_count)
+        if not self.teams: raise ValueError("No valid team/venue pairs entered.")
+        if len(self.teams) < 2: raise ValueError("At least two teams are required.")
+        app.logger.info("Parsed %d teams and %d unique venues.", len(self.teams), len(self.venues))
+        if not with_rules: return self.teams, self.venues, self.team_venue_map
+        venue_rules = {venue: {'capacity': rule['capacity'], 'blackouts': merge_date_ranges(rule['blackouts'])}
+                       for venue, rule in self.venue_rules.items() if rule['capacity'] is not None or rule['blackouts']}
+        return self.teams, self.venues, self.team_venue_map, venue_rules
+
 def parse_team_venue_pairs(input_string):
     """
-    Parses newline-separated 'Team Name, Venue Name' strings.
+    Parses newline-separated 'Team Name, Venue Name' strings, reporting every bad line at once.
     Returns: teams_list (list), venues_list (list), team_venue_map (dict)
     """
-    teams_list = []
-    venues_list = []
-    team_venue_map = {}
-    seen_teams = set()
-    seen_venues = set()
-    lines = input_string.strip().splitlines()
-    line_num = 0
-    for line in lines:
-        line_num += 1
+    started = time.perf_counter(); builder = RosterBuilder()
+    for line_num, line in enumerate(io.StringIO(input_string.strip()), 1):
         line = line.strip()
         if not line: continue
 
         parts = [part.strip() for part in line.split(',', 1)]
         if len(parts) != 2 or not parts[0] or not parts[1]:
-            raise ValueError(f"Invalid format on line {line_num}: '{line}'. Use 'Team Name, Venue Name'.")
-        team_name, venue_name = parts
+            builder.error(line_num, f"Invalid format on line {line_num}: '{line}'. Use 'Team Name, Venue Name'."); continue
+        builder.add(line_num, parts[0], [parts[1]])
+    try: return builder.result(with_rules=False)
+    finally: metrics.observe('fixtures_parse_seconds', time.perf_counter() - started)
+
+def merge_date_ranges(ranges):
+    """ Sorted, non-overlapping (first, last) date ranges. """
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + timedelta(days=1): merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else: merged.append((first, last))
+    return merged
+
+def parse_blackouts(value):
+    """ Blackout dates from 'YYYY-MM-DD' entries or 'YYYY-MM-DD..YYYY-MM-DD' ranges (';'/'|'-separated text or a list). """
+    if value in (None, ''): return []
+    entries = value if isinstance(value, list) else str(value).replace('|', ';').split(';')
+    ranges = []
+    for entry in entries:
+        entry = str(entry).strip()
+        if not entry: continue
+        first_str, _, last_str = entry.partition('..')
+        try: first = datetime.strptime(first_str.strip(), '%Y-%m-%d').date(); last = datetime.strptime(last_str.strip(), '%Y-%m-%d').date() if last_str else first
+        except ValueError: raise ValueError(f"blackout '{entry}' must be YYYY-MM-DD or YYYY-MM-DD..YYYY-MM-DD")
+        if last < first: raise ValueError(f"blackout range '{entry}' ends before it starts")
+        ranges.append((first, last))
+    return ranges
 
-        if team_name in seen_teams:
-             raise ValueError(f"Duplicate team name: '{team_name}' on line {line_num}.")
+def add_roster_row(builder, line_num, row):
+    """ Validates one roster record (a dict keyed by canonical field names) into the builder. """
+    team = str(row.get('team') or '').strip()
+    venues = row.get('venues')
+    venues = [str(v).strip() for v in (venues if isinstance(venues, list) else str(venues or '').replace('|', ';').split(';'))]
+    venues = list(dict.fromkeys(v for v in venues if v))
+    problems = []
+    if not team: problems.append("team name is missing")
+    if not venues: problems.append("at least one home venue is required")
+    capacity = row.get('capacity')
+    if capacity in (None, ''): capacity = None
+    else:
+        try:
+            capacity = int(str(capacity).strip())
+            if not 1 <= capacity <= MAX_VENUE_CAPACITY: raise ValueError
+        except ValueError: problems.append(f"capacity must be a whole number from 1 to {MAX_VENUE_CAPACITY} (got '{row.get('capacity')}')"); capacity = None
+    try: blackouts = parse_blackouts(row.get('blackouts'))
+    except ValueError as e: problems.append(str(e)); blackouts = []
+    if problems:
+        for problem in problems: builder.error(line_num, f"Line {line_num}: {problem}.")
+        return
+    builder.add(line_num, team, venues, capacity, blackouts)
+
+def canonical_roster_fields(keys):
+    """ Maps raw header/key names to canonical roster fields; returns (mapping, unknown names). """
+    aliases = {alias: field for field, names in ROSTER_COLUMNS.items() for alias in names}
+    mapping = {}; unknown = []
+    for key in keys:
+        field = aliases.get(str(key).strip().lower().replace(' ', '_'))
+        if field: mapping[key] = field
+        else: unknown.append(key)
+    return mapping, unknown
 
-        teams_list.append(team_name)
-        seen_teams.add(team_name)
-        team_venue_map[team_name] = venue_name
+def parse_roster(stream, fmt):
+    """
+    Parses a roster file in one streaming pass (text stream; csv/ndjson are read row by row,
+    json is a single array or {"teams": [...]}; fmt='records' takes already-decoded dicts, as sent
+    to the JSON API). Every bad row is reported together via RosterError.
+    Columns: team, venue(s) (';'-separated for several home venues), capacity, blackouts.
+    Returns teams_list, venues_list, team_venue_map, venue_rules.
+    """
+    if fmt not in ROSTER_FORMATS + ('records',): raise ValueError(f"Unsupported roster format: {fmt}. Use one of: {', '.join(ROSTER_FORMATS)}.")
+    started = time.perf_counter(); builder = RosterBuilder()
+    def records():
+        if fmt == 'csv':
+            reader = csv.reader(stream)
+            header = next(reader, None)
+            if header is None: return
+            mapping, unknown = canonical_roster_fields(header)
+            if unknown: builder.error(1, f"Line 1: unknown column(s) {', '.join(repr(name) for name in unknown)}.")
+            fields = [mapping.get(name) for name in header]
+            if 'team' not in fields or 'venues' not in fields:
+                builder.error(1, "Line 1: header must name a team and a venue column."); return
+            for row in reader:
+                if not any(cell.strip() for cell in row): continue
+                if len(row) > len(fields): builder.error(reader.line_num, f"Line {reader.line_num}: {len(row)} values for {len(fields)} columns."); continue
+                yield reader.line_num, {field: cell for field, cell in zip(fields, row) if field}
+        elif fmt == 'ndjson':
+            for line_num, line in enumerate(stream, 1):
+                if not line.strip(): continue
+                try: yield line_num, json.loads(line)
+                except ValueError: builder.error(line_num, f"Line {line_num}: not valid JSON.")
+        elif fmt == 'records': yield from enumerate(stream, 1)
+        else:
+            try: data = json.load(stream)
+            except ValueError as e: builder.error(1, f"Invalid JSON: {e}."); return
+            yield from enumerate(data.get('teams', []) if isinstance(data, dict) else data, 1)
+    for line_num, record in records():
+        if not isinstance(record, dict): builder.error(line_num, f"Line {line_num}: expected an object with team and venue fields."); continue
+        if fmt != 'csv':
+            mapping, unknown = canonical_roster_fields(record)
+            if unknown: builder.error(line_num, f"Line {line_num}: unknown field(s) {', '.join(repr(name) for name in unknown)}."); continue
+            record = {mapping[key]: value for key, value in record.items()}
+        add_roster_row(builder, line_num, record)
+    try: return builder.result()
+    finally: metrics.observe('fixtures_parse_seconds', time.perf_counter() - started)
 
-        if venue_name not in seen_venues:
-            venues_list.append(venue_name)
-            seen_venues.add(venue_name)
+def roster_format_for(filename, mimetype=None):
+    """ Roster format from a file name or content type, or None. """
+    extension = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    if extension in ROSTER_FORMATS: return extension
+    if extension == 'jsonl': return 'ndjson'
+    mimetype = (mimetype or '').lower()
+    if 'ndjson' in mimetype or 'jsonl' in mimetype: return 'ndjson'
+    if 'json' in mimetype: return 'json'
+    if 'csv' in mimetype: return 'csv'
+    return None
 
-    if not teams_list: raise ValueError("No valid team/venue pairs entered.")
-    if len(teams_list) < 2: raise ValueError("At least two teams are required.")
+def parse_roster_binary(binary_stream, fmt):
+    """ parse_roster over a binary stream (upload or request body), decoding UTF-8 as it is read. """
+    stream = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+    try: return parse_roster(stream, fmt)
+    except UnicodeDecodeError: raise ValueError("Roster files must be UTF-8 encoded.")
+    finally: stream.detach()
 
-    app.logger.info(f"Parsed {len(teams_list)} teams and {len(venues_list)} unique venues.")
-    return teams_list, venues_list, team_venue_map
+def parse_roster_upload(file_storage, fmt=None):
+    """ parse_roster over an uploaded file (werkzeug FileStorage). """
+    fmt = fmt or roster_format_for(file_storage.filename, file_storage.mimetype)
+    if fmt is None: raise ValueError(f"Cannot tell the roster format of '{file_storage.filename}'. Use a .csv, .json or .ndjson file.")
+    return parse_roster_binary(file_storage.stream, fmt)
 
 def date_range(start_date, end_date):
     """Generates date objects between start and end (inclusive)."""
@@ -72,56 +387,347 @@ def date_range(start_date, end_date):
         yield current_date
         current_date += timedelta(days=1)
 
-def get_available_slots(venues, start_date, end_date):
+def get_available_slots(venues, start_date, end_date, constraints=None):
     """
-    Generates potential slot dictionaries.
-    Scheduling logic will enforce daily limits.
+    Builds the compact slot table (SlotIndex) for the venues and date range under a ConstraintProfile
+    (default: DEFAULT_CONSTRAINTS): its compiled day limits, per-venue daily capacity and venue
+    blackout windows. Scheduling logic will enforce daily limits.
     """
-    slots = []
-    if not venues: return slots # Return empty list if no venues provided
-    app.logger.info(f"Generating potential slots for {len(venues)} venues from {start_date} to {end_date}")
-    for dt in date_range(start_date, end_date):
-        # Create potential slots up to the max needed per day per venue
-        max_slots_per_venue_per_day = WEEKEND_MATCHES_LIMIT
+    app.logger.debug("Generating potential slots for %d venues from %s to %s", len(venues), start_date, end_date)
+    # Create potential slots up to the max needed per day per venue; identical setups copy a shared pristine table
+    constraints = constraints or DEFAULT_CONSTRAINTS
+    slots_per_venue = constraints.slots_per_venue
+    with metrics.timer('fixtures_slot_setup_seconds'):
+        slots = _slot_template(tuple(venues), start_date, end_date, slots_per_venue, constraints.day_limits(start_date, end_date)).copy()
         for venue in venues:
-            for i in range(max_slots_per_venue_per_day):
-                 slots.append({
-                     'date': dt,
-                     'venue': venue,
-                     'assigned': False,
-                     'time_slot': i + 1
-                 })
-    slots.sort(key=lambda x: (x['date'], x['time_slot'], x['venue']))
-    app.logger.info(f"Generated {len(slots)} total potential slots.")
+            capacity = constraints.venue_day_capacity(venue)
+            if capacity < slots_per_venue: slots.cap_venue(venue, capacity)
+            for first, last in constraints.venue_blackouts.get(venue, ()):
+                for blackout_date in date_range(max(first, start_date), min(last, end_date)): slots.block(blackout_date, venue)
+        booked = _calendar_bookings.get()
+        if booked: slots.reserve(booked) # Other tournaments in the same shared calendar
+    app.logger.debug("Generated %d total potential slots.", len(slots))
     return slots
 
-# --- Scheduling Logic ---
-def schedule_matches(match_pairs, all_teams, available_slots, min_rest_days, team_venue_map, current_match_number=1, last_played_date=None, stage_name="League", round_num=None, venue_assignment_rule='home'):
+@functools.lru_cache(maxsize=32)
+def _slot_template(venues, start_date, end_date, slots_per_venue, day_limits):
+    """ Unassigned SlotIndex per (venues, window, day limits); never handed out directly, only copied. """
+    return SlotIndex(venues, start_date, end_date, slots_per_venue=slots_per_venue, day_limits=day_limits)
+
+class SlotIndex:
     """
-    Assigns match pairs to slots respecting constraints including MAX DAILY MATCHES.
-    MODIFIES the 'assigned' status in the original available_slots list.
+    Compact slot table keyed by venue and date with a per-date capacity counter.
+    A slot is an integer id laid out in (date, time_slot, venue) order, so no sort
+    or per-slot object is needed: day offset, time slot and venue id are derived
+    from the id, and assignment state lives in typed arrays.
+    Answers 'next free slot at or after date D' (optionally at one venue) from
+    bitmasks of open days (bit N = start_date + N days).
+    day_limits (bytes, one match limit per day) comes from ConstraintProfile.day_limits;
+    slots_per_venue and day_limits default to DEFAULT_CONSTRAINTS.
+    'probes' counts the slots next_free examined in this table; a table belongs to one run, so
+    concurrent runs never share a counter (count_slot_probes adds them up per run).
     """
-    scheduled_fixtures_dicts = []
-    if last_played_date is None:
-        last_played_date = {team: None for team in all_teams}
+    def __init__(self, venues, start_date, end_date, slots_per_venue=None, day_limits=None):
+        if slots_per_venue is None: slots_per_venue = DEFAULT_CONSTRAINTS.slots_per_venue
+        self.venues = list(venues); self.venue_ids = {venue: i for i, venue in enumerate(self.venues)}
+        self.start_date = start_date; self.slots_per_venue = slots_per_venue
+        self.num_days = max(0, (end_date - start_date).days + 1) if self.venues else 0
+        self.slots_per_day = slots_per_venue * len(self.venues)
+        self.dates = [start_date + timedelta(days=day) for day in range(self.num_days)]
+        self.assigned = bytearray(self.num_days * self.slots_per_day)  # 1 = slot taken
+        self.venue_day_used = bytearray(self.num_days * len(self.venues))  # Slots taken per (day, venue)
+        self.day_count = array('H', bytes(2 * self.num_days))  # Matches booked per day
+        self.day_taken = array('H', bytes(2 * self.num_days))  # Slots booked or blocked per day
+        self.day_limit = (day_limits if day_limits is not None else DEFAULT_CONSTRAINTS.day_limits(start_date, end_date))[:self.num_days] # Read-only, shared by copies
+        self.assigned_total = 0; self.blocked_total = 0; self.probes = 0
+        for tables in _slot_tables.get(): tables.append(self)
+        all_days = (1 << self.num_days) - 1
+        self.venue_free_mask = [all_days if slots_per_venue else 0 for _ in self.venues]  # Days with an unassigned slot per venue
+        self.open_mask = 0  # Days still under their daily limit with at least one unassigned slot
+        if self.slots_per_day:
+            for day, limit in enumerate(self.day_limit):
+                if limit: self.open_mask |= 1 << day
 
-    match_num_counter = current_match_number
-    alternate_venue_counter = 0
-    app.logger.info(f"Scheduling {len(match_pairs)} pairs for Stage: {stage_name}, Round: {round_num}. Daily Limits: {WEEKDAY_MATCHES_LIMIT}(Wkdy)/{WEEKEND_MATCHES_LIMIT}(Wknd). Rule: '{venue_assignment_rule}'.")
-    shuffled_pairs = random.sample(match_pairs, len(match_pairs))
-    required_rest_delta = timedelta(days=min_rest_days + 1)
+    def __len__(self): return len(self.assigned)
 
-    # --- Track matches scheduled per date during THIS run, considering pre-assigned slots ---
-    matches_scheduled_on_date = {}
-    for slot in available_slots:
-        if slot['assigned']:
-            matches_scheduled_on_date[slot['date']] = matches_scheduled_on_date.get(slot['date'], 0) + 1
+    def copy(self):
+        """ Independent copy of the table and its bookings (the read-only date list is shared). """
+        clone = object.__new__(SlotIndex); clone.__dict__.update(self.__dict__)
+        clone.assigned = bytearray(self.assigned); clone.venue_day_used = bytearray(self.venue_day_used)
+        clone.day_count = array('H', self.day_count); clone.day_taken = array('H', self.day_taken); clone.venue_free_mask = list(self.venue_free_mask)
+        clone.probes = 0
+        for tables in _slot_tables.get(): tables.append(clone)
+        return clone
 
-    # --- Scheduling Loop ---
-    for team1, team2 in shuffled_pairs:
-        match_scheduled_this_pair = False
+    def remaining(self):
+        """ Number of slots not yet assigned or blocked. """
+        return len(self.assigned) - self.assigned_total - self.blocked_total
+
+    def date_of(self, slot): return self.dates[slot // self.slots_per_day]
+    def venue_of(self, slot): return self.venues[slot % len(self.venues)]
+    def time_slot_of(self, slot): return (slot % self.slots_per_day) // len(self.venues) + 1
+
+    def slot_at(self, slot_date, venue, time_slot):
+        """ Slot id for a (date, venue, time_slot), or None if outside the table. """
+        day = (slot_date - self.start_date).days; venue_id = self.venue_ids.get(venue)
+        if venue_id is None or not 0 <= day < self.num_days or not 1 <= time_slot <= self.slots_per_venue: return None
+        return day * self.slots_per_day + (time_slot - 1) * len(self.venues) + venue_id
+
+    def free_days_mask(self, venue=None):
+        """ Bitmask of open days with an unassigned slot (at 'venue' if given; a tuple means any of those venues). """
+        if venue is None: return self.open_mask
+        if isinstance(venue, tuple):
+            mask = 0
+            for name in venue: mask |= self.free_days_mask(name)
+            return mask
+        venue_id = self.venue_ids.get(venue)
+        return self.open_mask & self.venue_free_mask[venue_id] if venue_id is not None else 0
+
+    def open_capacity(self):
+        """ Matches that can still be booked, honouring daily limits. """
+        return sum(max(0, min(limit - count, self.slots_per_day - taken)) for limit, count, taken in zip(self.day_limit, self.day_count, self.day_taken))
+
+    def next_free(self, earliest_date=None, venue=None):
+        """ Earliest unassigned slot id on an open day >= earliest_date (at 'venue' if given), or None. """
+        if not self.num_days: return None
+        first_day = max(0, (earliest_date - self.start_date).days) if earliest_date else 0
+        mask = self.free_days_mask(venue) >> first_day
+        if not mask: return None
+        day = first_day + (mask & -mask).bit_length() - 1
+        num_venues = len(self.venues); base = day * self.slots_per_day
+        if venue is None:
+            slot = next(slot for slot in range(base, base + self.slots_per_day) if not self.assigned[slot])
+            self.probes += slot - base + 1
+            return slot
+        if isinstance(venue, tuple):
+            venue_ids = {self.venue_ids[name] for name in venue if name in self.venue_ids}
+            slot = next(slot for slot in range(base, base + self.slots_per_day) if slot % num_venues in venue_ids and not self.assigned[slot])
+            self.probes += slot - base + 1
+            return slot
+        venue_id = self.venue_ids[venue]
+        slot = next(slot for slot in range(base + venue_id, base + self.slots_per_day, num_venues) if not self.assigned[slot])
+        self.probes += (slot - base - venue_id) // num_venues + 1
+        return slot
+
+    def skip_reasons(self, earliest_date, slot, venue=None):
+        """
+        Why next_free(earliest_date, venue) landed on 'slot' rather than earlier (metrics only):
+        skipped days closed by the daily limit ('day_limit') or with no free slot at the venue
+        ('venue'), and 'rest' = 1 if an earlier open day was ruled out by earliest_date alone.
+        """
+        first_day = max(0, (earliest_date - self.start_date).days) if earliest_date else 0
+        found_day = slot // self.slots_per_day
+        skipped = ((1 << found_day) - 1) & ~((1 << first_day) - 1) & ~self.free_days_mask(venue)
+        closed = skipped & ~self.open_mask
+        return {'day_limit': bin(closed).count('1'), 'venue': bin(skipped & ~closed).count('1'),
+                'rest': 1 if self.free_days_mask(venue) & ((1 << first_day) - 1) else 0}
+
+    def assign(self, slot):
+        """ Marks a slot as taken and updates the day and venue availability masks. """
+        day = slot // self.slots_per_day; venue_id = slot % len(self.venues)
+        self.assigned[slot] = 1; self.assigned_total += 1
+        self.day_count[day] += 1; self.day_taken[day] += 1
+        if self.day_count[day] >= self.day_limit[day] or self.day_taken[day] >= self.slots_per_day: self.open_mask &= ~(1 << day)
+        used_index = day * len(self.venues) + venue_id
+        self.venue_day_used[used_index] += 1
+        if self.venue_day_used[used_index] >= self.slots_per_venue: self.venue_free_mask[venue_id] &= ~(1 << day)
+
+    def release(self, slot):
+        """ Undoes assign(); used by the backtracking engine. """
+        day = slot // self.slots_per_day; venue_id = slot % len(self.venues)
+        self.assigned[slot] = 0; self.assigned_total -= 1
+        self.day_count[day] -= 1; self.day_taken[day] -= 1
+        if self.day_count[day] < self.day_limit[day]: self.open_mask |= 1 << day
+        self.venue_day_used[day * len(self.venues) + venue_id] -= 1
+        self.venue_free_mask[venue_id] |= 1 << day
+
+    def block(self, slot_date, venue=None):
+        """ Takes a venue (or every venue) out of service for a date without using the daily match limit. """
+        day = (slot_date - self.start_date).days
+        if not 0 <= day < self.num_days: return 0
+        venue_ids = range(len(self.venues)) if venue is None else [self.venue_ids[venue]] if venue in self.venue_ids else []
+        blocked = 0; base = day * self.slots_per_day
+        for venue_id in venue_ids:
+            for slot in range(base + venue_id, base + self.slots_per_day, len(self.venues)):
+                if self.assigned[slot]: continue
+                self.assigned[slot] = 1; self.day_taken[day] += 1; self.venue_day_used[day * len(self.venues) + venue_id] += 1; blocked += 1
+            self.venue_free_mask[venue_id] &= ~(1 << day)
+        if self.day_taken[day] >= self.slots_per_day: self.open_mask &= ~(1 << day)
+        self.blocked_total += blocked
+        return blocked
+
+    def reserve(self, bookings):
+        """
+        Takes (date, venue, time_slot) bookings made elsewhere (a shared calendar) out of the table.
+        Each one counts towards its day's match limit even when the venue or time slot is not in this table.
+        """
+        for slot_date, venue, time_slot in bookings:
+            day = (slot_date - self.start_date).days
+            if not 0 <= day < self.num_days: continue
+            slot = self.slot_at(slot_date, venue, time_slot)
+            if slot is not None and not self.assigned[slot]: self.assign(slot); continue
+            self.day_count[day] += 1
+            if self.day_count[day] >= self.day_limit[day]: self.open_mask &= ~(1 << day)
+
+    def cap_venue(self, venue, capacity):
+        """ Limits a venue to 'capacity' matches per day by blocking its later time slots on every day. """
+        venue_id = self.venue_ids.get(venue)
+        if venue_id is None or capacity >= self.slots_per_venue: return 0
+        num_venues = len(self.venues); blocked = 0
+        for day in range(self.num_days):
+            base = day * self.slots_per_day
+            for slot in range(base + capacity * num_venues + venue_id, base + self.slots_per_day, num_venues):
+                if self.assigned[slot]: continue
+                self.assigned[slot] = 1; self.day_taken[day] += 1; self.venue_day_used[day * num_venues + venue_id] += 1; blocked += 1
+            if self.venue_day_used[day * num_venues + venue_id] >= self.slots_per_venue: self.venue_free_mask[venue_id] &= ~(1 << day)
+            if self.day_taken[day] >= self.slots_per_day: self.open_mask &= ~(1 << day)
+        self.blocked_total += blocked
+        return blocked
+
+    def matches_on(self, slot_date):
+        """ Matches already booked on a date (0 outside the table window). """
+        day = (slot_date - self.start_date).days
+        return self.day_count[day] if 0 <= day < self.num_days else 0
+
+@contextlib.contextmanager
+def count_slot_probes():
+    """
+    Yields a callable returning the slots examined by next_free in every SlotIndex built inside
+    the block so far. Scoped to the current thread or task; nested blocks count towards each enclosing one.
+    """
+    tables = []; token = _slot_tables.set(_slot_tables.get() + (tables,))
+    try: yield lambda: sum(table.probes for table in tables)
+    finally: _slot_tables.reset(token)
+
+# --- Constraint Profiles ---
+class ConstraintProfile:
+    """
+    Scheduling rules for one request: rest days, match limits per weekday (across all venues),
+    holiday limits, per-venue daily capacity and blackout windows (per venue or everywhere).
+    day_limits() compiles the calendar rules into a per-day lookup table once per window, so the
+    schedulers never call weekday() or read module constants in their loops.
+    Treat as immutable once built; instances are shared between threads and pickled to workers.
+    """
+    WEEKDAY_NAMES = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+    def __init__(self, min_rest_days=MIN_REST_DAYS, weekday_limits=None, playoff_start_gap_days=PLAYOFF_START_GAP_DAYS, holidays=None, venue_capacity=None, blackouts=None, venue_blackouts=None):
+        self.min_rest_days = min_rest_days; self.playoff_start_gap_days = playoff_start_gap_days
+        self.weekday_limits = tuple(weekday_limits) if weekday_limits else (WEEKDAY_MATCHES_LIMIT,) * 5 + (WEEKEND_MATCHES_LIMIT,) * 2
+        self.holidays = dict(holidays or {}) # date -> match limit for that day
+        self.venue_capacity = dict(venue_capacity or {}) # venue -> matches per day
+        self.blackouts = merge_date_ranges(blackouts or []) # (first, last) ranges closed at every venue
+        self.venue_blackouts = {venue: merge_date_ranges(ranges) for venue, ranges in (venue_blackouts or {}).items() if ranges}
+        # Time slots per venue and day: enough for the busiest day; venues without a capacity get that many
+        self.default_venue_capacity = max(self.weekday_limits + tuple(self.holidays.values()) + (1,))
+        self.slots_per_venue = max((self.default_venue_capacity,) + tuple(self.venue_capacity.values()))
+        self._day_limits = {}
+
+    @classmethod
+    def from_mapping(cls, data, venue_rules=None):
+        """
+        Profile from request fields: min_rest_days, weekday_limit/weekend_limit (Mon-Fri/Sat-Sun),
+        weekday_limits (7 numbers from Monday or {'mon': n, ...}), playoff_start_gap_days,
+        holidays (dates/ranges, or {date: limit}; holiday_limit defaults to the weekend limit),
+        venue_capacity ({venue: n}), blackouts (dates/ranges closed everywhere) and
+        venue_blackouts ({venue: dates/ranges}). venue_rules from a roster import are merged in;
+        explicit venue_capacity entries win. Raises ValueError on the first invalid field.
+        """
+        data = data or {}; venue_rules = venue_rules or {}
+        def whole_number(field, default, low, high):
+            value = data.get(field)
+            if value in (None, ''): return default
+            try:
+                number = int(str(value).strip())
+                if not low <= number <= high: raise ValueError
+            except ValueError: raise ValueError(f"'{field}' must be a whole number from {low} to {high}.")
+            return number
+        limits = [whole_number('weekday_limit', WEEKDAY_MATCHES_LIMIT, 0, MAX_DAILY_MATCHES)] * 5 + [whole_number('weekend_limit', WEEKEND_MATCHES_LIMIT, 0, MAX_DAILY_MATCHES)] * 2
+        per_day = data.get('weekday_limits')
+        if per_day not in (None, '', [], {}):
+            if isinstance(per_day, dict): entries = [(cls.WEEKDAY_NAMES.index(str(day).strip().lower()[:3]) if str(day).strip().lower()[:3] in cls.WEEKDAY_NAMES else None, value) for day, value in per_day.items()]
+            elif isinstance(per_day, list) and len(per_day) == 7: entries = list(enumerate(per_day))
+            else: raise ValueError("'weekday_limits' must list 7 limits from Monday or map day names to limits.")
+            for weekday, value in entries:
+                if weekday is None: raise ValueError("'weekday_limits' keys must be day names (mon..sun).")
+                try:
+                    limits[weekday] = int(value)
+                    if not 0 <= limits[weekday] <= MAX_DAILY_MATCHES: raise ValueError
+                except (TypeError, ValueError): raise ValueError(f"'weekday_limits' values must be whole numbers from 0 to {MAX_DAILY_MATCHES}.")
+        holiday_limit = whole_number('holiday_limit', max(limits[5:]), 0, MAX_DAILY_MATCHES)
+        holidays = {}; raw_holidays = data.get('holidays')
+        if isinstance(raw_holidays, dict):
+            for day, value in raw_holidays.items():
+                try:
+                    limit = int(value) if value not in (None, '') else holiday_limit
+                    if not 0 <= limit <= MAX_DAILY_MATCHES: raise ValueError
+                    holidays[datetime.strptime(str(day).strip(), '%Y-%m-%d').date()] = limit
+                except (TypeError, ValueError): raise ValueError(f"'holidays' entry '{day}' must be a YYYY-MM-DD date with a limit from 0 to {MAX_DAILY_MATCHES}.")
+        else:
+            try: ranges = parse_blackouts(raw_holidays)
+            except ValueError: raise ValueError("'holidays' entries must be YYYY-MM-DD dates or YYYY-MM-DD..YYYY-MM-DD ranges.")
+            holidays = {day: holiday_limit for first, last in ranges for day in date_range(first, last)}
+        capacity = {venue: rule['capacity'] for venue, rule in venue_rules.items() if rule.get('capacity')}
+        raw_capacity = data.get('venue_capacity') or {}
+        if not isinstance(raw_capacity, dict): raise ValueError("'venue_capacity' must map venue names to matches per day.")
+        for venue, value in raw_capacity.items():
+            try:
+                capacity[str(venue)] = int(value)
+                if not 1 <= capacity[str(venue)] <= MAX_VENUE_CAPACITY: raise ValueError
+            except (TypeError, ValueError): raise ValueError(f"'venue_capacity' for '{venue}' must be a whole number from 1 to {MAX_VENUE_CAPACITY}.")
+        try: blackouts = parse_blackouts(data.get('blackouts'))
+        except ValueError as e: raise ValueError(f"'blackouts': {e}.")
+        venue_blackouts = {venue: list(rule.get('blackouts', ())) for venue, rule in venue_rules.items()}
+        raw_venue_blackouts = data.get('venue_blackouts') or {}
+        if not isinstance(raw_venue_blackouts, dict): raise ValueError("'venue_blackouts' must map venue names to blackout dates.")
+        for venue, value in raw_venue_blackouts.items():
+            try: venue_blackouts.setdefault(str(venue), []).extend(parse_blackouts(value))
+            except ValueError as e: raise ValueError(f"'venue_blackouts' for '{venue}': {e}.")
+        return cls(whole_number('min_rest_days', MIN_REST_DAYS, 0, MAX_REST_DAYS), limits, whole_number('playoff_start_gap_days', PLAYOFF_START_GAP_DAYS, 0, MAX_REST_DAYS),
+                   holidays, capacity, blackouts, venue_blackouts)
+
+    def day_limits(self, start_date, end_date):
+        """
+        Match limit per day from start_date to end_date as bytes (index = day offset): the weekday
+        limit, replaced by the holiday limit on holidays and 0 on days blacked out everywhere.
+        Compiled once per window and cached on the profile.
+        """
+        window = (start_date, end_date); limits = self._day_limits.get(window)
+        if limits is not None: return limits
+        num_days = max(0, (end_date - start_date).days + 1); first_weekday = start_date.weekday()
+        week = self.weekday_limits[first_weekday:] + self.weekday_limits[:first_weekday]
+        table = bytearray(bytes(week) * (num_days // 7 + 1))[:num_days]
+        for holiday, limit in self.holidays.items():
+            day = (holiday - start_date).days
+            if 0 <= day < num_days: table[day] = limit
+        for first, last in self.blackouts:
+            first_day = max(0, (first - start_date).days); last_day = min(num_days - 1, (last - start_date).days)
+            if first_day <= last_day: table[first_day:last_day + 1] = bytes(last_day - first_day + 1)
+        limits = self._day_limits[window] = bytes(table)
+        return limits
+
+    def venue_day_capacity(self, venue):
+        """ Matches per day a venue can host. """
+        return self.venue_capacity.get(venue) or self.default_venue_capacity
+
+    def to_json(self):
+        """ JSON-safe form accepted back by from_mapping (also the cache-key and storage form). """
+        def ranges(items): return [first.isoformat() if first == last else f"{first.isoformat()}..{last.isoformat()}" for first, last in items]
+        return {'min_rest_days': self.min_rest_days, 'weekday_limits': list(self.weekday_limits), 'playoff_start_gap_days': self.playoff_start_gap_days,
+                'holidays': {day.isoformat(): limit for day, limit in sorted(self.holidays.items())}, 'venue_capacity': dict(sorted(self.venue_capacity.items())),
+                'blackouts': ranges(self.blackouts), 'venue_blackouts': {venue: ranges(items) for venue, items in sorted(self.venue_blackouts.items())}}
+
+    def __getstate__(self): return dict(self.__dict__, _day_limits={}) # Compiled tables are rebuilt per process
+    def __repr__(self): return f"ConstraintProfile({self.to_json()!r})"
+
+DEFAULT_CONSTRAINTS = ConstraintProfile()
+
+# --- Scheduling Logic ---
+def preferred_venues_for(match_pairs, team_venue_map, venue_assignment_rule, rng=None):
+    """ Preferred venue per pair under the assignment rule (None = any venue for 'random'). """
+    rng = rng or random.Random()
+    preferred = []; alternate_venue_counter = 0; all_unique_venues = None
+    for team1, team2 in match_pairs:
         preferred_venue = None
-        # Determine Preferred Venue
         if venue_assignment_rule == 'home': preferred_venue = team_venue_map.get(team1)
         elif venue_assignment_rule == 'away': preferred_venue = team_venue_map.get(team2)
         elif venue_assignment_rule == 'alternate':
@@ -129,120 +735,317 @@ def schedule_matches(match_pairs, all_teams, available_slots, min_rest_days, tea
             alternate_venue_counter += 1
         # Fallback for random or if team not in map
         if not preferred_venue and venue_assignment_rule != 'random':
-            all_unique_venues = list(set(team_venue_map.values()))
+            if all_unique_venues is None: all_unique_venues = sorted({venue for home in team_venue_map.values() for venue in (home if isinstance(home, tuple) else (home,))})
             if not all_unique_venues: raise ValueError(f"No venues found for fallback {team1} vs {team2}.")
-            preferred_venue = random.choice(all_unique_venues)
+            preferred_venue = rng.choice(all_unique_venues)
+        preferred.append(preferred_venue)
+    return preferred
 
-        # Find earliest valid slot
-        for slot in available_slots:
-            # 1. Skip if already assigned in a previous call or earlier in this call
-            if slot['assigned']: continue
+def schedule_matches(match_pairs, all_teams, available_slots, min_rest_days, team_venue_map, current_match_number=1, last_played_date=None, stage_name="League", round_num=None, venue_assignment_rule='home', engine='greedy', rng=None, deadline=None):
+    """
+    Assigns match pairs to slots respecting constraints including MAX DAILY MATCHES.
+    'available_slots' is a SlotIndex; assignments are recorded in it so later calls see them.
+    engine='greedy' places shuffled pairs in their earliest slot; engine='backtrack' uses solve_matches
+    and finishes with the greedy pass if the solver is still searching at 'deadline' (time.monotonic()).
+    """
+    generation_deadline = _generation_deadline.get()
+    if generation_deadline is not None and time.monotonic() > generation_deadline:
+        raise ValueError(f"Stopped at Stage: {stage_name}: the seed search time limit was reached.")
+    progress = _progress_hook.get(); started = time.perf_counter()
+    if progress: progress(stage_name, planned=len(match_pairs))
+    if engine == 'backtrack':
+        try:
+            solved = solve_matches(match_pairs, all_teams, available_slots, min_rest_days, team_venue_map, current_match_number, last_played_date, stage_name, round_num, venue_assignment_rule, deadline=deadline, rng=rng)
+        except SolverTimeout as e:
+            app.logger.warning("%s Falling back to the greedy engine.", e)
+            metrics.inc('fixtures_solver_fallbacks_total', stage=stage_name); engine = 'greedy'
+        else:
+            metrics.inc('fixtures_pairs_scheduled_total', len(solved[0]), engine=engine)
+            metrics.observe('fixtures_stage_seconds', time.perf_counter() - started, stage=stage_name, engine=engine)
+            return solved
+    elif engine != 'greedy': raise ValueError(f"Unknown scheduling engine: {engine}")
+    rng = rng or random.Random()
+    scheduled_fixtures_dicts = []
+    if last_played_date is None:
+        last_played_date = {team: None for team in all_teams}
+    tracked_teams = set(all_teams)
 
-            # 2. Daily Match Limit Check
-            slot_date = slot['date']
-            day_limit = WEEKEND_MATCHES_LIMIT if slot_date.weekday() >= 5 else WEEKDAY_MATCHES_LIMIT
-            if matches_scheduled_on_date.get(slot_date, 0) >= day_limit:
-                continue
+    match_num_counter = current_match_number
+    app.logger.debug("Scheduling %d pairs for Stage: %s, Round: %s. Rule: '%s'.", len(match_pairs), stage_name, round_num, venue_assignment_rule)
+    shuffled_pairs = rng.sample(match_pairs, len(match_pairs))
+    required_rest_delta = timedelta(days=min_rest_days + 1)
 
-            # 3. Venue constraint (only if not 'random')
-            if venue_assignment_rule != 'random' and slot['venue'] != preferred_venue:
-                continue
+    # --- Scheduling Loop ---
+    for (team1, team2), preferred_venue in zip(shuffled_pairs, preferred_venues_for(shuffled_pairs, team_venue_map, venue_assignment_rule, rng)):
+        # Rest days for actual teams give the earliest possible date; the index jumps to the first open day from there
+        earliest_date = None
+        for team in (team1, team2):
+            team_last = last_played_date.get(team) if team in tracked_teams else None
+            if team_last is not None and (earliest_date is None or team_last + required_rest_delta > earliest_date):
+                earliest_date = team_last + required_rest_delta
+        probes_before = available_slots.probes
+        slot = available_slots.next_free(earliest_date, preferred_venue)
+        if slot is None:
+            metrics.inc('fixtures_rejections_total', reason='no_slot')
+            raise ValueError(f"Could not schedule match {team1} vs {team2} (Stage: {stage_name}). Constraints too tight. Remaining potential slots: {available_slots.remaining()}. Try extending dates.")
+        if metrics.enabled:
+            metrics.observe('fixtures_slot_checks_per_pair', available_slots.probes - probes_before)
+            for reason, skipped in available_slots.skip_reasons(earliest_date, slot, preferred_venue).items():
+                if skipped: metrics.inc('fixtures_rejections_total', skipped, reason=reason)
 
-            # 4. Rest Days for actual teams
-            t1_last = last_played_date.get(team1) if team1 in all_teams else None
-            t2_last = last_played_date.get(team2) if team2 in all_teams else None
-            rest_ok_t1 = t1_last is None or (slot_date - t1_last >= required_rest_delta)
-            rest_ok_t2 = t2_last is None or (slot_date - t2_last >= required_rest_delta)
-            if not (rest_ok_t1 and rest_ok_t2):
-                continue
+        # --- Slot Found - Schedule Match ---
+        slot_date = available_slots.date_of(slot)
+        fixture_dict = { 'stage': stage_name, 'round': round_num, 'match_number': match_num_counter, 'match_type': None, 'date': slot_date, 'venue': available_slots.venue_of(slot), 'team1': team1, 'team2': team2, 'time_slot': available_slots.time_slot_of(slot) }
+        scheduled_fixtures_dicts.append(fixture_dict)
 
-            # --- Slot Found - Schedule Match ---
-            fixture_dict = { 'stage': stage_name, 'round': round_num, 'match_number': match_num_counter, 'match_type': None, 'date': slot_date, 'venue': slot['venue'], 'team1': team1, 'team2': team2, 'time_slot': slot['time_slot'] }
-            scheduled_fixtures_dicts.append(fixture_dict)
+        # Update last played dates
+        if team1 in tracked_teams: last_played_date[team1] = slot_date
+        if team2 in tracked_teams: last_played_date[team2] = slot_date
 
-            # Update last played dates
-            if team1 in all_teams: last_played_date[team1] = slot_date
-            if team2 in all_teams: last_played_date[team2] = slot_date
+        # Mark slot as assigned in the shared index (!!! IMPORTANT !!!)
+        available_slots.assign(slot)
+        match_num_counter += 1
+        if progress: progress(stage_name, scheduled=1)
 
-            # Mark original slot as assigned (!!! IMPORTANT !!!)
-            slot['assigned'] = True
+    # --- Final processing for this scheduling call ---
+    scheduled_fixtures_dicts.sort(key=lambda x: (x['date'], x['time_slot']))
+    last_match_date_in_stage = max((f['date'] for f in scheduled_fixtures_dicts), default=None)
+    app.logger.debug("Scheduled %d matches for Stage: %s.", len(scheduled_fixtures_dicts), stage_name)
+    metrics.inc('fixtures_pairs_scheduled_total', len(scheduled_fixtures_dicts), engine=engine)
+    metrics.observe('fixtures_stage_seconds', time.perf_counter() - started, stage=stage_name, engine=engine)
+    return scheduled_fixtures_dicts, match_num_counter, last_played_date, last_match_date_in_stage
 
-            # Increment daily match counter
-            matches_scheduled_on_date[slot_date] = matches_scheduled_on_date.get(slot_date, 0) + 1
+class SolverTimeout(ValueError):
+    """ The backtracking engine used up its time budget without finding or ruling out a schedule. """
 
-            match_scheduled_this_pair = True
-            match_num_counter += 1
-            break # Move to the next match pair
+class SolverDeadEnd(ValueError):
+    """ The backtracking engine tried every placement around the matches already booked. Earlier rounds may be to blame, so this is no proof that the stage cannot be scheduled. """
 
-        if not match_scheduled_this_pair:
-            remaining_slots = sum(1 for s in available_slots if not s['assigned'])
-            raise ValueError(f"Could not schedule match {team1} vs {team2} (Stage: {stage_name}). Constraints too tight. Remaining potential slots: {remaining_slots}. Try extending dates.")
+def spaced_days(days_mask, gap, needed):
+    """ How many days of days_mask (up to 'needed') can host matches at least 'gap' days apart. """
+    count = 0
+    while days_mask and count < needed:
+        day = (days_mask & -days_mask).bit_length() - 1; count += 1
+        days_mask &= ~((1 << (day + gap)) - 1)
+    return count
 
-    # --- Final processing for this scheduling call ---
+def solve_matches(match_pairs, all_teams, available_slots, min_rest_days, team_venue_map, current_match_number=1, last_played_date=None, stage_name="League", round_num=None, venue_assignment_rule='home', deadline=None, rng=None):
+    """
+    Backtracking scheduler with forward checking. Always places the pair with the fewest
+    feasible days next, tries its days earliest-first and undoes assignments on dead ends,
+    so rest days, daily limits and venue rules are enforced in one solve. A partial schedule
+    is abandoned as soon as some team has more matches left than rest-spaced days it could use.
+    Same arguments/return as schedule_matches. Raises ValueError if there are more pairs than
+    bookable slots, SolverDeadEnd if no placement fits around the existing bookings and
+    SolverTimeout if 'deadline' passes first (both with every assignment undone); the default
+    deadline is SOLVER_TIME_BUDGET_SECONDS from now. Matches placed so far are reported to the
+    progress hook while it searches (the count drops when it backtracks and is withdrawn on failure).
+    """
+    if deadline is None: deadline = time.monotonic() + SOLVER_TIME_BUDGET_SECONDS
+    if last_played_date is None:
+        last_played_date = {team: None for team in all_teams}
+    tracked_teams = set(all_teams)
+    pairs = list(match_pairs); index = available_slots
+    app.logger.debug("Solving %d pairs for Stage: %s, Round: %s (backtracking). Rule: '%s'.", len(pairs), stage_name, round_num, venue_assignment_rule)
+    venue_for_pair = preferred_venues_for(pairs, team_venue_map, venue_assignment_rule, rng)
+    if len(pairs) > index.open_capacity():
+        raise ValueError(f"No valid schedule exists for Stage: {stage_name}: {len(pairs)} matches but only {index.open_capacity()} bookable slots. Try extending dates.")
+
+    # Days a team may not play: before its rest-adjusted last match, and within min_rest_days of a booked match
+    rest_window = (1 << (2 * min_rest_days + 1)) - 1
+    floor_mask = {}; booked_days = {team: [] for team in tracked_teams}; blocked_mask = {team: 0 for team in tracked_teams}
+    for team in tracked_teams:
+        if last_played_date.get(team):
+            first_day = (last_played_date[team] - index.start_date).days + min_rest_days + 1
+            floor_mask[team] = ~((1 << max(first_day, 0)) - 1)
+    def window_around(day): return rest_window << (day - min_rest_days) if day >= min_rest_days else rest_window >> (min_rest_days - day)
+    def team_mask(team):
+        if team not in tracked_teams: return -1
+        return floor_mask.get(team, -1) & ~blocked_mask[team]
+    def domain(i):
+        team1, team2 = pairs[i]
+        return index.free_days_mask(venue_for_pair[i]) & team_mask(team1) & team_mask(team2)
+    def book(i, day):
+        slot = index.next_free(index.dates[day], venue_for_pair[i]); index.assign(slot)
+        for team in pairs[i]:
+            if team in tracked_teams: booked_days[team].append(day); blocked_mask[team] |= window_around(day)
+        return slot
+    def unbook(i, slot):
+        index.release(slot)
+        for team in pairs[i]:
+            if team in tracked_teams:
+                booked_days[team].pop(); blocked_mask[team] = 0
+                for day in booked_days[team]: blocked_mask[team] |= window_around(day)
+    def choose(unassigned):
+        """ Next (pair, days to try): fewest days first; no days when a pair or a team is already stuck. """
+        domains = {}; team_days = {}; team_left = {}
+        for i in unassigned:
+            mask = domains[i] = domain(i)
+            if not mask: return i, 0
+            for team in pairs[i]:
+                if team in tracked_teams: team_days[team] = team_days.get(team, 0) | mask; team_left[team] = team_left.get(team, 0) + 1
+        for team, left in team_left.items():
+            if left > 1 and spaced_days(team_days[team], min_rest_days + 1, left) < left:
+                return next(i for i in unassigned if team in pairs[i]), 0
+        best = min(unassigned, key=lambda i: (bin(domains[i]).count('1'), i))
+        return best, domains[best]
+
+    # Explicit DFS stack of [pair index, untried days mask, booked slot]
+    frames = []; unassigned = set(range(len(pairs))); nodes = 0
+    progress = _progress_hook.get(); reported = 0 # Placements already sent to the progress hook
+    while unassigned:
+        best, best_mask = choose(unassigned)
+        unassigned.discard(best); frames.append([best, best_mask, None])
+        while frames:
+            frame = frames[-1]
+            if frame[2] is not None: unbook(frame[0], frame[2]); frame[2] = None
+            if not frame[1]:
+                frames.pop(); unassigned.add(frame[0]); continue
+            nodes += 1
+            if nodes % 64 == 0:
+                if progress and len(frames) - 1 != reported: progress(stage_name, scheduled=len(frames) - 1 - reported); reported = len(frames) - 1 # Frames below the top are booked
+                if time.monotonic() > deadline:
+                    for frame in reversed(frames):
+                        if frame[2] is not None: unbook(frame[0], frame[2])
+                    if progress and reported: progress(stage_name, scheduled=-reported)
+                    raise SolverTimeout(f"Could not schedule Stage: {stage_name}, Round: {round_num} within the solver time budget ({nodes} placements).")
+            lowest_day = frame[1] & -frame[1]; frame[1] ^= lowest_day
+            frame[2] = book(frame[0], lowest_day.bit_length() - 1)
+            break
+        else:
+            if progress and reported: progress(stage_name, scheduled=-reported)
+            raise SolverDeadEnd(f"Could not schedule Stage: {stage_name}, Round: {round_num} around the matches already booked ({nodes} placements).")
+    if progress and len(frames) != reported: progress(stage_name, scheduled=len(frames) - reported)
+
+    # --- Build fixtures in date order ---
+    scheduled_fixtures_dicts = []
+    for i, _, slot in frames:
+        team1, team2 = pairs[i]; slot_date = index.date_of(slot)
+        scheduled_fixtures_dicts.append({ 'stage': stage_name, 'round': round_num, 'match_number': 0, 'match_type': None, 'date': slot_date, 'venue': index.venue_of(slot), 'team1': team1, 'team2': team2, 'time_slot': index.time_slot_of(slot) })
+        for team in (team1, team2):
+            if team in tracked_teams and (last_played_date.get(team) is None or slot_date > last_played_date[team]): last_played_date[team] = slot_date
     scheduled_fixtures_dicts.sort(key=lambda x: (x['date'], x['time_slot']))
+    for offset, fixture in enumerate(scheduled_fixtures_dicts): fixture['match_number'] = current_match_number + offset
     last_match_date_in_stage = max((f['date'] for f in scheduled_fixtures_dicts), default=None)
-    app.logger.info(f"Scheduled {len(scheduled_fixtures_dicts)} matches for Stage: {stage_name}.")
-    return scheduled_fixtures_dicts, match_num_counter, last_played_date, last_match_date_in_stage
+    app.logger.info("Solved %d matches for Stage: %s in %d placements.", len(scheduled_fixtures_dicts), stage_name, nodes)
+    return scheduled_fixtures_dicts, current_match_number + len(scheduled_fixtures_dicts), last_played_date, last_match_date_in_stage
 
 # --- Fixture Generation (Specific Types) ---
 
-def generate_round_robin_fixtures(teams, venues, team_venue_map, start_date, end_date, min_rest_days):
-    """ Generates Single Round Robin fixtures. """
+def circle_method_rounds(teams):
+    """
+    Berger/circle-method round robin: returns n-1 rounds of (home, away) pairs in which every
+    team plays at most once (odd counts give one team a bye per round). Home/away is alternated
+    so home counts differ by at most one.
+    """
+    participants = list(teams)
+    if len(participants) % 2: participants.insert(0, None) # Fixed 'bye' position keeps odd leagues balanced
+    num_slots = len(participants); rotating = participants[1:]; rounds = []
+    for round_index in range(num_slots - 1):
+        lineup = [participants[0]] + rotating; round_pairs = []
+        for i in range(num_slots // 2):
+            home, away = lineup[i], lineup[num_slots - 1 - i]
+            if home is None or away is None: continue
+            if (i == 0 and round_index % 2 == 1) or (i > 0 and i % 2 == 1): home, away = away, home
+            round_pairs.append((home, away))
+        rounds.append(round_pairs)
+        rotating = rotating[-1:] + rotating[:-1]
+    return rounds
+
+def schedule_rounds(rounds, all_teams, available_slots, min_rest_days, team_venue_map, current_match_number=1, last_played_date=None, stage_name="League", venue_assignment_rule='home', engine='greedy', rng=None):
+    """
+    Schedules circle-method rounds in order, one schedule_matches call per round, so each round's
+    matches land on the first days after the previous round's rest. The backtracking engine also
+    solves round by round, sharing one SOLVER_TIME_BUDGET_SECONDS budget across the stage. It cannot
+    revisit earlier rounds, so when a round hits a dead end the whole stage is undone and scheduled
+    again by the greedy engine from the same starting point (slots, rest dates and RNG state).
+    Returns the same tuple as schedule_matches.
+    """
+    rng = rng or random.Random()
+    if last_played_date is None: last_played_date = {team: None for team in all_teams}
+    played_before = dict(last_played_date); rng_before = rng.getstate() # schedule_matches updates last_played_date in place
+    fixtures = []; planned = [0]
+    def schedule_stage(engine, deadline):
+        match_number = current_match_number
+        for round_num, round_pairs in enumerate(rounds, 1):
+            planned[0] += len(round_pairs)
+            round_fixtures, match_number, _, _ = schedule_matches(round_pairs, all_teams, available_slots, min_rest_days, team_venue_map, match_number, last_played_date, stage_name, round_num, venue_assignment_rule, engine=engine, rng=rng, deadline=deadline)
+            fixtures.extend(round_fixtures)
+        return match_number
+    try: current_match_number = schedule_stage(engine, time.monotonic() + SOLVER_TIME_BUDGET_SECONDS if engine == 'backtrack' else None)
+    except SolverDeadEnd as e:
+        app.logger.warning("%s Rescheduling Stage: %s with the greedy engine.", e, stage_name)
+        metrics.inc('fixtures_solver_fallbacks_total', stage=stage_name)
+        for fixture in fixtures: available_slots.release(available_slots.slot_at(fixture['date'], fixture['venue'], fixture['time_slot']))
+        progress = _progress_hook.get()
+        if progress: progress(stage_name, planned=-planned[0], scheduled=-len(fixtures)) # The greedy pass reports the stage again
+        last_played_date.clear(); last_played_date.update(played_before); rng.setstate(rng_before); fixtures.clear()
+        current_match_number = schedule_stage('greedy', None)
+    fixtures.sort(key=lambda x: (x['date'], x['time_slot']))
+    return fixtures, current_match_number, last_played_date, max((f['date'] for f in fixtures), default=None)
+
+def generate_round_robin_fixtures(teams, venues, team_venue_map, start_date, end_date, min_rest_days, engine='greedy', rng=None, constraints=None):
+    """ Generates Single Round Robin fixtures, built round by round with the circle method. """
+    rng = rng or random.Random()
     if len(teams) < 2: raise ValueError("Need >= 2 teams.")
     if not venues: raise ValueError("Need >= 1 venue.")
-    base_pairings = list(itertools.combinations(teams, 2))
-    available_slots = get_available_slots(venues, start_date, end_date)
+    rounds = circle_method_rounds(rng.sample(teams, len(teams)))
+    available_slots = get_available_slots(venues, start_date, end_date, constraints)
     if not available_slots: raise ValueError("No available slots.")
-    fixtures, _, _, last_date = schedule_matches(base_pairings, teams, available_slots, min_rest_days, team_venue_map, stage_name="League", venue_assignment_rule='home')
+    fixtures, _, _, last_date = schedule_rounds(rounds, teams, available_slots, min_rest_days, team_venue_map, stage_name="League", venue_assignment_rule='home', engine=engine, rng=rng)
     return fixtures, last_date
 
-def generate_double_round_robin_fixtures(teams, venues, team_venue_map, start_date, end_date, min_rest_days):
-    """ Generates Double Round Robin fixtures. """
+def generate_double_round_robin_fixtures(teams, venues, team_venue_map, start_date, end_date, min_rest_days, engine='greedy', rng=None, constraints=None):
+    """ Generates Double Round Robin fixtures; Leg 2 replays Leg 1's circle-method rounds with venues reversed. """
+    rng = rng or random.Random()
     if len(teams) < 2: raise ValueError("Need >= 2 teams.")
     if not venues: raise ValueError("Need >= 1 venue.")
-    leg1_pairings = list(itertools.combinations(teams, 2))
-    leg2_pairings = [(p[1], p[0]) for p in leg1_pairings]
-    available_slots = get_available_slots(venues, start_date, end_date)
+    leg1_rounds = circle_method_rounds(rng.sample(teams, len(teams)))
+    leg2_rounds = [[(p[1], p[0]) for p in round_pairs] for round_pairs in leg1_rounds]
+    available_slots = get_available_slots(venues, start_date, end_date, constraints)
     if not available_slots: raise ValueError("No available slots.")
-    leg1_fixtures, match_counter, last_played, last_date_leg1 = schedule_matches(leg1_pairings, teams, available_slots, min_rest_days, team_venue_map, stage_name="League (Leg 1)", venue_assignment_rule='home')
-    leg2_fixtures, _, _, last_date_leg2 = schedule_matches(leg2_pairings, teams, available_slots, min_rest_days, team_venue_map, match_counter, last_played, stage_name="League (Leg 2)", venue_assignment_rule='home')
+    leg1_fixtures, match_counter, last_played, last_date_leg1 = schedule_rounds(leg1_rounds, teams, available_slots, min_rest_days, team_venue_map, stage_name="League (Leg 1)", venue_assignment_rule='home', engine=engine, rng=rng)
+    leg2_fixtures, _, _, last_date_leg2 = schedule_rounds(leg2_rounds, teams, available_slots, min_rest_days, team_venue_map, match_counter, last_played, stage_name="League (Leg 2)", venue_assignment_rule='home', engine=engine, rng=rng)
     all_fixtures = leg1_fixtures + leg2_fixtures
     all_fixtures.sort(key=lambda x: (x['date'], x['time_slot']))
     for i, fixture in enumerate(all_fixtures): fixture['match_number'] = i + 1
     last_date = max(last_date_leg1, last_date_leg2) if last_date_leg1 and last_date_leg2 else (last_date_leg1 or last_date_leg2)
     return all_fixtures, last_date
 
-def generate_single_elimination_fixtures(teams, venues, team_venue_map, start_date, end_date, min_rest_days):
+def generate_single_elimination_fixtures(teams, venues, team_venue_map, start_date, end_date, min_rest_days, engine='greedy', rng=None, constraints=None):
     """ Generates Single Elimination fixtures. """
+    rng = rng or random.Random()
     num_teams = len(teams)
     if num_teams < 2: raise ValueError("Need >= 2 teams.")
     if not venues: raise ValueError("Need >= 1 venue.")
     all_fixtures = []; match_counter = 1; last_played = {team: None for team in teams}
     next_power_of_2 = 1 << (num_teams - 1).bit_length(); num_byes = next_power_of_2 - num_teams
-    shuffled_teams = random.sample(teams, num_teams); round1_participants = shuffled_teams[num_byes:]
+    shuffled_teams = rng.sample(teams, num_teams); round1_participants = shuffled_teams[num_byes:]
     byes_list = shuffled_teams[:num_byes]; current_participants = byes_list[:]; current_round = 1
     earliest_next_round_start = start_date
-    available_slots = get_available_slots(venues, start_date, end_date) # Get all slots once
+    available_slots = get_available_slots(venues, start_date, end_date, constraints) # Get all slots once
     if not available_slots: raise ValueError(f"No slots between {start_date} and {end_date}")
 
     # Round 1
     round1_pairs = [(round1_participants[i], round1_participants[i+1]) for i in range(0, len(round1_participants), 2)]
     if round1_pairs:
-        r1_fixtures, match_counter, last_played, last_date_r1 = schedule_matches(round1_pairs, teams, available_slots, min_rest_days, team_venue_map, match_counter, last_played, stage_name="Knockout", round_num=current_round, venue_assignment_rule='random')
+        r1_fixtures, match_counter, last_played, last_date_r1 = schedule_matches(round1_pairs, teams, available_slots, min_rest_days, team_venue_map, match_counter, last_played, stage_name="Knockout", round_num=current_round, venue_assignment_rule='random', engine=engine, rng=rng)
         all_fixtures.extend(r1_fixtures)
         current_participants.extend([f"Winner R{current_round}M{f['match_number']}" for f in r1_fixtures]) # Use overall match number
+        for f in r1_fixtures: last_played[f"Winner R{current_round}M{f['match_number']}"] = f['date'] # Winners rest like teams
         if last_date_r1: earliest_next_round_start = last_date_r1 + timedelta(days=min_rest_days + 1)
 
     # Subsequent Rounds
     while len(current_participants) > 1:
         current_round += 1;
         if len(current_participants) % 2 != 0: raise ValueError("Internal Error: Odd participants in SE round.")
-        next_round_pairs = []; random.shuffle(current_participants)
+        next_round_pairs = []; rng.shuffle(current_participants)
         for i in range(0, len(current_participants), 2): next_round_pairs.append((current_participants[i], current_participants[i+1]))
         # Pass the main available_slots list; schedule_matches handles date progression
-        round_fixtures, match_counter, last_played, last_date_round = schedule_matches(next_round_pairs, teams, available_slots, min_rest_days, team_venue_map, match_counter, last_played, stage_name="Knockout", round_num=current_round, venue_assignment_rule='random')
+        round_fixtures, match_counter, last_played, last_date_round = schedule_matches(next_round_pairs, list(last_played), available_slots, min_rest_days, team_venue_map, match_counter, last_played, stage_name="Knockout", round_num=current_round, venue_assignment_rule='random', engine=engine, rng=rng)
         all_fixtures.extend(round_fixtures)
         current_participants = [f"Winner R{current_round}M{f['match_number']}" for f in round_fixtures] # Use overall match number
+        for f in round_fixtures: last_played[f"Winner R{current_round}M{f['match_number']}"] = f['date']
         if last_date_round: earliest_next_round_start = last_date_round + timedelta(days=min_rest_days + 1)
 
     all_fixtures.sort(key=lambda x: (x['date'], x['time_slot']))
@@ -252,25 +1055,121 @@ def generate_single_elimination_fixtures(teams, venues, team_venue_map, start_da
     final_match_date = max((f['date'] for f in all_fixtures), default=None)
     return all_fixtures, final_match_date
 
-def generate_double_elimination_fixtures(teams, venues, team_venue_map, start_date, end_date, min_rest_days):
-    """ Generates Double Elimination fixtures (Simplified Placeholder). """
-    if len(teams) < 4: raise ValueError("Double Elimination typically requires >= 4 teams.")
+def generate_double_elimination_fixtures(teams, venues, team_venue_map, start_date, end_date, min_rest_days, engine='greedy', rng=None, constraints=None, available_slots=None):
+    """
+    Generates Double Elimination fixtures: a winners bracket, a losers bracket fed by the
+    winners-bracket losers, and a grand final with a reset match (played only if the
+    losers-bracket champion wins the first one).
+    Bracket nodes are built level by level from the previous results, so byes never become
+    matches. All matches share one slot table: level d holds winners round d and losers round
+    d-1, and every Winner/Loser placeholder carries its feeder's date, so min_rest_days
+    applies to it like to a team. available_slots lets a caller share that table (e.g. with playoffs).
+    """
+    rng = rng or random.Random()
+    num_teams = len(teams)
+    if num_teams < 4: raise ValueError("Double Elimination typically requires >= 4 teams.")
     if not venues: raise ValueError("Need >= 1 venue.")
-    flash("Warning: Double Elimination generation is currently simplified (uses Single Elimination structure).", "warning")
-    app.logger.warning("Double Elimination called, using Single Elimination logic.")
-    return generate_single_elimination_fixtures(teams, venues, team_venue_map, start_date, end_date, min_rest_days)
+    if available_slots is None: available_slots = get_available_slots(venues, start_date, end_date, constraints)
+    if not available_slots: raise ValueError(f"No slots between {start_date} and {end_date}")
+    bracket_size = 1 << (num_teams - 1).bit_length()
+    shuffled_teams = rng.sample(teams, num_teams); num_byes = bracket_size - num_teams
+    # Bracket order with each bye (None) facing a team: byes go to the first num_byes teams
+    winners = []
+    for i in range(bracket_size // 2):
+        winners += [shuffled_teams[i], None if i < num_byes else shuffled_teams[bracket_size - 1 - i]]
+    all_fixtures = []; match_counter = 1; last_played = {team: None for team in teams}
+
+    def play_round(entrants, stage_name, round_num, label):
+        """ Pairs entrants (i, i+1), schedules the real matches; returns (winners, losers) in bracket order (None = bye). """
+        nonlocal match_counter
+        pairs = [(entrants[i], entrants[i + 1]) for i in range(0, len(entrants), 2)]
+        real_pairs = [pair for pair in pairs if pair[0] is not None and pair[1] is not None]
+        fixture_for = {}
+        if real_pairs:
+            round_fixtures, match_counter, _, _ = schedule_matches(real_pairs, list(last_played), available_slots, min_rest_days, team_venue_map, match_counter, last_played, stage_name=stage_name, round_num=round_num, venue_assignment_rule='random', engine=engine, rng=rng)
+            all_fixtures.extend(round_fixtures)
+            fixture_for = {(f['team1'], f['team2']): f for f in round_fixtures}
+        round_winners = []; round_losers = []
+        for team1, team2 in pairs:
+            fixture = fixture_for.get((team1, team2))
+            if fixture is None: round_winners.append(team1 if team1 is not None else team2); round_losers.append(None); continue
+            winner = f"Winner {label}{round_num}M{fixture['match_number']}"; loser = f"Loser {label}{round_num}M{fixture['match_number']}"
+            last_played[winner] = last_played[loser] = fixture['date']
+            round_winners.append(winner); round_losers.append(loser)
+        return round_winners, round_losers
+
+    def crossed(drops, from_round):
+        """ Drop order into the losers bracket: reversed after even winners rounds, halves swapped after odd ones, so a dropped team does not meet a side it has already played. """
+        if from_round % 2 == 0: return drops[::-1]
+        half = len(drops) // 2
+        return drops[half:] + drops[:half]
+
+    # Levels: the winners bracket plays its next round while the losers bracket plays the round
+    # fed by earlier winners rounds. Losers rounds alternate: odd rounds pair survivors among
+    # themselves (round 1: winners round 1 losers), even rounds meet the next winners round's losers.
+    pending_drops = []; losers = None; winners_round = 0; losers_round = 0
+    while len(winners) > 1 or pending_drops or (losers and len(losers) > 1):
+        if losers is None and pending_drops: losers_round += 1; losers, _ = play_round(pending_drops.pop(0)[1], "Losers Bracket", losers_round, 'L')
+        elif losers is not None and len(losers) > 1 and losers_round % 2 == 0:
+            losers_round += 1; losers, _ = play_round(losers, "Losers Bracket", losers_round, 'L')
+        elif losers is not None and pending_drops and len(losers) == len(pending_drops[0][1]):
+            losers_round += 1; from_round, drops = pending_drops.pop(0); drops = crossed(drops, from_round)
+            losers, _ = play_round([entrant for pair in zip(losers, drops) for entrant in pair], "Losers Bracket", losers_round, 'L')
+        if len(winners) > 1:
+            winners_round += 1; winners, dropped = play_round(winners, "Winners Bracket", winners_round, 'W')
+            pending_drops.append((winners_round, dropped))
+
+    # Grand final; the reset replays the same two sides, so their rest carries over
+    final_pair = [(winners[0], losers[0])]
+    for round_num, match_type in ((1, 'Grand Final'), (2, 'Grand Final Reset (if necessary)')):
+        final_fixtures, match_counter, last_played, _ = schedule_matches(final_pair, list(last_played), available_slots, min_rest_days, team_venue_map, match_counter, last_played, stage_name="Grand Final", round_num=round_num, venue_assignment_rule='random', engine=engine, rng=rng)
+        final_fixtures[0]['match_type'] = match_type; all_fixtures.extend(final_fixtures)
+
+    all_fixtures.sort(key=lambda x: (x['date'], x['time_slot']))
+    app.logger.info("Double Elimination: %d winners rounds, %d losers rounds, %d matches.", winners_round, losers_round, len(all_fixtures))
+    return all_fixtures, max((f['date'] for f in all_fixtures), default=None)
+
+def split_into_groups(teams, teams_per_group):
+    """
+    Splits teams into ceil(n / teams_per_group) groups whose sizes differ by at most one (larger
+    groups first), so no group has more than teams_per_group teams. A group never has fewer than
+    2 teams, so an odd count with teams_per_group=2 gets one group of 3.
+    """
+    num_groups = max(1, min(math.ceil(len(teams) / teams_per_group), len(teams) // 2))
+    base_size, extra = divmod(len(teams), num_groups); groups = []; offset = 0
+    for i in range(num_groups):
+        size = base_size + (1 if i < extra else 0)
+        groups.append(teams[offset:offset + size]); offset += size
+    return groups
+
+def interleaved_group_rounds(groups):
+    """
+    Circle-method rounds for every group, merged so round r holds round r of all groups.
+    Every team still plays at most once per merged round, so the whole group stage can be
+    scheduled round by round on one slot pool. Returns (merged rounds, group index per team).
+    """
+    group_rounds = [circle_method_rounds(group) for group in groups]
+    merged = [[pair for rounds in group_rounds if round_index < len(rounds) for pair in rounds[round_index]] for round_index in range(max(map(len, group_rounds), default=0))]
+    return merged, {team: i for i, group in enumerate(groups) for team in group}
 
-def generate_group_stage_knockout_fixtures(teams, venues, team_venue_map, start_date, end_date, min_rest_days, teams_per_group=4, groups_to_advance=2):
-    """ Generates Group Stage (RR) + Knockout (SE) fixtures. """
+def generate_group_stage_knockout_fixtures(teams, venues, team_venue_map, start_date, end_date, min_rest_days, teams_per_group=4, groups_to_advance=2, engine='greedy', rng=None, constraints=None, available_slots=None):
+    """
+    Generates Group Stage (RR) + Knockout (SE) fixtures. Groups come from split_into_groups (at most
+    teams_per_group teams each, sizes within one of each other; e.g. 5 teams in groups of 4 give
+    groups of 3 and 2) and play interleaved circle-method rounds on the shared slot pool so every
+    group finishes at about the same time. available_slots lets a caller supply that pool.
+    """
+    rng = rng or random.Random()
     num_teams = len(teams);
     if num_teams < 4: raise ValueError("Need >= 4 teams.")
     if not venues: raise ValueError("Need >= 1 venue.")
     if teams_per_group <= 1: raise ValueError("Teams per group must be > 1.")
-    if num_teams % teams_per_group != 0: raise ValueError(f"Team count ({num_teams}) not divisible by {teams_per_group}.")
-    num_groups = num_teams // teams_per_group
-    if groups_to_advance * num_groups < 2 and groups_to_advance > 0: flash("Warning: Not enough teams advancing for knockout.", "warning")
-    shuffled_teams = random.sample(teams, num_teams)
-    groups = [shuffled_teams[i*teams_per_group:(i+1)*teams_per_group] for i in range(num_groups)]
+    shuffled_teams = rng.sample(teams, num_teams)
+    groups = split_into_groups(shuffled_teams, teams_per_group); num_groups = len(groups)
+    smallest_group = min(len(group) for group in groups)
+    if groups_to_advance > smallest_group: raise ValueError(f"Cannot advance {groups_to_advance} teams from a group of {smallest_group}.")
+    if len({len(group) for group in groups}) > 1: notify(f"{num_teams} teams do not divide into groups of {teams_per_group}; using {num_groups} groups of {smallest_group}-{smallest_group + 1}.", "info")
+    if groups_to_advance * num_groups < 2 and groups_to_advance > 0: notify("Warning: Not enough teams advancing for knockout.", "warning")
     all_fixtures = []; match_counter = 1; last_played = {team: None for team in teams}; last_group_match_date = None
     total_days = max(1, (end_date - start_date).days); group_stage_days = max(7, total_days * 2 // 3)
     ko_rounds = 0; min_ko_days = 0
@@ -279,21 +1178,25 @@ def generate_group_stage_knockout_fixtures(teams, venues, team_venue_map, start_
     group_stage_end_date = min(start_date + timedelta(days=group_stage_days), end_date - timedelta(days=min_ko_days))
     group_stage_end_date = max(group_stage_end_date, start_date)
 
-    available_slots = get_available_slots(venues, start_date, end_date) # Get all slots once
+    if available_slots is None: available_slots = get_available_slots(venues, start_date, end_date, constraints) # Get all slots once
     if not available_slots: raise ValueError(f"No slots available between {start_date} and {end_date}.")
 
-    # --- Group Stage ---
+    # --- Group Stage (all groups together, one merged round at a time) ---
     app.logger.info(f"Generating Group Stage ({num_groups} groups) until potential end {group_stage_end_date}")
-    original_assigned_count = sum(1 for s in available_slots if s['assigned'])
-    for i, group in enumerate(groups):
-        group_name = chr(65 + i); group_pairings = list(itertools.combinations(group, 2))
-        group_fixtures, mc_after_group, last_played, last_date_this_group = schedule_matches(
-            group_pairings, teams, available_slots, min_rest_days, team_venue_map,
-            match_counter, last_played, f"Group {group_name}", venue_assignment_rule='home'
-        )
-        all_fixtures.extend(group_fixtures); match_counter = mc_after_group
-        if last_date_this_group: last_group_match_date = max(last_group_match_date, last_date_this_group) if last_group_match_date else last_date_this_group
-    group_slots_used_count = sum(1 for s in available_slots if s['assigned']) - original_assigned_count
+    original_assigned_count = available_slots.assigned_total
+    group_rounds, group_of_team = interleaved_group_rounds(groups)
+    group_fixtures, match_counter, last_played, last_group_match_date = schedule_rounds(
+        group_rounds, teams, available_slots, min_rest_days, team_venue_map,
+        match_counter, last_played, "Group Stage", venue_assignment_rule='home', engine=engine, rng=rng
+    )
+    fixtures_by_group = [[] for _ in groups]
+    for fixture in group_fixtures:
+        group_index = group_of_team[fixture['team1']]
+        fixture['stage'] = f"Group {chr(65 + group_index)}"; fixtures_by_group[group_index].append(fixture)
+    for group_fixtures_list in fixtures_by_group:
+        all_fixtures.extend(group_fixtures_list)
+        publish_stages(group_fixtures_list) # Groups are final once scheduled; exports can send them before the knockout is built
+    group_slots_used_count = available_slots.assigned_total - original_assigned_count
     app.logger.info(f"Group stage used {group_slots_used_count} slots, ending on {last_group_match_date}")
 
     # --- Knockout Stage ---
@@ -305,15 +1208,15 @@ def generate_group_stage_knockout_fixtures(teams, venues, team_venue_map, start_
         knockout_start_date = last_group_match_date + timedelta(days=min_rest_days + 1) if last_group_match_date else start_date + timedelta(days=1)
         knockout_start_date = max(knockout_start_date, start_date + timedelta(days=1))
         if knockout_start_date > end_date:
-            flash("Warning: No time left for knockout stage.", "warning");
+            notify("Warning: No time left for knockout stage.", "warning")
         else:
             app.logger.info(f"Knockout stage starting from {knockout_start_date}")
             # Create dummy map for placeholders if needed by internal calls (though SE uses random venues)
-            placeholder_map = {q: random.choice(venues) for q in knockout_qualifiers if venues} if knockout_qualifiers else {}
+            placeholder_map = {q: rng.choice(venues) for q in knockout_qualifiers if venues} if knockout_qualifiers else {}
             # Pass the MAIN available_slots list; SE will use remaining slots >= knockout_start_date
             knockout_fixtures, last_ko_date = generate_single_elimination_fixtures(
                 knockout_qualifiers, venues, placeholder_map,
-                knockout_start_date, end_date, min_rest_days
+                knockout_start_date, end_date, min_rest_days, engine, rng, constraints
             )
             # Adjust stage name and potentially match numbers (SE returns renumbered list)
             base_ko_match_num = match_counter -1 # Matches before KO
@@ -330,116 +1233,1444 @@ def generate_group_stage_knockout_fixtures(teams, venues, team_venue_map, start_
     return all_fixtures, last_overall_date
 
 
-# --- IPL Style Playoffs (Top 4 - Updated for Sunday Final & Gap) ---
-def generate_playoffs_top4(actual_top_4_teams, last_league_date, venues, team_venue_map, min_rest_days):
-    """ Generates IPL playoffs ensuring start gap and attempting Sunday Final. """
-    if len(actual_top_4_teams) != 4: return [], last_league_date
-    app.logger.info(f"Generating Top 4 Playoffs for: {actual_top_4_teams}")
-    t1, t2, t3, t4 = actual_top_4_teams
-    playoff_structure = [ {'match_id': 'Q1', 'type': 'Qualifier 1', 't1': t1, 't2': t2}, {'match_id': 'Elim', 'type': 'Eliminator', 't1': t3, 't2': t4}, {'match_id': 'Q2', 'type': 'Qualifier 2', 't1': f"Loser(Q1)", 't2': f"Winner(Elim.)"}, {'match_id': 'Final', 'type': 'Final', 't1': f"Winner(Q1)", 't2': f"Winner(Q2)"}, ]
-    teams_involved_map = {'Q1': [t1, t2], 'Elim': [t3, t4], 'Q2': [t1, t2, t3, t4], 'Final': [t1, t2, t3, t4]}
-    playoff_min_start_date = last_league_date + timedelta(days=PLAYOFF_START_GAP_DAYS) if last_league_date else date.today() + timedelta(days=PLAYOFF_START_GAP_DAYS)
+# --- Playoffs (Top 2 / IPL Top 4 / Top 6 / Top 8, Final on a target weekday) ---
+def playoff_participants(playoff_format):
+    """ Ranks (1-based) that can reach each match of a format, through its Winner/Loser feeders. """
+    participants = {}
+    for match_id, _, *sides in PLAYOFF_FORMATS[playoff_format]['matches']:
+        participants[match_id] = set()
+        for side in sides: participants[match_id] |= {side} if isinstance(side, int) else participants[side[1]]
+    return participants
+
+def generate_playoffs(playoff_format, ranked_teams, last_league_date, venues, team_venue_map, min_rest_days, constraints=None, available_slots=None):
+    """
+    Generates a PLAYOFF_FORMATS bracket for ranked_teams (best first), starting at least
+    constraints.playoff_start_gap_days after last_league_date, with the Final on the first
+    PLAYOFF_FINAL_WEEKDAY its teams are rested for (else the next free day, with a warning).
+    Every match is one next_free() lookup on the slot table, and a team's rest counts from every
+    match it could be in (a 'Winner(Q1)' side carries both Q1 teams). Formats marked sequential
+    (IPL) also keep min_rest_days between consecutive matches.
+    available_slots lets a caller share its SlotIndex; by default a table covering the playoff
+    window is built. Returns (fixtures numbered within the playoffs, last playoff date).
+    """
+    playoff_spec = PLAYOFF_FORMATS[playoff_format]
+    if len(ranked_teams) != playoff_spec['teams']: return [], last_league_date
+    app.logger.info("Generating %s playoffs for: %s", playoff_format, ranked_teams)
+    constraints = constraints or DEFAULT_CONSTRAINTS; start_gap = timedelta(days=constraints.playoff_start_gap_days)
+    playoff_min_start_date = last_league_date + start_gap if last_league_date else date.today() + start_gap
     app.logger.info(f"Playoffs must start on or after: {playoff_min_start_date}")
-    playoff_end_date_estimate = playoff_min_start_date + timedelta(days=21) # Window
-    available_playoff_slots_orig = get_available_slots(venues, playoff_min_start_date, playoff_end_date_estimate)
-    if not available_playoff_slots_orig: raise ValueError(f"No slots found for playoffs starting from {playoff_min_start_date}.")
+    matches = playoff_spec['matches']; participants = playoff_participants(playoff_format)
+    if available_slots is None:
+        window_days = max(PLAYOFF_WINDOW_DAYS, (len(matches) + 1) * (min_rest_days + 1) + 7) # Room for every match plus a week to reach the Final's weekday
+        available_slots = get_available_slots(venues, playoff_min_start_date, playoff_min_start_date + timedelta(days=window_days), constraints) # Fresh table, tracks playoff daily counts
+    if not available_slots: raise ValueError(f"No slots found for playoffs starting from {playoff_min_start_date}.")
 
-    playoff_fixtures_dicts = []; playoff_last_played = {team: last_league_date for team in actual_top_4_teams}
-    match_dates = {}; required_rest_delta = timedelta(days=min_rest_days + 1)
+    playoff_fixtures_dicts = []; playoff_last_played = {rank: last_league_date for rank in range(1, len(ranked_teams) + 1)}
+    required_rest_delta = timedelta(days=min_rest_days + 1)
     last_scheduled_date = None # Track actual last date scheduled *within playoffs*
-    available_playoff_slots = [s.copy() for s in available_playoff_slots_orig] # Work with copy
-    playoff_matches_on_date = {} # Track daily counts specific to playoffs
-
-    # Schedule Q1, Elim, Q2
-    for match_info in playoff_structure:
-        if match_info['match_id'] == 'Final': continue
-        match_id = match_info['match_id']; match_scheduled = False
-        min_start_date_rest = last_scheduled_date + required_rest_delta if last_scheduled_date else playoff_min_start_date
-        min_start_date = max(min_start_date_rest, playoff_min_start_date)
-        involved_teams = teams_involved_map[match_id]
-        app.logger.debug(f"Scheduling {match_id}. Min start: {min_start_date}")
-        for slot in available_playoff_slots:
-            slot_date = slot['date']
-            if slot['assigned'] or slot_date < min_start_date: continue
-            playoff_day_limit = WEEKEND_MATCHES_LIMIT if slot_date.weekday() >= 5 else WEEKDAY_MATCHES_LIMIT # Use daily limits
-            if playoff_matches_on_date.get(slot_date, 0) >= playoff_day_limit: continue
-            rest_ok = all(playoff_last_played.get(team) is None or (slot_date - playoff_last_played.get(team) >= required_rest_delta) for team in involved_teams)
-            if rest_ok:
-                fixture_dict = { 'match_number': 0, 'match_type': match_info['type'], 'stage': 'Playoffs', 'round': None, 'date': slot_date, 'venue': slot['venue'], 'team1': match_info['t1'], 'team2': match_info['t2'], 'time_slot': slot['time_slot'] }
-                playoff_fixtures_dicts.append(fixture_dict); slot['assigned'] = True; match_scheduled = True
-                match_dates[match_id] = slot_date; last_scheduled_date = slot_date # Update last PLAYOFF date
-                playoff_matches_on_date[slot_date] = playoff_matches_on_date.get(slot_date, 0) + 1
-                for team in involved_teams: playoff_last_played[team] = slot_date
-                app.logger.debug(f"Scheduled {match_id} on {slot_date}. Day count: {playoff_matches_on_date[slot_date]}/{playoff_day_limit}")
-                break
-        if not match_scheduled: raise ValueError(f"Could not schedule playoff match: {match_info['type']}.")
-
-    # Schedule Final on nearest Sunday
-    final_match_info = next(m for m in playoff_structure if m['match_id'] == 'Final')
-    q2_date = match_dates.get('Q2')
-    # --- FIXED SYNTAX ERROR HERE ---
-    if not q2_date:
-        raise ValueError("Internal Error: Q2 date not found for Final scheduling.")
-    # --- END FIX ---
-    earliest_final_start_date = q2_date + required_rest_delta
-    target_sunday = earliest_final_start_date
-    while target_sunday.weekday() != 6: target_sunday += timedelta(days=1)
-    app.logger.info(f"Targeting Sunday {target_sunday} for the Final.")
-    final_scheduled = False; involved_final_teams = teams_involved_map['Final']
-    for slot in available_playoff_slots: # Check remaining playoff slots
-        slot_date = slot['date']
-        if slot['assigned'] or slot_date != target_sunday: continue
-        playoff_day_limit = WEEKEND_MATCHES_LIMIT # Sunday limit
-        if playoff_matches_on_date.get(slot_date, 0) >= playoff_day_limit: continue
-        final_rest_ok = all(playoff_last_played.get(team) is None or (slot_date - playoff_last_played.get(team) >= required_rest_delta) for team in involved_final_teams)
-        if final_rest_ok:
-            fixture_dict = { 'match_number': 0, 'match_type': final_match_info['type'], 'stage': 'Playoffs', 'round': None, 'date': slot_date, 'venue': slot['venue'], 'team1': final_match_info['t1'], 'team2': final_match_info['t2'], 'time_slot': slot['time_slot'] }
-            playoff_fixtures_dicts.append(fixture_dict); slot['assigned'] = True; final_scheduled = True
-            last_scheduled_date = slot_date; playoff_matches_on_date[slot_date] = playoff_matches_on_date.get(slot_date, 0) + 1
-            app.logger.info(f"Scheduled Final on Sunday {slot_date}")
-            break
-    if not final_scheduled: # Fallback: Find next available slot after target sunday
-        app.logger.warning(f"Could not schedule Final on target Sunday {target_sunday}. Searching...")
-        next_possible_date = target_sunday + timedelta(days=1)
-        for slot in available_playoff_slots:
-            slot_date = slot['date']
-            if slot['assigned'] or slot_date < next_possible_date: continue
-            playoff_day_limit = WEEKEND_MATCHES_LIMIT if slot_date.weekday() >= 5 else WEEKDAY_MATCHES_LIMIT
-            if playoff_matches_on_date.get(slot_date, 0) >= playoff_day_limit: continue
-            final_rest_ok = all(playoff_last_played.get(team) is None or (slot_date - playoff_last_played.get(team) >= required_rest_delta) for team in involved_final_teams)
-            if final_rest_ok:
-                 fixture_dict = { 'match_number': 0, 'match_type': final_match_info['type'], 'stage': 'Playoffs', 'round': None, 'date': slot_date, 'venue': slot['venue'], 'team1': final_match_info['t1'], 'team2': final_match_info['t2'], 'time_slot': slot['time_slot'] }
-                 playoff_fixtures_dicts.append(fixture_dict); slot['assigned'] = True; final_scheduled = True
-                 last_scheduled_date = slot_date; playoff_matches_on_date[slot_date] = playoff_matches_on_date.get(slot_date, 0) + 1
-                 flash(f"Warning: Could not schedule Final on target Sunday ({target_sunday}). Scheduled on next available day: {slot_date}.", "warning")
-                 app.logger.info(f"Scheduled Final on fallback day {slot_date}")
-                 break
-        if not final_scheduled: raise ValueError(f"Could not schedule Final. No suitable slots after {earliest_final_start_date}.")
+    progress = _progress_hook.get()
+    if progress: progress('Playoffs', planned=len(matches))
+
+    def side_name(side): return ranked_teams[side - 1] if isinstance(side, int) else f"{side[0]}({side[1]})"
+
+    def rested_from(match_id, not_before):
+        """ Earliest date >= not_before on which every team that can play match_id has had its rest. """
+        return max([not_before] + [playoff_last_played[rank] + required_rest_delta for rank in participants[match_id] if playoff_last_played.get(rank)])
+
+    def book(match_id, match_type, sides, slot):
+        slot_date = available_slots.date_of(slot)
+        fixture_dict = { 'match_number': 0, 'match_type': match_type, 'stage': 'Playoffs', 'round': None, 'date': slot_date, 'venue': available_slots.venue_of(slot), 'team1': side_name(sides[0]), 'team2': side_name(sides[1]), 'time_slot': available_slots.time_slot_of(slot) }
+        playoff_fixtures_dicts.append(fixture_dict); available_slots.assign(slot)
+        for rank in participants[match_id]: playoff_last_played[rank] = slot_date
+        if progress: progress('Playoffs', scheduled=1)
+        return slot_date
+
+    # Everything before the Final, in bracket order
+    for match_id, match_type, *sides in matches[:-1]:
+        floor = last_scheduled_date + required_rest_delta if playoff_spec['sequential'] and last_scheduled_date else playoff_min_start_date
+        min_start_date = rested_from(match_id, max(floor, playoff_min_start_date))
+        app.logger.debug("Scheduling %s. Min start: %s", match_id, min_start_date)
+        slot = available_slots.next_free(min_start_date)
+        if slot is None: raise ValueError(f"Could not schedule playoff match: {match_type}.")
+        last_scheduled_date = max(last_scheduled_date or playoff_min_start_date, book(match_id, match_type, sides, slot))
+        app.logger.debug("Scheduled %s on %s. Day count: %d", match_id, available_slots.date_of(slot), available_slots.matches_on(available_slots.date_of(slot)))
+
+    # Final on the first target weekday once its teams are rested (direct date arithmetic, one lookup)
+    final_id, final_type, *final_sides = matches[-1]
+    earliest_final_start_date = rested_from(final_id, last_scheduled_date + required_rest_delta if last_scheduled_date else playoff_min_start_date)
+    target_day = earliest_final_start_date + timedelta(days=(PLAYOFF_FINAL_WEEKDAY - earliest_final_start_date.weekday()) % 7)
+    app.logger.info(f"Targeting {target_day:%A} {target_day} for the Final.")
+    slot = available_slots.next_free(target_day)
+    if slot is not None and available_slots.date_of(slot) == target_day:
+        last_scheduled_date = book(final_id, final_type, final_sides, slot)
+        app.logger.info(f"Scheduled Final on {last_scheduled_date}")
+    else: # Fallback: next available slot after the target day
+        app.logger.warning(f"Could not schedule Final on target day {target_day}. Searching...")
+        slot = available_slots.next_free(target_day + timedelta(days=1))
+        if slot is None: raise ValueError(f"Could not schedule Final. No suitable slots after {earliest_final_start_date}.")
+        last_scheduled_date = book(final_id, final_type, final_sides, slot)
+        notify(f"Warning: Could not schedule Final on target {target_day:%A} ({target_day}). Scheduled on next available day: {last_scheduled_date}.", "warning")
+        app.logger.info(f"Scheduled Final on fallback day {last_scheduled_date}")
 
     playoff_fixtures_dicts.sort(key=lambda x: (x['date'], x['time_slot']))
     for i, fixture in enumerate(playoff_fixtures_dicts): fixture['match_number'] = i + 1 # Renumber within playoffs
     return playoff_fixtures_dicts, last_scheduled_date
 
+def generate_playoffs_top4(actual_top_4_teams, last_league_date, venues, team_venue_map, min_rest_days, constraints=None):
+    """ IPL-style Top 4 playoffs (Qualifier 1, Eliminator, Qualifier 2, Final); see generate_playoffs. """
+    return generate_playoffs('top4', actual_top_4_teams, last_league_date, venues, team_venue_map, min_rest_days, constraints)
+
 # --- Post-Scheduling Check ---
-def check_schedule_gaps(fixtures, start_date, end_date):
+class ScheduleAnalysis:
+    """
+    Columnar view of a fixture list for quality checks. One pass stores day offsets (from
+    start_date), home/away team ids and venue ids in typed arrays; every measure is then an
+    aggregate over those columns (per-day counts against the profile's day-limit table, sorted
+    per-team day runs) instead of a walk over the calendar. Day checks compare the per-day load
+    with the day-limit table as whole byte strings (bytes.translate and big-int lane arithmetic),
+    so no Python code runs per calendar day.
+    team1 is the home side. Fixtures outside [start_date, end_date] only count in team measures.
+    """
+    PRESENT = bytes([0]) + bytes([1]) * 255 # bytes.translate table: 0 stays 0, any other value becomes 1
+
+    def __init__(self, fixtures, start_date, end_date=None, constraints=None):
+        self.constraints = constraints or DEFAULT_CONSTRAINTS; self.start_date = start_date
+        self.names = []; self.venues = []; team_ids = {}; venue_ids = {}
+        self.day = array('i'); self.home = array('i'); self.away = array('i'); self.venue = array('i')
+        first_ordinal = start_date.toordinal()
+        for f in fixtures:
+            self.day.append(f['date'].toordinal() - first_ordinal)
+            for column, team in ((self.home, f['team1']), (self.away, f['team2'])):
+                team_id = team_ids.get(team)
+                if team_id is None: team_id = team_ids[team] = len(self.names); self.names.append(team)
+                column.append(team_id)
+            venue_id = venue_ids.get(f['venue'])
+            if venue_id is None: venue_id = venue_ids[f['venue']] = len(self.venues); self.venues.append(f['venue'])
+            self.venue.append(venue_id)
+        self.team_ids = team_ids
+        self.end_date = end_date or (start_date + timedelta(days=max(self.day)) if self.day else start_date)
+        self.num_days = max(0, (self.end_date - start_date).days + 1)
+        self.day_limits = self.constraints.day_limits(start_date, self.end_date)
+        self.day_counts = array('H', bytes(2 * self.num_days)); day_load = bytearray(self.num_days) # day_load: counts capped at 255
+        for day in self.day:
+            if 0 <= day < self.num_days:
+                self.day_counts[day] += 1
+                if day_load[day] < 255: day_load[day] += 1
+        self.day_load = bytes(day_load); self.played = self.day_load.translate(self.PRESENT); self.open = self.day_limits.translate(self.PRESENT)
+        # Sorted match days per team (first-appearance order)
+        self.team_days = [[] for _ in self.names]
+        for day, home, away in zip(self.day, self.home, self.away): self.team_days[home].append(day); self.team_days[away].append(day)
+        for days in self.team_days: days.sort()
+
+    def _missed_mask(self):
+        """ Little-endian int with bit 8 * day set for every open day without a match. """
+        return int.from_bytes(self.open, 'little') & ~int.from_bytes(self.played, 'little')
+
+    def day_gaps(self):
+        """ (days without matches, days below their limit, total days); days with limit 0 count in neither. """
+        missed = self._missed_mask().bit_count()
+        # One 16-bit lane per day holding 0x100 + limit - load - 1: bit 8 stays set exactly when load < limit,
+        # and no lane borrows from the next because load <= 255
+        num_days = self.num_days; lanes = bytearray(2 * num_days); lanes[0::2] = self.day_limits; lanes[1::2] = b'\x01' * num_days
+        loads = bytearray(2 * num_days); loads[0::2] = self.day_load
+        played = bytearray(2 * num_days); played[1::2] = self.played
+        below_limit = int.from_bytes(lanes, 'little') - int.from_bytes(loads, 'little') - int.from_bytes(b'\x01\x00' * num_days, 'little')
+        under_utilized = (below_limit & int.from_bytes(played, 'little')).bit_count()
+        return missed, under_utilized, num_days
+
+    def missed_dates(self, limit=10):
+        """ First 'limit' dates without matches on which matches were allowed. """
+        missed = self._missed_mask(); dates = []
+        while missed and len(dates) < limit:
+            lowest = missed & -missed; missed ^= lowest
+            dates.append(self.start_date + timedelta(days=(lowest.bit_length() - 1) // 8))
+        return dates
+
+    def rest_gaps(self, team_ids=None):
+        """ Days between consecutive matches (1 = consecutive days), per team in team order, flattened. """
+        gaps = []
+        for team_id in (range(len(self.names)) if team_ids is None else team_ids):
+            days = self.team_days[team_id]; gaps.extend(map(int.__sub__, days[1:], days))
+        return gaps
+
+    def score(self):
+        """ score_schedule key: (missed days, variance of days between a team's matches, finish ordinal). """
+        if not self.day: return None
+        rest_gaps = self.rest_gaps()
+        mean_gap = sum(rest_gaps) / len(rest_gaps) if rest_gaps else 0
+        rest_variance = sum((gap - mean_gap) ** 2 for gap in rest_gaps) / len(rest_gaps) if rest_gaps else 0
+        return (self.day_gaps()[0], round(rest_variance, 6), self.start_date.toordinal() + max(self.day))
+
+    def report(self, teams=None):
+        """
+        Structured health report: day usage against the daily limits, rest-day distribution (full
+        days between matches), per-team home/away, rest and weekend load, venue utilization and
+        fairness indexes (Jain's index, 1 = perfectly even). 'teams' limits team measures to real
+        teams (bracket placeholders such as 'Winner R1M3' are left out); default: every name.
+        """
+        team_ids = [self.team_ids[team] for team in teams if team in self.team_ids] if teams is not None else list(range(len(self.names)))
+        missed, under_utilized, total_days = self.day_gaps()
+        capacity = sum(self.day_limits); in_window = sum(self.day_counts)
+        min_gap = self.constraints.min_rest_days + 1; first_weekday = self.start_date.weekday()
+        home_counts = array('i', bytes(4 * len(self.names))); away_counts = array('i', bytes(4 * len(self.names)))
+        for team_id in self.home: home_counts[team_id] += 1
+        for team_id in self.away: away_counts[team_id] += 1
+
+        team_reports = {}; rest_distribution = {}; all_rests = []; back_to_back_total = 0; longest_streak = 0
+        for team_id in team_ids:
+            days = self.team_days[team_id]; rests = [later - earlier - 1 for earlier, later in zip(days, days[1:])]
+            for rest in rests: rest_distribution[rest] = rest_distribution.get(rest, 0) + 1
+            all_rests.extend(rests)
+            weekends = sorted({(day + first_weekday) // 7 for day in days if (day + first_weekday) % 7 >= 5})
+            back_to_back = sum(1 for week, next_week in zip(weekends, weekends[1:]) if next_week == week + 1)
+            streak = best = 1 if weekends else 0
+            for week, next_week in zip(weekends, weekends[1:]):
+                streak = streak + 1 if next_week == week + 1 else 1; best = max(best, streak)
+            back_to_back_total += back_to_back; longest_streak = max(longest_streak, best)
+            team_reports[self.names[team_id]] = {
+                'matches': len(days), 'home': home_counts[team_id], 'away': away_counts[team_id],
+                'min_rest': min(rests) if rests else None, 'mean_rest': round(sum(rests) / len(rests), 3) if rests else None, 'max_rest': max(rests) if rests else None,
+                'weekend_matches': sum(1 for day in days if (day + first_weekday) % 7 >= 5), 'back_to_back_weekends': back_to_back, 'longest_weekend_streak': best,
+            }
+
+        venue_matches = array('i', bytes(4 * len(self.venues))); venue_day_matches = {}
+        for day, venue_id in zip(self.day, self.venue):
+            venue_matches[venue_id] += 1; venue_day_matches[(venue_id, day)] = venue_day_matches.get((venue_id, day), 0) + 1
+        venue_peak = {}
+        for (venue_id, _), count in venue_day_matches.items(): venue_peak[venue_id] = max(venue_peak.get(venue_id, 0), count)
+        limit_histogram = {}
+        for limit in self.day_limits: limit_histogram[limit] = limit_histogram.get(limit, 0) + 1
+        venue_reports = {}
+        for venue_id, venue in enumerate(self.venues):
+            venue_capacity = self.constraints.venue_day_capacity(venue)
+            venue_total = sum(min(venue_capacity, limit) * days for limit, days in limit_histogram.items())
+            for first, last in self.constraints.venue_blackouts.get(venue, ()):
+                first_day = max(0, (first - self.start_date).days); last_day = min(self.num_days - 1, (last - self.start_date).days)
+                venue_total -= sum(min(venue_capacity, limit) for limit in self.day_limits[first_day:last_day + 1]) if first_day <= last_day else 0
+            venue_reports[venue] = {'matches': venue_matches[venue_id], 'capacity': venue_total, 'utilization': round(venue_matches[venue_id] / venue_total, 4) if venue_total else None, 'peak_day_matches': venue_peak.get(venue_id, 0)}
+
+        def jain(values):
+            values = [value for value in values if value is not None]
+            squares = sum(value * value for value in values)
+            return round(sum(values) ** 2 / (len(values) * squares), 4) if squares else None
+        rest_index = jain(entry['mean_rest'] for entry in team_reports.values())
+        weekend_index = jain(entry['weekend_matches'] for entry in team_reports.values())
+        home_index = jain(entry['home'] / entry['matches'] if entry['matches'] else None for entry in team_reports.values())
+        indexes = [index for index in (rest_index, weekend_index, home_index) if index is not None]
+        return {
+            'window': {'start_date': self.start_date.isoformat(), 'end_date': self.end_date.isoformat(), 'days': total_days},
+            'matches': len(self.day),
+            'days': {'with_matches': self.played.count(1), 'missed': missed, 'under_utilized': under_utilized,
+                     'closed': self.day_limits.count(0), 'peak_matches': max(self.day_counts, default=0), 'capacity': capacity,
+                     'utilization': round(in_window / capacity, 4) if capacity else None},
+            'rest': {'distribution': dict(sorted(rest_distribution.items())), 'min': min(all_rests) if all_rests else None, 'max': max(all_rests) if all_rests else None,
+                     'mean': round(sum(all_rests) / len(all_rests), 3) if all_rests else None, 'below_minimum': sum(1 for rest in all_rests if rest + 1 < min_gap)},
+            'home_away': {'max_imbalance': max((abs(entry['home'] - entry['away']) for entry in team_reports.values()), default=0)},
+            'weekends': {'back_to_back': back_to_back_total, 'teams_with_back_to_back': sum(1 for entry in team_reports.values() if entry['back_to_back_weekends']), 'longest_streak': longest_streak},
+            'fairness': {'rest_index': rest_index, 'weekend_index': weekend_index, 'home_away_index': home_index, 'overall': round(sum(indexes) / len(indexes), 4) if indexes else None},
+            'teams': team_reports, 'venues': venue_reports,
+        }
+
+def count_schedule_gaps(fixtures, start_date, end_date, constraints=None):
+    """ Counts days with no matches / fewer matches than the profile's daily limit. Returns (missed, underutilized, total_days). """
+    return ScheduleAnalysis(fixtures, start_date, end_date, constraints).day_gaps()
+
+def check_schedule_gaps(fixtures, start_date, end_date, constraints=None):
     """ Checks if matches were scheduled on expected days based on overall daily limits. """
     if not fixtures or not start_date or not end_date: return
-    scheduled_dates_count = {}
-    for f in fixtures: scheduled_dates_count[f['date']] = scheduled_dates_count.get(f['date'], 0) + 1
-    missed_days_count = 0; total_days = 0; underutilized_days = 0
-    current_date = start_date
-    while current_date <= end_date:
-        total_days += 1
-        is_weekend = current_date.weekday() >= 5
-        expected_matches_today = WEEKEND_MATCHES_LIMIT if is_weekend else WEEKDAY_MATCHES_LIMIT
-        matches_on_day = scheduled_dates_count.get(current_date, 0)
-        if matches_on_day == 0 and expected_matches_today > 0:
-             missed_days_count += 1; app.logger.warning(f"Schedule Gap: No matches on {current_date} ({current_date.strftime('%a')}).")
-        elif matches_on_day > 0 and matches_on_day < expected_matches_today:
-             underutilized_days += 1; app.logger.warning(f"Schedule Under-utilization: {matches_on_day}/{expected_matches_today} matches on {current_date} ({current_date.strftime('%a')}).")
-        current_date += timedelta(days=1)
-    if missed_days_count > 0: flash(f"Warning: Scheduling resulted in {missed_days_count}/{total_days} days potentially having no matches scheduled due to constraints.", "warning")
-    elif underutilized_days > 0: flash(f"Note: {underutilized_days}/{total_days} days had fewer matches than the maximum allowed due to constraints.", "info")
+    analysis = ScheduleAnalysis(fixtures, start_date, end_date, constraints)
+    missed_days_count, underutilized_days, total_days = analysis.day_gaps()
+    if missed_days_count or underutilized_days: app.logger.info("Schedule check: %d/%d days without matches, %d under-utilized.", missed_days_count, total_days, underutilized_days)
+    if missed_days_count and app.logger.isEnabledFor(logging.DEBUG): app.logger.debug("First days without matches: %s", ", ".join(d.isoformat() for d in analysis.missed_dates()))
+    if missed_days_count > 0: notify(f"Warning: Scheduling resulted in {missed_days_count}/{total_days} days potentially having no matches scheduled due to constraints.", "warning")
+    elif underutilized_days > 0: notify(f"Note: {underutilized_days}/{total_days} days had fewer matches than the maximum allowed due to constraints.", "info")
+
+def score_schedule(fixtures, start_date, constraints=None):
+    """
+    Quality key for comparing candidate schedules, lower is better:
+    (gap days up to the last fixture, variance of rest days between a team's matches, finish date ordinal).
+    """
+    if not fixtures: return None
+    return ScheduleAnalysis(fixtures, start_date, max(f['date'] for f in fixtures), constraints).score()
+
+def schedule_report(fixtures, spec):
+    """ ScheduleAnalysis report for a generation spec's window, profile and teams. """
+    end_date = max([spec['end_date']] + [f['date'] for f in fixtures])
+    return ScheduleAnalysis(fixtures, spec['start_date'], end_date, spec.get('constraints')).report(spec.get('teams'))
+
+
+# --- Incremental Rescheduling ---
+def reschedule_fixtures(fixtures, blackouts, min_rest_days, end_date=None, extra_venues=(), allow_venue_change=False, constraints=None):
+    """
+    Re-slots only the fixtures hit by blackouts, keeping every other fixture where it is.
+    blackouts: iterable of (venue or None for all venues, first_date, last_date).
+    Moved fixtures keep their venue (unless allow_venue_change and it has no usable day), respect
+    min_rest_days against every surrounding fixture of both teams, and never move earlier: not before
+    their original date, the end of the previous round of their stage, or the end of an earlier
+    phase (STAGE_PHASES; e.g. groups before the knockout). Knockout/playoff rounds also stay before
+    the next round, and every fixture before the start of a later phase. Search runs up to end_date
+    (default: last fixture + RESCHEDULE_EXTENSION_DAYS) under the daily limits, venue capacity and
+    blackouts of 'constraints' (default: DEFAULT_CONSTRAINTS).
+    The slot table only covers the days from the first blacked-out fixture on, and round/phase
+    spans are indexed in one pass over the kept fixtures, so each move costs a lookup per round of
+    its stage rather than a scan of the season.
+    Returns (updated fixtures, changes); raises ValueError if a fixture cannot be re-slotted.
+    """
+    if not fixtures: return [], []
+    blackouts = list(blackouts)
+    def blacked_out(fixture):
+        return any((venue is None or venue == fixture['venue']) and first <= fixture['date'] <= last for venue, first, last in blackouts)
+    affected = sorted((f for f in fixtures if blacked_out(f)), key=lambda f: (f['date'], f['time_slot'] or 0))
+    if not affected: return [dict(f) for f in fixtures], []
+    affected_ids = {id(f) for f in affected}
+    kept = [f for f in fixtures if id(f) not in affected_ids]
+
+    window_start = affected[0]['date'] # Fixtures only move later, so earlier days never need slots
+    window_end = end_date or max(f['date'] for f in fixtures) + timedelta(days=RESCHEDULE_EXTENSION_DAYS)
+    venues = list(dict.fromkeys([f['venue'] for f in fixtures] + list(extra_venues)))
+    constraints = constraints or DEFAULT_CONSTRAINTS
+    slot_table = SlotIndex(venues, window_start, window_end, slots_per_venue=constraints.slots_per_venue, day_limits=constraints.day_limits(window_start, window_end))
+    for fixture in kept:
+        slot = slot_table.slot_at(fixture['date'], fixture['venue'], fixture['time_slot'] or 1)
+        if slot is not None and not slot_table.assigned[slot]: slot_table.assign(slot)
+    for venue in venues:
+        capacity = constraints.venue_day_capacity(venue)
+        if capacity < slot_table.slots_per_venue: slot_table.cap_venue(venue, capacity)
+    blackouts = blackouts + [(venue, first, last) for venue, ranges in constraints.venue_blackouts.items() for first, last in ranges]
+    for venue, first, last in blackouts:
+        for blackout_date in date_range(max(first, window_start), min(last, window_end)): slot_table.block(blackout_date, venue)
+
+    # Rest state around each move: every team's other match dates, in order
+    team_dates = {}
+    for fixture in kept:
+        for team in (fixture['team1'], fixture['team2']): bisect.insort(team_dates.setdefault(team, []), fixture['date'])
+    required_rest_delta = timedelta(days=min_rest_days + 1)
+    def rest_ok(fixture, slot_date):
+        for team in (fixture['team1'], fixture['team2']):
+            dates = team_dates.get(team, []); position = bisect.bisect_left(dates, slot_date)
+            if position > 0 and slot_date - dates[position - 1] < required_rest_delta: return False
+            if position < len(dates) and dates[position] - slot_date < required_rest_delta: return False
+        return True
+    # Date spans of every round (or, without rounds, every match) per stage and of every phase
+    def position(f): return f['round'] if f.get('round') is not None else (f['date'], f['time_slot'] or 0)
+    def phase(f): return STAGE_PHASES.get(f['stage'], 0)
+    round_spans = {}; phase_spans = {}
+    def add_span(spans, key, day):
+        span = spans.get(key)
+        spans[key] = (min(span[0], day), max(span[1], day)) if span else (day, day)
+    def record(f):
+        add_span(round_spans.setdefault(f['stage'], {}), position(f), f['date']); add_span(phase_spans, phase(f), f['date'])
+    for fixture in kept: record(fixture)
+    playoff_gap = timedelta(days=constraints.playoff_start_gap_days)
+    def order_bounds(fixture):
+        own = position(fixture); own_phase = phase(fixture); ordered = fixture['stage'] in ORDERED_STAGES
+        lower = fixture['date']; upper = None
+        for key, (first, last) in round_spans.get(fixture['stage'], {}).items():
+            if type(key) is not type(own): continue
+            if key < own: lower = max(lower, last + required_rest_delta if ordered else last)
+            elif key > own and ordered: upper = first - required_rest_delta if upper is None else min(upper, first - required_rest_delta)
+        for key, (first, last) in phase_spans.items():
+            if key < own_phase: lower = max(lower, last + (playoff_gap if fixture['stage'] == 'Playoffs' else required_rest_delta))
+            elif key > own_phase: upper = first - required_rest_delta if upper is None else min(upper, first - required_rest_delta)
+        return lower, upper
+
+    updated = {id(f): dict(f) for f in fixtures}; changes = []
+    for fixture in affected:
+        lower, upper = order_bounds(fixture)
+        slot = None
+        for venue in ([fixture['venue'], None] if allow_venue_change else [fixture['venue']]):
+            search_from = lower
+            while True:
+                candidate = slot_table.next_free(search_from, venue)
+                if candidate is None or (upper and slot_table.date_of(candidate) > upper): break
+                if rest_ok(fixture, slot_table.date_of(candidate)): slot = candidate; break
+                search_from = slot_table.date_of(candidate) + timedelta(days=1)
+            if slot is not None: break
+        if slot is None:
+            raise ValueError(f"Could not re-slot {fixture['team1']} vs {fixture['team2']} ({fixture['stage']}, {fixture['date']}) before {upper or window_end}. Try a later end date or allow venue changes.")
+        slot_table.assign(slot)
+        new_fixture = updated[id(fixture)]
+        new_fixture.update(date=slot_table.date_of(slot), venue=slot_table.venue_of(slot), time_slot=slot_table.time_slot_of(slot))
+        for team in (fixture['team1'], fixture['team2']): bisect.insort(team_dates.setdefault(team, []), new_fixture['date'])
+        record(new_fixture)
+        changes.append({'match_number': fixture.get('match_number'), 'stage': fixture['stage'], 'team1': fixture['team1'], 'team2': fixture['team2'],
+                        'from': {'date': fixture['date'], 'venue': fixture['venue'], 'time_slot': fixture['time_slot']},
+                        'to': {'date': new_fixture['date'], 'venue': new_fixture['venue'], 'time_slot': new_fixture['time_slot']}})
+    app.logger.info(f"Rescheduled {len(changes)} of {len(fixtures)} fixtures.")
+    return [updated[id(f)] for f in fixtures], changes
+
+
+# --- Generation Runs ---
+def build_generation_spec(form, roster_memo=None, roster=None):
+    """
+    Validates submitted generation parameters (a request.form or any mapping with the same keys)
+    and returns a picklable spec dict for generate_tournament.
+    Teams come from 'roster' (an already parsed upload), a 'roster' list of records in the mapping
+    (JSON API) or the teams_venues text, in that order. Scheduling rules come from a 'constraints'
+    object (JSON API) or the same fields at the top level (form), see ConstraintProfile.from_mapping.
+    roster_memo (dict) lets a batch parse each distinct roster only once.
+    """
+    team_venue_raw = form.get('teams_venues'); roster_records = form.get('roster'); start_date_str = form.get('start_date')
+    end_date_str = form.get('end_date'); tournament_type = form.get('tournament_type')
+    include_playoffs_str = form.get('include_playoffs')
+    engine = form.get('engine') or 'greedy'; calendar = (form.get('calendar') or '').strip() or None
+    if calendar and (len(calendar) > 64 or not all(c.isalnum() or c in '-_' for c in calendar)): raise ValueError("Calendar names use letters, digits, '-' and '_' (up to 64).")
+    if not all([roster or roster_records or team_venue_raw, start_date_str, end_date_str, tournament_type]): raise ValueError("Missing required fields.")
+    if engine not in SCHEDULING_ENGINES: raise ValueError(f"Invalid scheduling engine: {engine}")
+    if tournament_type not in TOURNAMENT_TYPES: raise ValueError(f"Invalid tournament type: {tournament_type}")
+    if roster is None:
+        if roster_records and not isinstance(roster_records, list): raise ValueError("'roster' must be a list of team records.")
+        roster_key = json.dumps(roster_records, sort_keys=True, default=str) if roster_records else team_venue_raw
+        if roster_memo is None or roster_key not in roster_memo:
+            roster = parse_roster(roster_records, 'records') if roster_records else parse_team_venue_pairs(team_venue_raw) + ({},)
+            if roster_memo is not None: roster_memo[roster_key] = roster
+        else: roster = roster_memo[roster_key]
+    teams_list, venues_list, team_venue_map, venue_rules = roster
+    constraint_fields = form.get('constraints')
+    constraints = ConstraintProfile.from_mapping(constraint_fields if isinstance(constraint_fields, dict) else form, venue_rules)
+    try: start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date(); end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+    except (TypeError, ValueError): raise ValueError("Dates must use the YYYY-MM-DD format.")
+    include_playoffs = str(include_playoffs_str).lower() in ('yes', 'true') if include_playoffs_str else False
+    if start_date > end_date: raise ValueError("End Date cannot be before Start Date.")
+
+    # Validate the ranked playoff teams if needed: a 'top_teams' list (JSON) or top1_team..topN_team fields
+    playoff_format = form.get('playoff_format') or 'top4'
+    if playoff_format not in PLAYOFF_FORMATS: raise ValueError(f"Invalid playoff format: {playoff_format}")
+    playoff_size = PLAYOFF_FORMATS[playoff_format]['teams']; actual_top_teams = []
+    if include_playoffs and tournament_type in PLAYOFF_TYPES:
+        if len(teams_list) < playoff_size: raise ValueError(f"Need >= {playoff_size} teams for Top {playoff_size} Playoffs.")
+        ranked = form.get('top_teams')
+        actual_top_teams = list(ranked) if isinstance(ranked, list) else [form.get(f'top{rank}_team') for rank in range(1, playoff_size + 1)]
+        if len(actual_top_teams) != playoff_size or not all(actual_top_teams): raise ValueError(f"Must select all Top {playoff_size} teams if playoffs enabled.")
+        if len(set(actual_top_teams)) != playoff_size: raise ValueError(f"Top {playoff_size} selections must be unique.")
+        for team in actual_top_teams:
+            if team not in teams_list: raise ValueError(f"Top {playoff_size} team '{team}' not in main list.")
+
+    return {
+        'tournament_name': form.get('tournament_name') or "Unnamed Tournament", 'tournament_type': tournament_type,
+        'teams': teams_list, 'venues': venues_list, 'team_venue_map': team_venue_map,
+        'start_date': start_date, 'end_date': end_date, 'include_playoffs': include_playoffs, 'playoff_format': playoff_format,
+        'top_teams': actual_top_teams, 'engine': engine, 'constraints': constraints,
+        'calendar': calendar,
+    }
+
+def notify(message, category='info'):
+    """ User-facing notice from generation code: collected when a run captures them, flashed in a request, else logged. """
+    collected = _collected_notices.get()
+    if collected is not None: collected.append((category, message))
+    elif has_request_context(): flash(message, category)
+    else: app.logger.info(message)
+
+def publish_stages(fixture_dicts):
+    """ Hands finished fixtures to the active stage sink (streaming exports), one call per stage in first-match order. """
+    sink = _stage_sink.get()
+    if sink is None: return
+    for stage, stage_fixtures in split_by_stage(fixture_dicts).items(): sink(stage, stage_fixtures)
+
+def new_seed():
+    """ Seed for a run that did not ask for one. Drawn from OS entropy, so the module RNG is never shared between requests. """
+    return _seed_source.randrange(MAX_SEED + 1)
+
+_seed_source = random.SystemRandom()
+
+def generate_tournament(spec, seed=None):
+    """
+    Runs one generation for a spec from build_generation_spec on a private RNG seeded with 'seed'
+    (None draws a new_seed()), so the same spec and seed always give the same fixtures.
+    Playoffs after a double elimination or group knockout book the bracket's own slot table, so they
+    must fit before end_date; after a league they get a fresh table past its last match.
+    Returns {'fixtures', 'last_date', 'seed', 'notices'}; notices are (category, message) pairs.
+    """
+    if seed is None: seed = new_seed()
+    rng = random.Random(seed)
+    teams_list, venues_list, team_venue_map = spec['teams'], spec['venues'], spec['team_venue_map']
+    constraints = spec.get('constraints') or DEFAULT_CONSTRAINTS
+    start_date, end_date, min_rest_days, engine = spec['start_date'], spec['end_date'], constraints.min_rest_days, spec['engine']
+    tournament_type = spec['tournament_type']; notices = []
+    token = _collected_notices.set(notices); started = time.perf_counter(); outcome = 'error'
+    bookings_token = _calendar_bookings.set(spec.get('calendar_bookings'))
+    slot_tables = []; tables_token = _slot_tables.set(_slot_tables.get() + (slot_tables,))
+    try:
+        app.logger.info(f"Starting generation: Type='{tournament_type}', Playoffs={spec['include_playoffs']}, Engine='{engine}', Seed={seed}")
+        playoffs = spec['include_playoffs'] and spec['top_teams']; shared_slots = None
+        if playoffs and tournament_type in ('double_elimination', 'group_knockout'): shared_slots = get_available_slots(venues_list, start_date, end_date, constraints)
+        # Call appropriate generation function
+        if tournament_type == 'round_robin':
+            fixture_dicts, last_main_stage_date = generate_round_robin_fixtures(teams_list, venues_list, team_venue_map, start_date, end_date, min_rest_days, engine=engine, rng=rng, constraints=constraints)
+        elif tournament_type == 'double_round_robin':
+            fixture_dicts, last_main_stage_date = generate_double_round_robin_fixtures(teams_list, venues_list, team_venue_map, start_date, end_date, min_rest_days, engine=engine, rng=rng, constraints=constraints)
+        elif tournament_type == 'single_elimination':
+            fixture_dicts, last_main_stage_date = generate_single_elimination_fixtures(teams_list, venues_list, team_venue_map, start_date, end_date, min_rest_days, engine=engine, rng=rng, constraints=constraints)
+        elif tournament_type == 'double_elimination':
+            fixture_dicts, last_main_stage_date = generate_double_elimination_fixtures(teams_list, venues_list, team_venue_map, start_date, end_date, min_rest_days, engine=engine, rng=rng, constraints=constraints, available_slots=shared_slots)
+        elif tournament_type == 'group_knockout':
+            fixture_dicts, last_main_stage_date = generate_group_stage_knockout_fixtures(teams_list, venues_list, team_venue_map, start_date, end_date, min_rest_days, engine=engine, rng=rng, constraints=constraints, available_slots=shared_slots)
+        else: raise ValueError(f"Invalid tournament type: {tournament_type}")
+        publish_stages(fixture_dicts)
+        last_date = last_main_stage_date
+        if playoffs:
+            playoff_fixtures, last_date = generate_playoffs(spec.get('playoff_format', 'top4'), spec['top_teams'], last_main_stage_date, venues_list, team_venue_map, min_rest_days, constraints, shared_slots)
+            publish_stages(playoff_fixtures)
+            fixture_dicts.extend(playoff_fixtures)
+        outcome = 'ok'
+    finally:
+        _collected_notices.reset(token); _calendar_bookings.reset(bookings_token); _slot_tables.reset(tables_token)
+        metrics.inc('fixtures_slot_probes_total', sum(table.probes for table in slot_tables))
+        metrics.observe('fixtures_generation_seconds', time.perf_counter() - started, tournament_type=tournament_type)
+        metrics.inc('fixtures_generations_total', tournament_type=tournament_type, outcome=outcome)
+    return {'fixtures': fixture_dicts, 'last_date': last_date, 'seed': seed, 'notices': notices}
+
+def _generate_for_seed(spec, seed, deadline=None):
+    """
+    Process-pool worker for search_best_schedule: one seeded run plus its score, or the error.
+    deadline (time.time()) stops the run at its next schedule_matches call once passed. The worker's
+    metrics and slot probes are returned under 'worker_counters' for the parent to merge.
+    """
+    before = metrics.snapshot()
+    token = _generation_deadline.set(time.monotonic() + deadline - time.time() if deadline is not None else None)
+    with count_slot_probes() as slot_probes:
+        try:
+            result = generate_tournament(spec, seed)
+            result['score'] = score_schedule(result['fixtures'], spec['start_date'], spec.get('constraints'))
+        except ValueError as e:
+            result = {'seed': seed, 'error': str(e)}
+        finally:
+            _generation_deadline.reset(token)
+    result['worker_counters'] = (metrics.delta_since(before), slot_probes())
+    return result
+
+def get_search_pool():
+    """ Shared process pool for multi-seed searches (created on first use). """
+    global _search_pool
+    with _search_pool_lock:
+        if _search_pool is None: _search_pool = ProcessPoolExecutor(max_workers=SEARCH_WORKERS)
+        return _search_pool
+
+def search_best_schedule(spec, num_seeds, base_seed=None, timeout=SEARCH_TIMEOUT_SECONDS):
+    """
+    Runs the same generation for num_seeds consecutive seeds concurrently in the process pool
+    and returns the best result by score_schedule. Seeds still running after 'timeout'
+    seconds are abandoned, so latency stays bounded: queued seeds are cancelled and running
+    ones stop at their next scheduling step (the pool is shared with other searches, so it is
+    not shut down). Worker metrics are merged into this process.
+    Each finished seed is reported to the progress hook under 'Seed search'; the seeds' own stages
+    run in other processes and are not. The result carries a 'search' summary.
+    """
+    if base_seed is None: base_seed = new_seed()
+    seeds = [(base_seed + i) % (MAX_SEED + 1) for i in range(num_seeds)]
+    app.logger.info(f"Searching {num_seeds} seeds from {base_seed} on {SEARCH_WORKERS} workers.")
+    deadline = time.time() + timeout; progress = _progress_hook.get()
+    if progress: progress('Seed search', planned=num_seeds)
+    futures = [get_search_pool().submit(_generate_for_seed, spec, seed, deadline) for seed in seeds]
+    done = []; not_done = set(futures)
+    while not_done and time.time() < deadline:
+        finished, not_done = wait(not_done, timeout=deadline - time.time(), return_when=FIRST_COMPLETED)
+        done += finished
+        if progress and finished: progress('Seed search', scheduled=len(finished))
+    for future in not_done: future.cancel()
+    results = []; slot_checks = 0
+    for future in done:
+        try: result = future.result()
+        except Exception as e: # Worker crashed (e.g. BrokenProcessPool); count as a failed seed
+            app.logger.error(f"Seed search worker failed: {e}"); results.append({'seed': None, 'error': "Worker failed."}); continue
+        worker_metrics, worker_probes = result.pop('worker_counters')
+        metrics.merge(worker_metrics); slot_checks += worker_probes
+        results.append(result)
+    succeeded = [r for r in results if 'error' not in r]
+    if not succeeded:
+        first_error = min((r for r in results), key=lambda r: r['seed'] or 0)['error'] if results else f"No seed finished within {timeout}s."
+        raise ValueError(f"None of {num_seeds} attempts produced a schedule. First error: {first_error}")
+    best = min(succeeded, key=lambda r: (r['score'], r['seed']))
+    best['search'] = {'base_seed': base_seed, 'attempts': num_seeds, 'completed': len(done), 'succeeded': len(succeeded), 'score': best['score'], 'slot_checks': slot_checks}
+    app.logger.info(f"Seed search: {len(succeeded)}/{num_seeds} succeeded, best seed {best['seed']} score {best['score']}.")
+    return best
+
+
+# --- Result Cache ---
+class FixtureCache:
+    """
+    LRU cache of generation results keyed by generation_cache_key, bounded by entry count,
+    total cached fixtures and a TTL. Thread-safe; callers get fresh fixture dicts on every hit.
+    """
+    def __init__(self, max_entries=256, max_fixtures=200000, ttl_seconds=600):
+        self.max_entries = max_entries; self.max_fixtures = max_fixtures; self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict() # key -> (expires_at, result)
+        self._fixture_total = 0; self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key):
+        """ Cached result for key (fixtures copied, so callers may mutate them), or None. """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._discard(key); self.expirations += 1; entry = None
+            if entry is None:
+                self.misses += 1; return None
+            self._entries.move_to_end(key); self.hits += 1
+            result = entry[1]
+        return dict(result, fixtures=[dict(f) for f in result['fixtures']], notices=list(result['notices']))
+
+    def put(self, key, result):
+        """ Stores a copy of result, evicting least recently used entries to stay within bounds. """
+        stored = dict(result, fixtures=[dict(f) for f in result['fixtures']], notices=list(result['notices']))
+        if len(stored['fixtures']) > self.max_fixtures: return
+        with self._lock:
+            if key in self._entries: self._discard(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, stored); self._fixture_total += len(stored['fixtures'])
+            while len(self._entries) > self.max_entries or self._fixture_total > self.max_fixtures:
+                self._discard(next(iter(self._entries))); self.evictions += 1
+
+    def _discard(self, key):
+        _, result = self._entries.pop(key); self._fixture_total -= len(result['fixtures'])
+
+    def clear(self):
+        with self._lock: self._entries.clear(); self._fixture_total = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'fixtures': self._fixture_total, 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'expirations': self.expirations}
+
+def generation_cache_key(spec, seed=None, search_seeds=1):
+    """ Hash of the normalized spec plus seed settings. seed=None means 'any schedule' and is cached as such. """
+    material = {key: spec[key] for key in ('tournament_type', 'teams', 'team_venue_map', 'include_playoffs', 'top_teams', 'engine')}
+    if spec['include_playoffs']: material['playoff_format'] = spec.get('playoff_format', 'top4')
+    material.update(start_date=spec['start_date'].isoformat(), end_date=spec['end_date'].isoformat(), seed=seed, search_seeds=search_seeds, constraints=(spec.get('constraints') or DEFAULT_CONSTRAINTS).to_json())
+    return hashlib.sha256(json.dumps(material, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')).hexdigest()
+
+fixture_cache = FixtureCache(
+    max_entries=int(os.environ.get('FIXTURE_CACHE_ENTRIES', 256)),
+    max_fixtures=int(os.environ.get('FIXTURE_CACHE_FIXTURES', 200000)),
+    ttl_seconds=float(os.environ.get('FIXTURE_CACHE_TTL', 600)),
+)
+
+def generate_cached(spec, seed=None, search_seeds=1):
+    """
+    generate_tournament / search_best_schedule behind fixture_cache. Runs into a shared calendar are never cached.
+    Results are saved to fixture_store (when enabled) and then carry their 'tournament_id'.
+    """
+    if spec.get('calendar'): return store_result(spec, venue_calendars.get(spec['calendar']).schedule(spec, seed, search_seeds))
+    key = generation_cache_key(spec, seed, search_seeds)
+    result = fixture_cache.get(key)
+    if result is not None:
+        app.logger.info(f"Fixture cache hit ({key[:12]}).")
+        return store_result(spec, result)
+    if search_seeds > 1: result = search_best_schedule(spec, search_seeds, base_seed=seed)
+    else: result = generate_tournament(spec, seed)
+    fixture_cache.put(key, result)
+    return store_result(spec, result)
+
+
+# --- Persistent Storage ---
+class FixtureStore:
+    """
+    SQLite store of generated tournaments and their fixtures, indexed by team (either side), venue
+    and date so read endpoints are answered without re-running the scheduler. Each thread keeps
+    its own connection; WAL mode lets readers run alongside a writer.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tournaments (
+            id TEXT PRIMARY KEY, result_key TEXT UNIQUE NOT NULL, name TEXT NOT NULL, tournament_type TEXT NOT NULL,
+            seed INTEGER, start_date TEXT NOT NULL, end_date TEXT NOT NULL, calendar TEXT, spec_json TEXT NOT NULL,
+            fixture_count INTEGER NOT NULL, created_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS fixtures (
+            id INTEGER PRIMARY KEY, tournament_id TEXT NOT NULL REFERENCES tournaments(id) ON DELETE CASCADE,
+            match_number INTEGER, stage TEXT, round INTEGER, match_type TEXT, date TEXT NOT NULL, time_slot INTEGER,
+            venue TEXT NOT NULL, team1 TEXT NOT NULL, team2 TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_fixtures_team1_date ON fixtures (team1, date);
+        CREATE INDEX IF NOT EXISTS idx_fixtures_team2_date ON fixtures (team2, date);
+        CREATE INDEX IF NOT EXISTS idx_fixtures_venue_date ON fixtures (venue, date);
+        CREATE INDEX IF NOT EXISTS idx_fixtures_date ON fixtures (date);
+        CREATE INDEX IF NOT EXISTS idx_fixtures_tournament ON fixtures (tournament_id, date, time_slot);
+        CREATE INDEX IF NOT EXISTS idx_tournaments_created ON tournaments (created_at);
+        CREATE INDEX IF NOT EXISTS idx_tournaments_calendar ON tournaments (calendar, created_at);
+        CREATE TABLE IF NOT EXISTS calendars (name TEXT PRIMARY KEY, version INTEGER NOT NULL);
+    """
+    FIXTURE_COLUMNS = "f.tournament_id, t.name AS tournament_name, f.match_number, f.stage, f.round, f.match_type, f.date, f.time_slot, f.venue, f.team1, f.team2"
+
+    def __init__(self, path):
+        self.path = path; self._local = threading.local(); self._schema_lock = threading.Lock(); self._schema_ready = False
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if os.path.dirname(self.path): os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL"); conn.execute("PRAGMA foreign_keys=ON"); conn.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if not self._schema_ready: conn.executescript(self.SCHEMA); self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def save(self, spec, result):
+        """ Stores a result once (keyed by tournament name, spec, seed and calendar booking) and returns its tournament id. """
+        calendar_id = (result.get('calendar') or {}).get('tournament_id')
+        result_key = calendar_id or hashlib.sha256(json.dumps([spec['tournament_name'], generation_cache_key(spec, result['seed'])]).encode('utf-8')).hexdigest()
+        conn = self._connection()
+        row = conn.execute("SELECT id FROM tournaments WHERE result_key = ?", (result_key,)).fetchone()
+        if row: return row['id']
+        tournament_id = calendar_id or uuid.uuid4().hex
+        with conn:
+            if not self._insert(conn, tournament_id, result_key, spec, result): return conn.execute("SELECT id FROM tournaments WHERE result_key = ?", (result_key,)).fetchone()['id'] # Saved concurrently
+        return tournament_id
+
+    @staticmethod
+    def _insert(conn, tournament_id, result_key, spec, result):
+        spec_json = json.dumps({key: value for key, value in spec.items() if key != 'calendar_bookings'}, sort_keys=True, default=lambda value: value.to_json() if isinstance(value, ConstraintProfile) else str(value))
+        cursor = conn.execute("INSERT OR IGNORE INTO tournaments (id, result_key, name, tournament_type, seed, start_date, end_date, calendar, spec_json, fixture_count, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                              (tournament_id, result_key, spec['tournament_name'], spec['tournament_type'], result['seed'], spec['start_date'].isoformat(), spec['end_date'].isoformat(), spec.get('calendar'), spec_json, len(result['fixtures']), time.time()))
+        if not cursor.rowcount: return False
+        conn.executemany("INSERT INTO fixtures (tournament_id, match_number, stage, round, match_type, date, time_slot, venue, team1, team2) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         [(tournament_id, f.get('match_number'), f.get('stage'), f.get('round'), f.get('match_type'), f['date'].isoformat(), f.get('time_slot'), f['venue'], f['team1'], f['team2']) for f in result['fixtures']])
+        return True
+
+    def calendar_version(self, name):
+        """ Bookings made so far into shared calendar 'name' (its version), or None if it was never booked into. """
+        row = self._connection().execute("SELECT version FROM calendars WHERE name = ?", (name,)).fetchone()
+        return row['version'] if row else None
+
+    def calendar_bookings(self, name):
+        """ (version, {tournament_id: {'name', 'bookings': [(date, venue, time_slot)], 'created_at'}}) of a shared calendar, read in one snapshot, oldest first. """
+        conn = self._connection(); conn.execute("BEGIN")
+        try:
+            row = conn.execute("SELECT version FROM calendars WHERE name = ?", (name,)).fetchone()
+            tournaments = OrderedDict((r['id'], {'name': r['name'], 'bookings': [], 'created_at': r['created_at']})
+                                      for r in conn.execute("SELECT id, name, created_at FROM tournaments WHERE calendar = ? ORDER BY created_at", (name,)))
+            for r in conn.execute("SELECT f.tournament_id, f.date, f.venue, f.time_slot FROM fixtures f JOIN tournaments t ON t.id = f.tournament_id WHERE t.calendar = ?", (name,)):
+                tournaments[r['tournament_id']]['bookings'].append((date.fromisoformat(r['date']), r['venue'], r['time_slot']))
+        finally:
+            conn.rollback()
+        return (row['version'] if row else None), tournaments
+
+    def book(self, name, version, tournament_id, spec, result):
+        """
+        Stores a result booked into shared calendar 'name' if no other booking was stored since
+        'version' was read. Returns the calendar's new version, or None (nothing stored) if it moved on.
+        """
+        conn = self._connection(); conn.execute("BEGIN IMMEDIATE") # Serializes bookings across processes
+        try:
+            row = conn.execute("SELECT version FROM calendars WHERE name = ?", (name,)).fetchone()
+            if (row['version'] if row else None) != version: conn.rollback(); return None
+            conn.execute("INSERT INTO calendars (name, version) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET version = version + 1", (name,))
+            self._insert(conn, tournament_id, tournament_id, dict(spec, calendar=name), result)
+            conn.commit()
+        except BaseException:
+            conn.rollback(); raise
+        return (version or 0) + 1
+
+    def release(self, name, tournament_id):
+        """ Deletes a tournament booked into shared calendar 'name'; returns False if there is none. """
+        conn = self._connection()
+        with conn: return conn.execute("DELETE FROM tournaments WHERE id = ? AND calendar = ?", (tournament_id, name)).rowcount > 0
+
+    def tournament(self, tournament_id):
+        """ Stored tournament (metadata plus fixture dicts with date objects), or None. """
+        conn = self._connection()
+        row = conn.execute("SELECT id, name, tournament_type, seed, start_date, end_date, calendar, fixture_count, created_at FROM tournaments WHERE id = ?", (tournament_id,)).fetchone()
+        if row is None: return None
+        fixtures = conn.execute(f"SELECT {self.FIXTURE_COLUMNS} FROM fixtures f JOIN tournaments t ON t.id = f.tournament_id WHERE f.tournament_id = ? ORDER BY f.date, f.time_slot", (tournament_id,)).fetchall()
+        return dict(row, fixtures=[self._fixture(r) for r in fixtures])
+
+    def spec(self, tournament_id):
+        """ Generation spec a stored tournament was made from (dates, teams, venues and constraint profile restored), or None. """
+        row = self._connection().execute("SELECT spec_json FROM tournaments WHERE id = ?", (tournament_id,)).fetchone()
+        if row is None: return None
+        spec = json.loads(row['spec_json'])
+        spec['start_date'] = date.fromisoformat(spec['start_date']); spec['end_date'] = date.fromisoformat(spec['end_date'])
+        spec['team_venue_map'] = {team: tuple(venue) if isinstance(venue, list) else venue for team, venue in spec['team_venue_map'].items()}
+        spec['constraints'] = ConstraintProfile.from_mapping(spec.get('constraints'))
+        return spec
+
+    def tournaments(self, limit=50):
+        """ Most recently stored tournaments (metadata only). """
+        return [dict(row) for row in self._connection().execute("SELECT id, name, tournament_type, seed, start_date, end_date, calendar, fixture_count, created_at FROM tournaments ORDER BY created_at DESC LIMIT ?", (limit,))]
+
+    def fixtures(self, team=None, venue=None, first_date=None, last_date=None, tournament_id=None, limit=1000):
+        """ Stored fixtures matching every given filter, by date. Each filter is served by an index. """
+        clauses = []; params = []
+        if team is not None: clauses.append("(f.team1 = ? OR f.team2 = ?)"); params += [team, team]
+        if venue is not None: clauses.append("f.venue = ?"); params.append(venue)
+        if first_date is not None: clauses.append("f.date >= ?"); params.append(first_date.isoformat())
+        if last_date is not None: clauses.append("f.date <= ?"); params.append(last_date.isoformat())
+        if tournament_id is not None: clauses.append("f.tournament_id = ?"); params.append(tournament_id)
+        where = " AND ".join(clauses) or "1"
+        rows = self._connection().execute(f"SELECT {self.FIXTURE_COLUMNS} FROM fixtures f JOIN tournaments t ON t.id = f.tournament_id WHERE {where} ORDER BY f.date, f.time_slot LIMIT ?", params + [limit])
+        return [self._fixture(row) for row in rows]
+
+    @staticmethod
+    def _fixture(row):
+        fixture = dict(row); fixture['date'] = date.fromisoformat(fixture['date'])
+        return fixture
+
+FIXTURE_DB_PATH = os.environ.get('FIXTURE_DB_PATH', os.path.join(app.instance_path, 'fixtures.db')) # '' disables storage
+fixture_store = FixtureStore(FIXTURE_DB_PATH) if FIXTURE_DB_PATH else None
+
+def store_result(spec, result):
+    """ Saves a result to fixture_store; returns it with 'tournament_id' (unchanged if storage is off or fails). """
+    if fixture_store is None: return result
+    try: return dict(result, tournament_id=fixture_store.save(spec, result))
+    except sqlite3.Error as e:
+        app.logger.error(f"Could not store tournament '{spec['tournament_name']}': {e}")
+        return result
+
+
+# --- Shared Venue Calendars ---
+class VenueCalendar:
+    """
+    Venue bookings shared by every tournament scheduled into one named calendar (e.g. the men's
+    and women's leagues at an association's grounds). Generations run one at a time under the
+    calendar lock with all earlier bookings reserved in their slot table, so venue slots and the
+    daily match limits hold across tournaments; a successful run's fixtures are then booked.
+
+    With a FixtureStore the bookings live in its database: they survive restarts and are shared by
+    every process using it. Each run starts from the stored bookings and is stored only if no other
+    process booked in the meantime (otherwise it is rescheduled). Without a store (FIXTURE_DB_PATH='')
+    bookings are kept in this process only, so one calendar must not be served by several workers.
+    """
+    def __init__(self, name, store=None):
+        self.name = name; self.store = store; self._lock = threading.Lock(); self._version = None
+        self._tournaments = OrderedDict() # tournament_id -> {'name', 'bookings': [(date, venue, time_slot)], 'created_at'}
+
+    def _bookings_from(self, first_date):
+        return tuple(booking for entry in self._tournaments.values() for booking in entry['bookings'] if booking[0] >= first_date)
+
+    def _sync(self):
+        if self.store is not None: self._version, self._tournaments = self.store.calendar_bookings(self.name)
+
+    def _schedule_locked(self, spec, seed, search_seeds):
+        for _ in range(CALENDAR_BOOKING_ATTEMPTS):
+            self._sync()
+            run_spec = dict(spec, calendar_bookings=self._bookings_from(spec['start_date']))
+            if search_seeds > 1: result = search_best_schedule(run_spec, search_seeds, base_seed=seed)
+            else: result = generate_tournament(run_spec, seed)
+            tournament_id = uuid.uuid4().hex
+            if self.store is not None:
+                try: version = self.store.book(self.name, self._version, tournament_id, spec, result)
+                except sqlite3.Error as e: raise ValueError(f"Could not book '{spec['tournament_name']}' into calendar '{self.name}': {e}") from e
+                if version is None:
+                    app.logger.info(f"Calendar '{self.name}' changed while '{spec['tournament_name']}' was scheduled; rescheduling."); continue
+                self._version = version
+            self._tournaments[tournament_id] = {'name': spec['tournament_name'], 'created_at': time.time(),
+                                                'bookings': [(f['date'], f['venue'], f['time_slot']) for f in result['fixtures']]}
+            app.logger.info(f"Booked {len(result['fixtures'])} fixtures of '{spec['tournament_name']}' into calendar '{self.name}'.")
+            return dict(result, calendar={'name': self.name, 'tournament_id': tournament_id})
+        raise ValueError(f"Calendar '{self.name}' kept changing while '{spec['tournament_name']}' was scheduled. Try again.")
+
+    def schedule(self, spec, seed=None, search_seeds=1):
+        """ Generates one tournament around the existing bookings and books it; returns the result with a 'calendar' entry. """
+        with self._lock: return self._schedule_locked(spec, seed, search_seeds)
+
+    def schedule_season(self, runs):
+        """
+        Books several tournaments in one pass under a single lock hold, each seeing the ones before it.
+        runs: [(spec, seed, search_seeds)] in priority order. Returns one result or ValueError per run.
+        """
+        outcomes = []
+        with self._lock:
+            for spec, seed, search_seeds in runs:
+                try: outcomes.append(self._schedule_locked(spec, seed, search_seeds))
+                except ValueError as e: outcomes.append(e)
+        return outcomes
+
+    def release(self, tournament_id):
+        """ Frees a tournament's bookings (deleting its stored copy); returns False if it is not in this calendar. """
+        with self._lock:
+            if self.store is None: return self._tournaments.pop(tournament_id, None) is not None
+            self._tournaments.pop(tournament_id, None)
+            return self.store.release(self.name, tournament_id)
+
+    def summary(self):
+        """ Tournaments and per-date booking counts. """
+        with self._lock:
+            self._sync(); per_date = {}
+            for entry in self._tournaments.values():
+                for slot_date, _, _ in entry['bookings']: per_date[slot_date] = per_date.get(slot_date, 0) + 1
+            return {'name': self.name, 'tournaments': [{'tournament_id': tournament_id, 'name': entry['name'], 'fixtures': len(entry['bookings'])} for tournament_id, entry in self._tournaments.items()],
+                    'bookings_by_date': {slot_date.isoformat(): count for slot_date, count in sorted(per_date.items())}}
+
+class CalendarRegistry:
+    """ Named VenueCalendars, created on first use (at most max_calendars) or when 'store' already holds bookings for them. """
+    def __init__(self, max_calendars=MAX_CALENDARS, store=None):
+        self.max_calendars = max_calendars; self.store = store; self._calendars = {}; self._lock = threading.Lock()
+
+    def get(self, name, create=True):
+        with self._lock:
+            calendar = self._calendars.get(name)
+            if calendar is None and (create or (self.store is not None and self.store.calendar_version(name) is not None)):
+                if len(self._calendars) >= self.max_calendars: raise ValueError(f"At most {self.max_calendars} shared calendars can be open.")
+                calendar = self._calendars[name] = VenueCalendar(name, self.store)
+            return calendar
+
+venue_calendars = CalendarRegistry(store=fixture_store)
+
+
+# --- Result Formatting ---
+def group_fixtures_by_stage(fixture_dicts):
+    """ Sorts fixtures by date, renumbers them overall and groups them by stage (in first-match order). """
+    fixtures_by_stage = {}
+    fixture_dicts.sort(key=lambda x: (x['date'], x['time_slot']))
+    for i, f_dict in enumerate(fixture_dicts):
+        f_dict['match_number'] = i + 1 # Assign overall sequential match number
+        stage = f_dict.get('stage', 'Fixtures')
+        if stage not in fixtures_by_stage: fixtures_by_stage[stage] = []
+        if 'date' in f_dict and not isinstance(f_dict['date'], date): # Date conversion check
+            try: f_dict['date'] = datetime.strptime(f_dict['date'], '%Y-%m-%d').date()
+            except (TypeError, ValueError): f_dict['date'] = None; app.logger.error("Date conversion failed.")
+        fixtures_by_stage[stage].append(f_dict)
+    return fixtures_by_stage
+
+def split_by_stage(fixture_dicts):
+    """ {stage: fixtures sorted by date/time slot} in first-match order, without renumbering or copying. """
+    fixtures_by_stage = {}
+    for f_dict in sorted(fixture_dicts, key=lambda x: (x['date'], x['time_slot'])):
+        fixtures_by_stage.setdefault(f_dict.get('stage', 'Fixtures'), []).append(f_dict)
+    return fixtures_by_stage
+
+def fixture_to_json(fixture):
+    """ JSON-safe copy of a fixture dict (dates as YYYY-MM-DD). """
+    return dict(fixture, date=fixture['date'].isoformat() if fixture.get('date') else None)
+
+def stages_to_json(fixtures_by_stage):
+    return {stage: [fixture_to_json(f) for f in stage_fixtures] for stage, stage_fixtures in fixtures_by_stage.items()}
+
+def result_to_json(result, tournament_name):
+    """ API payload for a generation result: fixtures grouped by stage plus seed, notices and search summary. """
+    payload = {
+        'tournament_name': tournament_name, 'seed': result['seed'], 'fixture_count': len(result['fixtures']),
+        'notices': [{'category': category, 'message': message} for category, message in result['notices']],
+        'fixtures_by_stage': stages_to_json(group_fixtures_by_stage([dict(f) for f in result['fixtures']])),
+    }
+    if 'search' in result: payload['search'] = result['search']
+    if 'calendar' in result: payload['calendar'] = result['calendar']
+    if 'tournament_id' in result: payload['tournament_id'] = result['tournament_id']
+    return payload
+
+
+# --- Background Jobs ---
+class JobManager:
+    """
+    Runs fixture generations on a worker thread pool sized independently of the web server.
+    Each job records status (queued/running/done/failed) and per-stage progress
+    ({stage: {'planned', 'scheduled'}}) reported while it runs: by schedule_matches per match, by
+    the backtracking solver as it places (and unplaces) matches, and for multi-seed searches only
+    as 'Seed search' seeds finished. Cached results report no progress.
+    Finished jobs are kept for retention_seconds, and at most max_finished of them (oldest
+    finished first out), so a burst of submissions cannot pin unbounded fixture lists.
+    """
+    def __init__(self, max_workers=4, max_pending=100, retention_seconds=3600, max_finished=200):
+        self.max_workers = max_workers; self.max_pending = max_pending; self.retention_seconds = retention_seconds; self.max_finished = max_finished
+        self._executor = None; self._jobs = {}; self._finished = OrderedDict(); self._lock = threading.Lock() # _finished: job id -> finished_at, in finish order
+
+    def submit(self, spec, seed=None, search_seeds=1):
+        """ Queues a generation; returns the job id. Raises RuntimeError when the queue is full. """
+        with self._lock:
+            self._prune()
+            if sum(1 for job in self._jobs.values() if job['status'] in ('queued', 'running')) >= self.max_pending:
+                raise RuntimeError("Too many pending jobs, try again later.")
+            if self._executor is None: self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fixture-job')
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {'id': job_id, 'status': 'queued', 'tournament_name': spec['tournament_name'], 'progress': {}, 'error': None, 'result': None,
+                                  'created_at': time.time(), 'started_at': None, 'finished_at': None}
+            self._executor.submit(self._run, job_id, spec, seed, search_seeds)
+        app.logger.info(f"Queued job {job_id} ({spec['tournament_type']}, {len(spec['teams'])} teams).")
+        return job_id
+
+    def get(self, job_id, include_result=False):
+        """ Snapshot of a job (without its result unless asked), or None. """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None: return None
+            snapshot = {key: value for key, value in job.items() if key != 'result'}
+            snapshot['progress'] = {stage: dict(counts) for stage, counts in job['progress'].items()}
+            if include_result: snapshot['result'] = job['result']
+            return snapshot
+
+    def counts(self):
+        """ Retained jobs by status. """
+        with self._lock:
+            counts = {status: 0 for status in ('queued', 'running', 'done', 'failed')}
+            for job in self._jobs.values(): counts[job['status']] = counts.get(job['status'], 0) + 1
+            return counts
+
+    def _run(self, job_id, spec, seed, search_seeds):
+        job = self._jobs[job_id]
+        with self._lock: job['status'] = 'running'; job['started_at'] = time.time()
+        token = _progress_hook.set(lambda stage, planned=0, scheduled=0: self._progress(job, stage, planned, scheduled))
+        try:
+            result = generate_cached(spec, seed, search_seeds)
+            with self._lock: job['result'] = result; job['status'] = 'done'
+        except ValueError as e:
+            with self._lock: job['status'] = 'failed'; job['error'] = str(e)
+        except Exception:
+            app.logger.exception(f"Unexpected error in job {job_id}:")
+            with self._lock: job['status'] = 'failed'; job['error'] = "An unexpected server error occurred."
+        finally:
+            _progress_hook.reset(token)
+            with self._lock:
+                job['finished_at'] = self._finished[job_id] = time.time()
+                self._prune()
+        app.logger.info(f"Job {job_id} finished: {job['status']}.")
+
+    def _progress(self, job, stage, planned, scheduled):
+        with self._lock:
+            counts = job['progress'].setdefault(stage, {'planned': 0, 'scheduled': 0})
+            counts['planned'] += planned; counts['scheduled'] += scheduled
+
+    def _prune(self):
+        """ Drops expired finished jobs, then the oldest finished ones beyond max_finished. Caller holds _lock. """
+        cutoff = time.time() - self.retention_seconds
+        while self._finished and (next(iter(self._finished.values())) < cutoff or len(self._finished) > self.max_finished):
+            job_id, _ = self._finished.popitem(last=False); self._jobs.pop(job_id, None)
+
+job_manager = JobManager(
+    max_workers=int(os.environ.get('JOB_WORKERS', 4)),
+    max_pending=int(os.environ.get('JOB_MAX_PENDING', 100)),
+    retention_seconds=float(os.environ.get('JOB_RETENTION_SECONDS', 3600)),
+    max_finished=int(os.environ.get('JOB_MAX_FINISHED', 200)),
+)
+
+def error_payload(e):
+    """ JSON error body; roster problems also list every bad row. """
+    if isinstance(e, RosterError): return {'error': str(e), 'errors': e.errors, 'error_count': e.error_count}
+    return {'error': str(e)}
+
+def read_generation_request(data, roster_memo=None, files=None):
+    """ spec, seed and search_seeds from a form or JSON mapping (see build_generation_spec); files may carry a roster_file upload. """
+    upload = files.get('roster_file') if files else None
+    roster = parse_roster_upload(upload, data.get('roster_format') or None) if upload and upload.filename else None
+    spec = build_generation_spec(data, roster_memo, roster)
+    try: search_seeds = int(data.get('search_seeds') or 1)
+    except (TypeError, ValueError): raise ValueError("Number of attempts must be a whole number.")
+    if not 1 <= search_seeds <= MAX_SEARCH_SEEDS: raise ValueError(f"Number of attempts must be between 1 and {MAX_SEARCH_SEEDS}.")
+    seed = data.get('seed')
+    try:
+        seed = int(seed) if seed not in (None, '') else None
+        if seed is not None and not 0 <= seed <= MAX_SEED: raise ValueError
+    except (TypeError, ValueError): raise ValueError(f"Seed must be a whole number from 0 to {MAX_SEED}.")
+    return spec, seed, search_seeds
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """ Queues a generation (form or JSON body with the index form fields); returns 202 with the job id. """
+    data = request.get_json(silent=True) or request.form
+    try:
+        spec, seed, search_seeds = read_generation_request(data, files=request.files)
+        job_id = job_manager.submit(spec, seed, search_seeds)
+    except ValueError as e: return jsonify(error_payload(e)), 400
+    except RuntimeError as e: return jsonify(error=str(e)), 503
+    return jsonify(job_id=job_id, status_url=url_for('job_status', job_id=job_id), result_url=url_for('job_result', job_id=job_id)), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """ Status and per-stage progress of a job. """
+    job = job_manager.get(job_id)
+    if job is None: return jsonify(error="Unknown job."), 404
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """ Fixtures grouped by stage once the job is done (202 while pending). """
+    job = job_manager.get(job_id, include_result=True)
+    if job is None: return jsonify(error="Unknown job."), 404
+    if job['status'] in ('queued', 'running'): return jsonify(status=job['status'], progress=job['progress']), 202
+    if job['status'] == 'failed': return jsonify(status='failed', error=job['error']), 422
+    return jsonify(status='done', **result_to_json(job['result'], job['tournament_name']))
+
+
+# --- Streaming Export ---
+EXPORT_FIELDS = ('match_number', 'stage', 'round', 'match_type', 'date', 'time_slot', 'venue', 'team1', 'team2')
+
+def iter_tournament_stages(spec, seed=None, search_seeds=1):
+    """
+    Yields (stage, fixtures) while generation runs on a helper thread: each stage is sent as soon as
+    its fixtures are final (see publish_stages). Only group_knockout finishes stages mid-run (its
+    groups, before the knockout is built); every other type sends its main stages together once its
+    generator returns, then its playoffs. Cached and multi-seed results are replayed stage by
+    stage once available. Match numbers are as generated (the page renumbers by date afterwards).
+    Raises ValueError if generation fails, possibly after earlier stages were yielded.
+    """
+    events = queue.Queue(maxsize=4); cancelled = threading.Event()
+    def put(event):
+        while not cancelled.is_set(): # Stop feeding a consumer that went away (client disconnected)
+            try: events.put(event, timeout=0.5); return
+            except queue.Full: continue
+    def run():
+        published = set()
+        def sink(stage, fixtures):
+            if stage not in published: published.add(stage); put(('stage', stage, fixtures))
+        token = _stage_sink.set(sink)
+        try:
+            result = generate_cached(spec, seed, search_seeds)
+            for stage, fixtures in split_by_stage(result['fixtures']).items(): sink(stage, fixtures)
+            put(('done', None))
+        except ValueError as e: put(('error', str(e)))
+        except Exception as e:
+            app.logger.exception(f"Export generation failed: {e}"); put(('error', "An unexpected server error occurred."))
+        finally: _stage_sink.reset(token)
+    threading.Thread(target=run, name='fixture-export', daemon=True).start()
+    try:
+        while True:
+            kind, *payload = events.get()
+            if kind == 'stage': yield payload[0], payload[1]
+            elif kind == 'error': raise ValueError(payload[0])
+            else: return
+    finally: cancelled.set()
+
+def export_csv(stages):
+    """ CSV rows (header first), one chunk per stage. """
+    buffer = io.StringIO(); writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS); yield buffer.getvalue()
+    for _, fixtures in stages:
+        buffer.seek(0); buffer.truncate()
+        for fixture in fixtures: writer.writerow([fixture_to_json(fixture).get(field) for field in EXPORT_FIELDS])
+        yield buffer.getvalue()
+
+def export_ndjson(stages):
+    """ One JSON fixture per line; a failed generation ends the stream with an {"error": ...} line. """
+    try:
+        for _, fixtures in stages: yield ''.join(json.dumps(fixture_to_json(fixture)) + '\n' for fixture in fixtures)
+    except ValueError as e: yield json.dumps({'error': str(e)}) + '\n'
+
+def ics_text(value):
+    """ Escapes a TEXT value (RFC 5545 3.3.11). """
+    return str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+def ics_line(line):
+    """ Folds a content line at 75 octets and terminates it with CRLF. """
+    encoded = line.encode('utf-8'); chunks = []
+    while len(encoded) > 75:
+        cut = 75 if not chunks else 74
+        while cut and (encoded[cut] & 0xC0) == 0x80: cut -= 1 # Never split a UTF-8 sequence
+        chunks.append(encoded[:cut].decode('utf-8')); encoded = encoded[cut:]
+    chunks.append(encoded.decode('utf-8'))
+    return '\r\n '.join(chunks) + '\r\n'
+
+def export_ics(stages, tournament_name):
+    """ iCalendar with one all-day VEVENT per fixture. A failed generation leaves the calendar unterminated. """
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ'); calendar_id = hashlib.sha1(tournament_name.encode('utf-8')).hexdigest()[:12]
+    yield ''.join(ics_line(line) for line in ('BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//Fixture Generator//EN', 'CALSCALE:GREGORIAN', f"X-WR-CALNAME:{ics_text(tournament_name)}"))
+    for stage, fixtures in stages:
+        lines = []
+        for fixture in fixtures:
+            label = fixture.get('match_type') or (f"{stage} R{fixture['round']}" if fixture.get('round') else stage)
+            summary = f"{fixture['team1']} vs {fixture['team2']} ({label})"; description = f"Match {fixture['match_number']}, slot {fixture['time_slot']}"
+            uid = hashlib.sha1(f"{stage}|{fixture['match_number']}".encode('utf-8')).hexdigest()[:16]
+            lines += ['BEGIN:VEVENT', f"UID:{calendar_id}-{uid}@fixtures", f"DTSTAMP:{stamp}",
+                      f"DTSTART;VALUE=DATE:{fixture['date']:%Y%m%d}", f"DTEND;VALUE=DATE:{fixture['date'] + timedelta(days=1):%Y%m%d}",
+                      f"SUMMARY:{ics_text(summary)}", f"LOCATION:{ics_text(fixture['venue'])}", f"DESCRIPTION:{ics_text(description)}", 'END:VEVENT']
+        yield ''.join(ics_line(line) for line in lines)
+    yield ics_line('END:VCALENDAR')
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'ics': ('text/calendar; charset=utf-8', 'ics'),
+}
+
+@app.route('/api/fixtures/export.<fmt>', methods=['GET', 'POST'])
+def export_fixtures(fmt):
+    """
+    Streams a generation as CSV, NDJSON or iCalendar, stage by stage as stages are scheduled
+    (see iter_tournament_stages for which stages can be sent before the whole run finishes).
+    Takes the same fields as /api/fixtures (JSON body, form or query string). Errors before the
+    first stage return 400 JSON; later ones end the stream early. The seed (or a search's base
+    seed) is fixed before streaming starts and sent in the X-Fixture-Seed header.
+    """
+    if fmt not in EXPORT_FORMATS: return jsonify(error=f"Unknown export format: {fmt}"), 404
+    data = request.get_json(silent=True) or request.values
+    try: spec, seed, search_seeds = read_generation_request(data, files=request.files)
+    except ValueError as e: return jsonify(error_payload(e)), 400
+    if seed is None: seed = new_seed() # Headers go out before the result exists
+    stages = iter_tournament_stages(spec, seed, search_seeds)
+    try: first_stage = next(stages) # Surface infeasible inputs as a proper error response
+    except StopIteration: first_stage = None
+    except ValueError as e: return jsonify(error=str(e)), 400
+    stages = itertools.chain([first_stage] if first_stage else [], stages)
+    if fmt == 'csv': body = export_csv(stages)
+    elif fmt == 'ndjson': body = export_ndjson(stages)
+    else: body = export_ics(stages, spec['tournament_name'])
+    if fmt != 'ndjson': body = _log_stream_errors(body)
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    filename = ''.join(c if c.isalnum() or c in '-_' else '_' for c in spec['tournament_name']) or 'fixtures'
+    seed_header = 'X-Fixture-Seed' if search_seeds == 1 else 'X-Fixture-Base-Seed'
+    return Response(body, content_type=mimetype, headers={'Content-Disposition': f'attachment; filename="{filename}.{extension}"', 'X-Accel-Buffering': 'no', seed_header: str(seed)})
+
+def _log_stream_errors(chunks):
+    """ Ends a CSV/ICS stream quietly on a late generation failure (headers are already sent). """
+    try: yield from chunks
+    except ValueError as e: app.logger.warning(f"Export stream ended early: {e}")
+
+# --- Metrics ---
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """ Prometheus text exposition of scheduling timings and counters, plus cache and job gauges. """
+    if not metrics.enabled: return "Metrics are disabled.", 404, {'Content-Type': 'text/plain; charset=utf-8'}
+    cache_stats = fixture_cache.stats(); job_counts = job_manager.counts()
+    gauges = [(f"fixtures_cache_{key}", f"Result cache {key}.", value) for key, value in cache_stats.items()]
+    gauges += [(f"fixtures_jobs_{status}", f"Retained background jobs with status '{status}'.", count) for status, count in job_counts.items()]
+    return metrics.render(gauges), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+# --- JSON API ---
+@app.route('/api/fixtures', methods=['POST'])
+def api_generate_fixtures():
+    """
+    Generates one tournament from a JSON body with the index form fields; returns fixtures_by_stage as JSON.
+    "report": true adds the schedule_report of the result.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict): return jsonify(error="Expected a JSON object."), 400
+    try:
+        spec, seed, search_seeds = read_generation_request(data)
+        result = generate_cached(spec, seed, search_seeds)
+    except ValueError as e: return jsonify(error_payload(e)), 400
+    payload = result_to_json(result, spec['tournament_name'])
+    if data.get('report'): payload['report'] = schedule_report(result['fixtures'], spec)
+    return jsonify(payload)
+
+@app.route('/api/rosters/validate', methods=['POST'])
+def api_validate_roster():
+    """
+    Checks a roster without generating: a roster_file upload or a raw CSV/JSON/NDJSON body
+    (format from ?format= or the Content-Type). Returns the parsed roster, or 422 listing every bad row.
+    """
+    upload = request.files.get('roster_file'); fmt = request.args.get('format') or None
+    try:
+        if upload and upload.filename: teams_list, venues_list, team_venue_map, venue_rules = parse_roster_upload(upload, fmt)
+        else:
+            fmt = fmt or roster_format_for(None, request.mimetype)
+            if fmt is None: return jsonify(error="Send a roster_file upload, or a CSV, JSON or NDJSON body."), 400
+            teams_list, venues_list, team_venue_map, venue_rules = parse_roster_binary(request.stream, fmt)
+    except RosterError as e: return jsonify(error_payload(e)), 422
+    except ValueError as e: return jsonify(error_payload(e)), 400
+    venue_rules_json = {venue: {'capacity': rule['capacity'], 'blackouts': [[first.isoformat(), last.isoformat()] for first, last in rule['blackouts']]} for venue, rule in venue_rules.items()}
+    return jsonify(teams=teams_list, venues=venues_list, team_venue_map=team_venue_map, venue_rules=venue_rules_json, team_count=len(teams_list))
+
+@app.route('/api/fixtures/batch', methods=['POST'])
+def api_generate_fixtures_batch():
+    """
+    Generates many tournaments in one call: {"defaults": {...}, "tournaments": [{...}, ...]}.
+    Each entry is merged over 'defaults'. Identical rosters are parsed once and identical
+    venue/date windows share one slot table template. Failures are reported per entry.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('tournaments'), list): return jsonify(error="Expected a JSON object with a 'tournaments' list."), 400
+    defaults = data.get('defaults') or {}
+    if not isinstance(defaults, dict): return jsonify(error="'defaults' must be an object."), 400
+    if len(data['tournaments']) > MAX_BATCH_TOURNAMENTS: return jsonify(error=f"At most {MAX_BATCH_TOURNAMENTS} tournaments per batch."), 400
+    roster_memo = {}; results = []
+    for position, entry in enumerate(data['tournaments']):
+        if not isinstance(entry, dict):
+            results.append({'index': position, 'error': "Each tournament must be an object."}); continue
+        try:
+            spec, seed, search_seeds = read_generation_request(dict(defaults, **entry), roster_memo)
+            results.append(dict(result_to_json(generate_cached(spec, seed, search_seeds), spec['tournament_name']), index=position))
+        except ValueError as e:
+            results.append(dict(error_payload(e), index=position))
+    return jsonify(results=results, succeeded=sum(1 for r in results if 'error' not in r), failed=sum(1 for r in results if 'error' in r))
+
+@app.route('/api/calendars/<name>/season', methods=['POST'])
+def api_schedule_season(name):
+    """
+    Books a whole season into shared calendar 'name' in one pass: {"defaults": {...}, "tournaments": [...]},
+    as for /api/fixtures/batch. Tournaments are scheduled in list order, each around the bookings of
+    all earlier ones (and of anything already in the calendar), so venue slots and daily limits hold
+    across the season. Failures are reported per entry and book nothing.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('tournaments'), list): return jsonify(error="Expected a JSON object with a 'tournaments' list."), 400
+    defaults = data.get('defaults') or {}
+    if not isinstance(defaults, dict): return jsonify(error="'defaults' must be an object."), 400
+    if len(data['tournaments']) > MAX_BATCH_TOURNAMENTS: return jsonify(error=f"At most {MAX_BATCH_TOURNAMENTS} tournaments per batch."), 400
+    roster_memo = {}; results = [None] * len(data['tournaments']); runs = []; run_positions = []
+    for position, entry in enumerate(data['tournaments']):
+        if not isinstance(entry, dict):
+            results[position] = {'index': position, 'error': "Each tournament must be an object."}; continue
+        try: runs.append(read_generation_request(dict(defaults, **entry, calendar=name), roster_memo)); run_positions.append(position)
+        except ValueError as e: results[position] = dict(error_payload(e), index=position)
+    try: calendar = venue_calendars.get(name)
+    except ValueError as e: return jsonify(error=str(e)), 400
+    for position, (spec, _, _), outcome in zip(run_positions, runs, calendar.schedule_season(runs)):
+        if isinstance(outcome, ValueError): results[position] = dict(error_payload(outcome), index=position)
+        else: results[position] = dict(result_to_json(outcome, spec['tournament_name']), index=position)
+    return jsonify(results=results, succeeded=sum(1 for r in results if 'error' not in r), failed=sum(1 for r in results if 'error' in r))
+
+@app.route('/api/calendars/<name>', methods=['GET'])
+def api_calendar_summary(name):
+    """ Tournaments booked into a shared calendar and its bookings per date. """
+    calendar = venue_calendars.get(name, create=False)
+    if calendar is None: return jsonify(error="Unknown calendar."), 404
+    return jsonify(calendar.summary())
+
+@app.route('/api/calendars/<name>/tournaments/<tournament_id>', methods=['DELETE'])
+def api_calendar_release(name, tournament_id):
+    """ Frees the venue slots booked by one tournament. """
+    calendar = venue_calendars.get(name, create=False)
+    if calendar is None or not calendar.release(tournament_id): return jsonify(error="Unknown calendar or tournament."), 404
+    return jsonify(released=tournament_id)
+
+
+def parse_iso_date(value, field):
+    try: return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError): raise ValueError(f"'{field}' must be a YYYY-MM-DD date.")
+
+def fixtures_from_json(items):
+    """ Fixture dicts from API JSON (as returned by /api/fixtures), with dates parsed. """
+    if not isinstance(items, list): raise ValueError("'fixtures' must be a list.")
+    fixtures = []
+    for position, item in enumerate(items):
+        if not isinstance(item, dict) or not all(item.get(key) for key in ('date', 'venue', 'team1', 'team2')):
+            raise ValueError(f"Fixture {position + 1} needs date, venue, team1 and team2.")
+        try: time_slot = int(item.get('time_slot') or 1)
+        except (TypeError, ValueError): raise ValueError(f"Fixture {position + 1} has an invalid time_slot.")
+        fixtures.append(dict(item, date=parse_iso_date(item['date'], 'date'), time_slot=time_slot, stage=item.get('stage') or 'Fixtures'))
+    return fixtures
+
+@app.route('/api/fixtures/reschedule', methods=['POST'])
+def api_reschedule_fixtures():
+    """
+    Re-plans only fixtures hit by blackouts. Body: {"fixtures": [...] or "fixtures_by_stage": {...},
+    "blackouts": [{"venue": name or null, "start_date", "end_date"}], optional "end_date",
+    "min_rest_days", "allow_venue_change", "venues" (extra venues that may be used), "constraints"
+    (a constraint profile; its min_rest_days applies unless given at the top level)}.
+    Returns the moved fixtures as 'changes' plus the full updated fixtures_by_stage.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict): return jsonify(error="Expected a JSON object."), 400
+    try:
+        items = data.get('fixtures')
+        if items is None and isinstance(data.get('fixtures_by_stage'), dict): items = [f for stage_fixtures in data['fixtures_by_stage'].values() for f in stage_fixtures]
+        fixtures = fixtures_from_json(items)
+        blackouts = []
+        for entry in data.get('blackouts') or []:
+            if not isinstance(entry, dict): raise ValueError("Each blackout must be an object.")
+            first = parse_iso_date(entry.get('start_date'), 'start_date'); last = parse_iso_date(entry.get('end_date') or entry.get('start_date'), 'end_date')
+            if last < first: raise ValueError("Blackout end_date cannot be before start_date.")
+            blackouts.append((entry.get('venue') or None, first, last))
+        if not blackouts: raise ValueError("At least one blackout is required.")
+        end_date = parse_iso_date(data['end_date'], 'end_date') if data.get('end_date') else None
+        constraint_fields = data.get('constraints')
+        if constraint_fields is not None and not isinstance(constraint_fields, dict): raise ValueError("'constraints' must be an object.")
+        constraints = ConstraintProfile.from_mapping(constraint_fields)
+        try: min_rest_days = int(data.get('min_rest_days', constraints.min_rest_days))
+        except (TypeError, ValueError): raise ValueError("'min_rest_days' must be a whole number.")
+        updated, changes = reschedule_fixtures(fixtures, blackouts, min_rest_days, end_date, data.get('venues') or (), bool(data.get('allow_venue_change')), constraints)
+    except ValueError as e: return jsonify(error=str(e)), 400
+    for change in changes:
+        for side in ('from', 'to'): change[side]['date'] = change[side]['date'].isoformat()
+    return jsonify(changes=changes, moved=len(changes), fixtures_by_stage=stages_to_json(group_fixtures_by_stage(updated)))
+
+
+@app.route('/api/fixtures/analyze', methods=['POST'])
+def api_analyze_fixtures():
+    """
+    Quality report for an existing fixture list. Body: {"fixtures": [...] or "fixtures_by_stage": {...},
+    optional "start_date"/"end_date" (default: first/last fixture), "teams" (limits team measures)
+    and "constraints" (the profile the daily limits and rest minimum come from)}.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict): return jsonify(error="Expected a JSON object."), 400
+    try:
+        items = data.get('fixtures')
+        if items is None and isinstance(data.get('fixtures_by_stage'), dict): items = [f for stage_fixtures in data['fixtures_by_stage'].values() for f in stage_fixtures]
+        fixtures = fixtures_from_json(items)
+        if not fixtures: raise ValueError("At least one fixture is required.")
+        start_date = parse_iso_date(data['start_date'], 'start_date') if data.get('start_date') else min(f['date'] for f in fixtures)
+        end_date = parse_iso_date(data['end_date'], 'end_date') if data.get('end_date') else max(f['date'] for f in fixtures)
+        if end_date < start_date: raise ValueError("end_date cannot be before start_date.")
+        teams = data.get('teams')
+        if teams is not None and not isinstance(teams, list): raise ValueError("'teams' must be a list of team names.")
+        constraint_fields = data.get('constraints')
+        if constraint_fields is not None and not isinstance(constraint_fields, dict): raise ValueError("'constraints' must be an object.")
+        constraints = ConstraintProfile.from_mapping(constraint_fields)
+    except ValueError as e: return jsonify(error=str(e)), 400
+    return jsonify(ScheduleAnalysis(fixtures, start_date, end_date, constraints).report(teams))
+
+
+# --- Stored Fixtures API ---
+def read_fixture_filters(args):
+    """ Date window and limit from query args: from/to (YYYY-MM-DD) or week (any date in a Monday-Sunday week), limit. """
+    first_date = parse_iso_date(args['from'], 'from') if args.get('from') else None
+    last_date = parse_iso_date(args['to'], 'to') if args.get('to') else None
+    if args.get('week'):
+        week_day = parse_iso_date(args['week'], 'week'); first_date = week_day - timedelta(days=week_day.weekday()); last_date = first_date + timedelta(days=6)
+    try: limit = int(args.get('limit') or 1000)
+    except ValueError: raise ValueError("'limit' must be a whole number.")
+    if not 1 <= limit <= 10000: raise ValueError("'limit' must be between 1 and 10000.")
+    return first_date, last_date, limit
+
+def stored_fixtures_response(**filters):
+    """ JSON list of stored fixtures matching filters plus the window/limit query args. """
+    if fixture_store is None: return jsonify(error="Fixture storage is disabled."), 503
+    try: first_date, last_date, limit = read_fixture_filters(request.args)
+    except ValueError as e: return jsonify(error=str(e)), 400
+    fixtures = fixture_store.fixtures(first_date=first_date, last_date=last_date, limit=limit, tournament_id=request.args.get('tournament_id'), **filters)
+    return jsonify(fixtures=[fixture_to_json(f) for f in fixtures], count=len(fixtures), truncated=len(fixtures) == limit)
+
+@app.route('/api/tournaments', methods=['GET'])
+def api_list_tournaments():
+    """ Most recently generated tournaments. """
+    if fixture_store is None: return jsonify(error="Fixture storage is disabled."), 503
+    try: limit = min(max(int(request.args.get('limit') or 50), 1), 500)
+    except ValueError: return jsonify(error="'limit' must be a whole number."), 400
+    return jsonify(tournaments=fixture_store.tournaments(limit))
+
+@app.route('/api/tournaments/<tournament_id>', methods=['GET'])
+def api_get_tournament(tournament_id):
+    """ A stored tournament with its fixtures grouped by stage (match numbers as generated). """
+    if fixture_store is None: return jsonify(error="Fixture storage is disabled."), 503
+    tournament = fixture_store.tournament(tournament_id)
+    if tournament is None: return jsonify(error="Unknown tournament."), 404
+    fixtures = tournament.pop('fixtures')
+    return jsonify(dict(tournament, fixtures_by_stage=stages_to_json(split_by_stage(fixtures))))
+
+@app.route('/api/tournaments/<tournament_id>/replay', methods=['POST'])
+def api_replay_tournament(tournament_id):
+    """
+    Regenerates a stored tournament from its stored spec and seed (bypassing the result cache) and
+    reports whether the fixtures match the stored ones. Tournaments booked into a shared calendar
+    depend on the other bookings at the time and are not replayed.
+    """
+    if fixture_store is None: return jsonify(error="Fixture storage is disabled."), 503
+    spec = fixture_store.spec(tournament_id); stored = fixture_store.tournament(tournament_id)
+    if spec is None or stored is None: return jsonify(error="Unknown tournament."), 404
+    if spec.get('calendar'): return jsonify(error="Tournaments booked into a shared calendar cannot be replayed."), 409
+    try: result = generate_tournament(spec, stored['seed'])
+    except ValueError as e: return jsonify(error=str(e)), 422
+    def signature(fixtures): return sorted((f['date'], f['time_slot'] or 0, f['venue'], f['team1'], f['team2'], f['stage']) for f in fixtures)
+    payload = result_to_json(result, spec['tournament_name'])
+    payload.update(tournament_id=tournament_id, identical=signature(result['fixtures']) == signature(stored['fixtures']))
+    return jsonify(payload)
+
+@app.route('/api/tournaments/<tournament_id>/report', methods=['GET'])
+def api_tournament_report(tournament_id):
+    """ schedule_report of a stored tournament under the spec it was generated from. """
+    if fixture_store is None: return jsonify(error="Fixture storage is disabled."), 503
+    spec = fixture_store.spec(tournament_id)
+    if spec is None: return jsonify(error="Unknown tournament."), 404
+    return jsonify(dict(schedule_report(fixture_store.fixtures(tournament_id=tournament_id, limit=-1), spec), tournament_id=tournament_id))
+
+@app.route('/api/teams/<team>/fixtures', methods=['GET'])
+def api_team_fixtures(team):
+    """ Stored fixtures of one team across tournaments (?from=&to=, ?week=, ?tournament_id=, ?limit=). """
+    return stored_fixtures_response(team=team)
+
+@app.route('/api/venues/<venue>/fixtures', methods=['GET'])
+def api_venue_fixtures(venue):
+    """ Stored fixtures at one venue (?week=YYYY-MM-DD for that Monday-Sunday week). """
+    return stored_fixtures_response(venue=venue)
+
+@app.route('/api/dates/<day>/fixtures', methods=['GET'])
+def api_date_fixtures(day):
+    """ Stored fixtures on one date. """
+    try: fixture_date = parse_iso_date(day, 'date')
+    except ValueError as e: return jsonify(error=str(e)), 400
+    if fixture_store is None: return jsonify(error="Fixture storage is disabled."), 503
+    try: _, _, limit = read_fixture_filters(request.args)
+    except ValueError as e: return jsonify(error=str(e)), 400
+    fixtures = fixture_store.fixtures(first_date=fixture_date, last_date=fixture_date, limit=limit, tournament_id=request.args.get('tournament_id'))
+    return jsonify(fixtures=[fixture_to_json(f) for f in fixtures], count=len(fixtures), truncated=len(fixtures) == limit)
 
 
 # --- Flask Main Route ---
@@ -451,69 +2682,25 @@ def index():
         app.logger.info("Received POST request.")
         try:
             # Get & Validate Form Data
-            team_venue_raw = request.form.get('teams_venues'); start_date_str = request.form.get('start_date')
-            end_date_str = request.form.get('end_date'); tournament_type = request.form.get('tournament_type')
-            include_playoffs_str = request.form.get('include_playoffs'); tournament_name = request.form.get('tournament_name') or "Unnamed Tournament"
-            if not all([team_venue_raw, start_date_str, end_date_str, tournament_type]): raise ValueError("Missing required fields.")
-            teams_list, venues_list, team_venue_map = parse_team_venue_pairs(team_venue_raw)
-            teams_list_for_template = teams_list
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date(); end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-            include_playoffs = include_playoffs_str.lower() == 'yes' if include_playoffs_str else False
-            if start_date > end_date: raise ValueError("End Date cannot be before Start Date.")
-
-            # Validate Top 4 Teams if needed
-            actual_top_4_teams = []
-            if include_playoffs and tournament_type in ['round_robin', 'double_round_robin']:
-                if len(teams_list) < 4: raise ValueError("Need >= 4 teams for Top 4 Playoffs.")
-                top1 = request.form.get('top1_team'); top2 = request.form.get('top2_team'); top3 = request.form.get('top3_team'); top4 = request.form.get('top4_team')
-                actual_top_4_teams = [top1, top2, top3, top4]
-                if not all(actual_top_4_teams): raise ValueError("Must select all Top 4 teams if playoffs enabled.")
-                if len(set(actual_top_4_teams)) != 4: raise ValueError("Top 4 selections must be unique.")
-                for team in actual_top_4_teams:
-                    if team not in teams_list: raise ValueError(f"Top 4 team '{team}' not in main list.")
+            spec, seed, search_seeds = read_generation_request(request.form, files=request.files)
+            teams_list_for_template = spec['teams']
 
             # --- Generate Fixtures ---
-            app.logger.info(f"Starting generation: Type='{tournament_type}', Playoffs={include_playoffs}")
-            fixture_dicts = []; last_main_stage_date = None;
-
-            # Call appropriate generation function
-            if tournament_type == 'round_robin':
-                fixture_dicts, last_main_stage_date = generate_round_robin_fixtures(teams_list, venues_list, team_venue_map, start_date, end_date, MIN_REST_DAYS)
-                if include_playoffs:
-                     playoff_fixtures, _ = generate_playoffs_top4(actual_top_4_teams, last_main_stage_date, venues_list, team_venue_map, MIN_REST_DAYS)
-                     fixture_dicts.extend(playoff_fixtures)
-            elif tournament_type == 'double_round_robin':
-                fixture_dicts, last_main_stage_date = generate_double_round_robin_fixtures(teams_list, venues_list, team_venue_map, start_date, end_date, MIN_REST_DAYS)
-                if include_playoffs:
-                     playoff_fixtures, _ = generate_playoffs_top4(actual_top_4_teams, last_main_stage_date, venues_list, team_venue_map, MIN_REST_DAYS)
-                     fixture_dicts.extend(playoff_fixtures)
-            elif tournament_type == 'single_elimination':
-                 fixture_dicts, last_main_stage_date = generate_single_elimination_fixtures(teams_list, venues_list, team_venue_map, start_date, end_date, MIN_REST_DAYS)
-            elif tournament_type == 'double_elimination':
-                 fixture_dicts, last_main_stage_date = generate_double_elimination_fixtures(teams_list, venues_list, team_venue_map, start_date, end_date, MIN_REST_DAYS)
-            elif tournament_type == 'group_knockout':
-                 fixture_dicts, last_main_stage_date = generate_group_stage_knockout_fixtures(teams_list, venues_list, team_venue_map, start_date, end_date, MIN_REST_DAYS)
-            else: raise ValueError(f"Invalid tournament type: {tournament_type}")
+            result = generate_cached(spec, seed, search_seeds)
+            for category, message in result['notices']: flash(message, category)
+            fixture_dicts = result['fixtures']
+            flash(f"Seed {result['seed']}: enter it with 1 attempt and the same inputs to get this schedule again.", "info")
 
             # --- Post-Generation Processing ---
             if not fixture_dicts:
                  flash("No fixtures could be generated. Check constraints or date range.", "warning")
             else:
-                 flash(f"Fixtures generated successfully for '{tournament_name}'!", "success")
+                 flash(f"Fixtures generated successfully for '{spec['tournament_name']}'!", "success")
                  app.logger.info(f"Generated {len(fixture_dicts)} fixtures.")
-                 actual_end_date = max((f['date'] for f in fixture_dicts), default=end_date)
-                 check_schedule_gaps(fixture_dicts, start_date, actual_end_date) # Check gaps
-
-                 # Group fixtures by stage & Renumber Overall
-                 fixture_dicts.sort(key=lambda x: (x['date'], x['time_slot']))
-                 for i, f_dict in enumerate(fixture_dicts):
-                      f_dict['match_number'] = i + 1 # Assign overall sequential match number
-                      stage = f_dict.get('stage', 'Fixtures')
-                      if stage not in fixtures_by_stage: fixtures_by_stage[stage] = []
-                      if 'date' in f_dict and not isinstance(f_dict['date'], date): # Date conversion check
-                         try: f_dict['date'] = datetime.strptime(f_dict['date'], '%Y-%m-%d').date()
-                         except: f_dict['date'] = None; app.logger.error("Date conversion failed.")
-                      fixtures_by_stage[stage].append(f_dict)
+                 actual_end_date = max((f['date'] for f in fixture_dicts), default=spec['end_date'])
+                 check_schedule_gaps(fixture_dicts, spec['start_date'], actual_end_date, spec['constraints']) # Check gaps
+
+                 fixtures_by_stage = group_fixtures_by_stage(fixture_dicts)
 
         except ValueError as e: # Handle known errors
             error_message = str(e); flash(f"Error: {error_message}", "danger")
@@ -0,0 +1,183 @@
+"""
+Benchmark harness for the scheduling core in app.py.
+
+Sweeps team counts, venue counts, window lengths and every tournament type with
+fixed seeds, and reports wall time, peak memory, slot checks (slots examined by
+SlotIndex.next_free) and success rate per case. Results are written as JSON (or
+CSV) so runs can be compared, e.g.:
+
+    python bench.py --output before.json
+    python bench.py --output after.json --compare before.json
+"""
+import argparse
+import csv
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import app as fixtures_app
+from app import TOURNAMENT_TYPES, DEFAULT_CONSTRAINTS, PLAYOFF_FORMATS, PLAYOFF_TYPES
+
+DEFAULT_TEAMS = [4, 8, 16, 32, 64, 128]
+DEFAULT_VENUES = [1, 4, 16]
+DEFAULT_DAYS = [90, 365, 1095]
+DEFAULT_SEEDS = [0, 1, 2]
+START_DATE = date(2025, 1, 6) # A Monday, so weekday/weekend mix is identical across runs
+
+
+def make_spec(tournament_type, num_teams, num_venues, num_days, playoffs=False, engine='greedy'):
+    """ Spec in the build_generation_spec shape for a synthetic league. """
+    teams = [f"Team {i + 1}" for i in range(num_teams)]
+    venues = [f"Ground {j + 1}" for j in range(min(num_venues, num_teams))]
+    return {
+        'tournament_name': 'Benchmark', 'tournament_type': tournament_type,
+        'teams': teams, 'venues': venues, 'team_venue_map': {team: venues[i % len(venues)] for i, team in enumerate(teams)},
+        'start_date': START_DATE, 'end_date': START_DATE + timedelta(days=num_days - 1),
+        'include_playoffs': playoffs, 'top_teams': teams[:4] if playoffs else [], 'engine': engine, 'constraints': DEFAULT_CONSTRAINTS,
+    }
+
+
+def measure(run):
+    """ (ok, wall seconds, slot checks, fixtures, error) for one call of run(). """
+    fixtures_app._slot_template.cache_clear() # Count slot table setup in every run
+    with fixtures_app.count_slot_probes() as slot_probes:
+        started = time.perf_counter()
+        try:
+            produced = run(); ok = True; error = None
+        except ValueError as e:
+            produced = None; ok = False; error = str(e)
+        elapsed = time.perf_counter() - started
+    return ok, elapsed, slot_probes(), produced, error
+
+
+def peak_memory_kb(run):
+    """ Peak traced allocation of one call of run(), in KiB (measured separately from timing). """
+    fixtures_app._slot_template.cache_clear()
+    tracemalloc.start()
+    try: run()
+    except ValueError: pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def summarize(case, runs, peak_kb):
+    times = [r[1] for r in runs]; succeeded = [r for r in runs if r[0]]
+    return dict(case,
+        runs=len(runs), successes=len(succeeded), success_rate=round(len(succeeded) / len(runs), 3),
+        wall_ms_median=round(statistics.median(times) * 1000, 3), wall_ms_min=round(min(times) * 1000, 3),
+        slot_checks_median=statistics.median(r[2] for r in runs),
+        fixtures_median=statistics.median(r[3] for r in succeeded) if succeeded else 0,
+        peak_kb=peak_kb, first_error=next((r[4] for r in runs if not r[0]), None))
+
+
+def bench_generators(args):
+    for tournament_type in args.types:
+        for playoffs in ([False, True] if tournament_type in PLAYOFF_TYPES and args.playoffs else [False]):
+            for num_teams in args.teams:
+                if playoffs and num_teams < 4: continue
+                for num_venues in args.venues:
+                    if num_venues > num_teams: continue
+                    for num_days in args.days:
+                        spec = make_spec(tournament_type, num_teams, num_venues, num_days, playoffs, args.engine)
+                        case = {'kind': 'generate', 'tournament_type': tournament_type, 'playoffs': playoffs, 'teams': num_teams, 'venues': len(spec['venues']), 'days': num_days, 'engine': args.engine}
+                        runs = []
+                        for seed in args.seeds:
+                            for _ in range(args.repeat):
+                                ok, elapsed, probes, result, error = measure(lambda: fixtures_app.generate_tournament(spec, seed))
+                                runs.append((ok, elapsed, probes, len(result['fixtures']) if ok else 0, error))
+                        yield summarize(case, runs, peak_memory_kb(lambda: fixtures_app.generate_tournament(spec, args.seeds[0])))
+
+
+def bench_slots(args):
+    for num_venues in args.venues:
+        for num_days in args.days:
+            end_date = START_DATE + timedelta(days=num_days - 1); venues = [f"Ground {j + 1}" for j in range(num_venues)]
+            run = lambda: fixtures_app.get_available_slots(venues, START_DATE, end_date)
+            runs = []
+            for _ in range(len(args.seeds) * args.repeat):
+                ok, elapsed, probes, result, error = measure(run)
+                runs.append((ok, elapsed, probes, len(result) if ok else 0, error))
+            yield summarize({'kind': 'slots', 'venues': num_venues, 'days': num_days}, runs, peak_memory_kb(run))
+
+
+def bench_playoffs(args):
+    for playoff_format, playoff_spec in PLAYOFF_FORMATS.items():
+        ranked = [f"Team {i + 1}" for i in range(playoff_spec['teams'])]
+        for num_venues in args.venues:
+            venues = [f"Ground {j + 1}" for j in range(num_venues)]
+            run = lambda: fixtures_app.generate_playoffs(playoff_format, ranked, START_DATE, venues, {}, DEFAULT_CONSTRAINTS.min_rest_days)
+            runs = []
+            for _ in range(len(args.seeds) * args.repeat):
+                ok, elapsed, probes, result, error = measure(run)
+                runs.append((ok, elapsed, probes, len(result[0]) if ok else 0, error))
+            yield summarize({'kind': 'playoffs', 'tournament_type': playoff_format, 'venues': num_venues}, runs, peak_memory_kb(run))
+
+
+def case_key(row):
+    return tuple(row.get(k) for k in ('kind', 'tournament_type', 'playoffs', 'teams', 'venues', 'days', 'engine'))
+
+
+def compare(rows, baseline_path):
+    """ Prints median wall-time ratios against a previous JSON output. """
+    with open(baseline_path) as fh: baseline = {case_key(row): row for row in json.load(fh)['results']}
+    print(f"{'case':70} {'before ms':>10} {'after ms':>10} {'ratio':>7}", file=sys.stderr)
+    for row in rows:
+        old = baseline.get(case_key(row))
+        if not old or not old['wall_ms_median']: continue
+        ratio = row['wall_ms_median'] / old['wall_ms_median']
+        label = ' '.join(f"{k}={v}" for k, v in zip(('kind', 'type', 'po', 'teams', 'venues', 'days', 'engine'), case_key(row)) if v is not None)
+        print(f"{label:70} {old['wall_ms_median']:>10.2f} {row['wall_ms_median']:>10.2f} {ratio:>7.2f}", file=sys.stderr)
+
+
+def int_list(text): return [int(part) for part in text.split(',') if part]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--types', type=lambda t: t.split(','), default=list(TOURNAMENT_TYPES), help="Comma-separated tournament types")
+    parser.add_argument('--teams', type=int_list, default=DEFAULT_TEAMS)
+    parser.add_argument('--venues', type=int_list, default=DEFAULT_VENUES)
+    parser.add_argument('--days', type=int_list, default=DEFAULT_DAYS, help="Window lengths in days")
+    parser.add_argument('--seeds', type=int_list, default=DEFAULT_SEEDS)
+    parser.add_argument('--repeat', type=int, default=1, help="Timed runs per seed")
+    parser.add_argument('--engine', choices=fixtures_app.SCHEDULING_ENGINES, default='greedy')
+    parser.add_argument('--no-playoffs', dest='playoffs', action='store_false', help="Skip the league + playoffs variants")
+    parser.add_argument('--only', choices=('generate', 'slots', 'playoffs'), action='append', help="Restrict to these benchmark kinds")
+    parser.add_argument('--format', choices=('json', 'csv'), default='json')
+    parser.add_argument('--output', help="Write results here instead of stdout")
+    parser.add_argument('--compare', help="Previous JSON output to compare median wall times against")
+    args = parser.parse_args(argv)
+    unknown = set(args.types) - set(TOURNAMENT_TYPES)
+    if unknown: parser.error(f"Unknown tournament types: {', '.join(sorted(unknown))}")
+
+    fixtures_app.app.logger.setLevel(logging.ERROR)
+    kinds = args.only or ['slots', 'playoffs', 'generate']
+    suites = {'slots': bench_slots, 'playoffs': bench_playoffs, 'generate': bench_generators}
+    rows = []
+    for kind in kinds:
+        for row in suites[kind](args):
+            rows.append(row)
+            print(f"{row['kind']:9} {row.get('tournament_type', '') + ('+playoffs' if row.get('playoffs') else ''):28} teams={row.get('teams', '-'):>4} venues={row['venues']:>3} days={row.get('days', '-'):>5} "
+                  f"ok={row['success_rate']:.2f} {row['wall_ms_median']:>10.2f} ms checks={row['slot_checks_median']}", file=sys.stderr)
+
+    meta = {'python': platform.python_version(), 'platform': platform.platform(), 'started': time.strftime('%Y-%m-%dT%H:%M:%S'), 'seeds': args.seeds, 'repeat': args.repeat}
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'json':
+            json.dump({'meta': meta, 'results': rows}, out, indent=2); out.write('\n')
+        else:
+            fields = sorted({key for row in rows for key in row})
+            writer = csv.DictWriter(out, fieldnames=fields); writer.writeheader(); writer.writerows(rows)
+    finally:
+        if args.output: out.close()
+    if args.compare: compare(rows, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+os.environ.setdefault('FIXTURE_DB_PATH', '') # Tests build their own stores; keep instance/ untouched
+os.environ.setdefault('METRICS_ENABLED', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
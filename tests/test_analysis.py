@@ -0,0 +1,25 @@
+from datetime import date, timedelta
+
+from app import ConstraintProfile, ScheduleAnalysis
+
+START = date(2025, 1, 6) # A Monday
+
+
+def fixture(day, team1="A", team2="B"):
+    return {'date': START + timedelta(days=day), 'team1': team1, 'team2': team2, 'venue': "Ground 1"}
+
+
+def test_day_gaps_match_a_day_by_day_count():
+    profile = ConstraintProfile(weekday_limits=(2, 2, 0, 2, 2, 3, 3), blackouts=[(START + timedelta(days=9), START + timedelta(days=10))])
+    fixtures = [fixture(0), fixture(0), fixture(1), fixture(5), fixture(7), fixture(7), fixture(7), fixture(12)] + [fixture(13)] * 300
+    analysis = ScheduleAnalysis(fixtures, START, START + timedelta(days=20), profile)
+    limits = profile.day_limits(START, START + timedelta(days=20)); counts = [sum(f['date'] == START + timedelta(days=d) for f in fixtures) for d in range(21)]
+    missed = [d for d in range(21) if limits[d] and not counts[d]]
+    assert analysis.day_gaps() == (len(missed), sum(1 for d in range(21) if 0 < counts[d] < limits[d]), 21)
+    assert analysis.missed_dates(3) == [START + timedelta(days=d) for d in missed[:3]]
+    assert analysis.report()['days']['with_matches'] == sum(1 for count in counts if count)
+
+
+def test_empty_schedule_counts_whole_window_as_one_gap():
+    analysis = ScheduleAnalysis([], START, START)
+    assert analysis.day_gaps() == (1, 0, 1) and analysis.missed_dates() == [START]
@@ -0,0 +1,50 @@
+import pytest
+
+import app as fixtures_app
+
+ROSTER = "Lions, North\nTigers, South\nBears, North\nWolves, South"
+REQUEST = {'tournament_name': "Spring Cup", 'tournament_type': 'round_robin', 'teams_venues': ROSTER, 'start_date': '2025-01-06', 'end_date': '2025-03-31', 'seed': 11}
+
+
+@pytest.fixture
+def client():
+    return fixtures_app.app.test_client()
+
+
+def test_generates_fixtures_as_json(client):
+    response = client.post('/api/fixtures', json=REQUEST)
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload['tournament_name'] == "Spring Cup" and payload['seed'] == 11 and payload['fixture_count'] == 6
+    league = payload['fixtures_by_stage']['League']
+    assert [f['match_number'] for f in league] == [1, 2, 3, 4, 5, 6]
+    assert all(len(f['date']) == 10 and f['venue'] in ("North", "South") for f in league)
+    assert client.post('/api/fixtures', json=REQUEST).get_json()['fixtures_by_stage'] == payload['fixtures_by_stage']
+
+
+def test_rejects_bad_requests(client):
+    assert client.post('/api/fixtures', data="[1, 2]", content_type='application/json').status_code == 400
+    response = client.post('/api/fixtures', json=dict(REQUEST, tournament_type='ladder'))
+    assert response.status_code == 400 and "Invalid tournament type" in response.get_json()['error']
+    assert client.post('/api/fixtures', json=dict(REQUEST, seed='eleven')).status_code == 400
+
+
+def test_batch_reports_each_tournament_separately(client):
+    response = client.post('/api/fixtures/batch', json={'defaults': {'teams_venues': ROSTER, 'start_date': '2025-01-06', 'end_date': '2025-03-31', 'seed': 3},
+                                                        'tournaments': [{'tournament_name': "League", 'tournament_type': 'round_robin'},
+                                                                        {'tournament_name': "Cup", 'tournament_type': 'single_elimination', 'end_date': '2024-12-31'},
+                                                                        "not a tournament",
+                                                                        {'tournament_name': "Knockout", 'tournament_type': 'single_elimination'}]})
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert (payload['succeeded'], payload['failed']) == (2, 2)
+    assert [r['index'] for r in payload['results']] == [0, 1, 2, 3]
+    assert payload['results'][0]['fixture_count'] == 6 and payload['results'][3]['fixture_count'] == 3
+    assert "End Date cannot be before Start Date" in payload['results'][1]['error'] and payload['results'][2]['error'] == "Each tournament must be an object."
+
+
+def test_batch_needs_a_bounded_tournament_list(client):
+    assert client.post('/api/fixtures/batch', json={'tournaments': {}}).status_code == 400
+    assert client.post('/api/fixtures/batch', json={'defaults': "rounds", 'tournaments': []}).status_code == 400
+    too_many = [{'tournament_type': 'round_robin'}] * (fixtures_app.MAX_BATCH_TOURNAMENTS + 1)
+    assert client.post('/api/fixtures/batch', json={'tournaments': too_many}).status_code == 400
@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+
+import pytest
+
+import app as fixtures_app
+from app import FixtureCache, build_generation_spec, generate_cached, generation_cache_key
+
+
+def result(count, seed=1):
+    return {'fixtures': [{'match_number': i + 1, 'date': date(2025, 1, 6) + timedelta(days=i)} for i in range(count)], 'last_date': None, 'seed': seed, 'notices': []}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(fixtures_app.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = FixtureCache(max_entries=2)
+    cache.put('a', result(1)); cache.put('b', result(1))
+    assert cache.get('a') is not None # 'b' is now the least recently used
+    cache.put('c', result(1))
+    assert cache.get('b') is None and cache.get('a') is not None and cache.get('c') is not None
+    assert cache.stats() == {'entries': 2, 'fixtures': 2, 'hits': 3, 'misses': 1, 'evictions': 1, 'expirations': 0}
+
+
+def test_fixture_budget_bounds_the_cache():
+    cache = FixtureCache(max_entries=10, max_fixtures=5)
+    cache.put('a', result(3)); cache.put('b', result(2)); cache.put('c', result(2))
+    assert cache.get('a') is None and cache.stats()['fixtures'] == 4
+    cache.put('huge', result(6)) # Larger than the whole budget: never stored, nothing evicted for it
+    assert cache.get('huge') is None and cache.stats()['entries'] == 2
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = FixtureCache(ttl_seconds=60)
+    cache.put('a', result(2))
+    clock[0] += 59
+    assert cache.get('a') is not None
+    clock[0] += 1
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1 and cache.stats()['fixtures'] == 0
+
+
+def test_hits_are_private_copies():
+    cache = FixtureCache()
+    cache.put('a', result(2))
+    first = cache.get('a'); first['fixtures'][0]['venue'] = "Changed"; first['fixtures'].pop()
+    second = cache.get('a')
+    assert len(second['fixtures']) == 2 and 'venue' not in second['fixtures'][0]
+
+
+def test_generate_cached_reuses_results_for_the_same_request(monkeypatch):
+    monkeypatch.setattr(fixtures_app, 'fixture_cache', FixtureCache())
+    spec = build_generation_spec({'teams_venues': "Lions, North\nTigers, South\nBears, North\nWolves, South",
+                                  'start_date': '2025-01-06', 'end_date': '2025-03-31', 'tournament_type': 'round_robin'})
+    with fixtures_app.app.app_context():
+        first = generate_cached(spec, seed=7); second = generate_cached(spec, seed=7)
+        generate_cached(spec, seed=8)
+    assert second['fixtures'] == first['fixtures'] and second['seed'] == 7
+    assert fixtures_app.fixture_cache.stats()['hits'] == 1 and fixtures_app.fixture_cache.stats()['entries'] == 2
+    assert generation_cache_key(spec, 7) != generation_cache_key(spec, 7, search_seeds=4) != generation_cache_key(dict(spec, tournament_type='double_round_robin'), 7)
@@ -0,0 +1,92 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import app as fixtures_app
+from app import CalendarRegistry, FixtureStore, VenueCalendar, build_generation_spec
+
+FORM = {'start_date': '2025-01-06', 'end_date': '2025-06-30', 'teams_venues': "\n".join(f"Team {i}, Ground {i % 2}" for i in range(6))}
+
+
+def spec(name, tournament_type='round_robin'):
+    return build_generation_spec(dict(FORM, tournament_name=name, tournament_type=tournament_type))
+
+
+def daily_limit(day): return fixtures_app.WEEKEND_MATCHES_LIMIT if day.weekday() >= 5 else fixtures_app.WEEKDAY_MATCHES_LIMIT
+
+
+def test_season_holds_daily_limits_and_venue_slots_across_tournaments():
+    calendar = VenueCalendar("association")
+    with fixtures_app.app.app_context():
+        results = calendar.schedule_season([(spec("Men"), 1, 1), (spec("Women", 'double_round_robin'), 2, 1), (spec("Juniors", 'single_elimination'), 3, 1)])
+    assert not [r for r in results if isinstance(r, ValueError)]
+    fixtures = [f for result in results for f in result['fixtures']]
+    assert len(fixtures) == 15 + 30 + 5
+    assert all(count <= daily_limit(day) for day, count in Counter(f['date'] for f in fixtures).items())
+    assert len({(f['date'], f['venue'], f['time_slot']) for f in fixtures}) == len(fixtures)
+    summary = calendar.summary()
+    assert [t['fixtures'] for t in summary['tournaments']] == [15, 30, 5] and sum(summary['bookings_by_date'].values()) == 50
+
+
+def test_released_tournament_frees_its_days():
+    calendar = VenueCalendar("association")
+    with fixtures_app.app.app_context():
+        first = calendar.schedule(spec("Men"), seed=1)
+        assert calendar.release(first['calendar']['tournament_id']) and not calendar.release(first['calendar']['tournament_id'])
+        again = calendar.schedule(spec("Men"), seed=1)
+    assert sorted((f['date'], f['venue']) for f in again['fixtures']) == sorted((f['date'], f['venue']) for f in first['fixtures'])
+
+
+def test_season_endpoint_reports_failures_per_entry():
+    client = fixtures_app.app.test_client()
+    response = client.post('/api/calendars/test-season/season', json={'defaults': FORM, 'tournaments': [
+        {'tournament_name': "Men", 'tournament_type': 'round_robin', 'seed': 1},
+        {'tournament_name': "Broken", 'tournament_type': 'round_robin', 'end_date': '2025-01-07'},
+        {'tournament_name': "Women", 'tournament_type': 'round_robin', 'seed': 2}]})
+    payload = response.get_json()
+    assert response.status_code == 200 and (payload['succeeded'], payload['failed']) == (2, 1) and 'error' in payload['results'][1]
+    summary = client.get('/api/calendars/test-season').get_json()
+    assert [t['name'] for t in summary['tournaments']] == ["Men", "Women"]
+    men_id = summary['tournaments'][0]['tournament_id']
+    assert client.delete(f'/api/calendars/test-season/tournaments/{men_id}').status_code == 200
+    assert client.delete(f'/api/calendars/test-season/tournaments/{men_id}').status_code == 404
+    assert client.get('/api/calendars/unknown-calendar').status_code == 404
+
+
+def clashes(fixtures):
+    return len(fixtures) - len({(f['date'], f['venue'], f['time_slot']) for f in fixtures})
+
+
+def test_stored_bookings_survive_a_restart(tmp_path):
+    store = FixtureStore(str(tmp_path / 'fixtures.db'))
+    with fixtures_app.app.app_context():
+        men = VenueCalendar("association", store).schedule(spec("Men"), seed=1)
+        restarted = CalendarRegistry(store=store).get("association", create=False)
+        women = restarted.schedule(spec("Women"), seed=1)
+    assert clashes(men['fixtures'] + women['fixtures']) == 0
+    assert [t['name'] for t in restarted.summary()['tournaments']] == ["Men", "Women"]
+    assert store.tournament(men['calendar']['tournament_id'])['calendar'] == "association"
+    assert restarted.release(men['calendar']['tournament_id']) and store.tournament(men['calendar']['tournament_id']) is None
+    assert [t['name'] for t in VenueCalendar("association", store).summary()['tournaments']] == ["Women"]
+    assert CalendarRegistry(store=store).get("elsewhere", create=False) is None
+
+
+def test_workers_sharing_a_store_never_double_book(tmp_path):
+    store = FixtureStore(str(tmp_path / 'fixtures.db'))
+    def book(name):
+        with fixtures_app.app.app_context(): return VenueCalendar("association", store).schedule(spec(name), seed=1)
+    with ThreadPoolExecutor(4) as pool: results = list(pool.map(book, ["Men", "Women", "Juniors", "Veterans"]))
+    fixtures = [f for result in results for f in result['fixtures']]
+    assert clashes(fixtures) == 0 and all(count <= daily_limit(day) for day, count in Counter(f['date'] for f in fixtures).items())
+    version, tournaments = store.calendar_bookings("association")
+    assert version == 4 and sorted(entry['name'] for entry in tournaments.values()) == ["Juniors", "Men", "Veterans", "Women"]
+
+
+def test_stale_booking_is_not_stored(tmp_path):
+    store = FixtureStore(str(tmp_path / 'fixtures.db'))
+    version, _ = store.calendar_bookings("association")
+    with fixtures_app.app.app_context():
+        VenueCalendar("association", store).schedule(spec("Men"), seed=1)
+        late = fixtures_app.generate_tournament(spec("Women"), seed=1)
+    assert store.book("association", version, "late", spec("Women"), late) is None and store.tournament("late") is None
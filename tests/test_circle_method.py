@@ -0,0 +1,56 @@
+import random
+from collections import Counter
+from datetime import date, timedelta
+
+import pytest
+
+import app as fixtures_app
+from app import circle_method_rounds
+
+START = date(2025, 1, 6)
+
+
+@pytest.mark.parametrize('num_teams', [2, 3, 4, 7, 8, 13, 16])
+def test_every_pair_meets_once_and_nobody_plays_twice_in_a_round(num_teams):
+    teams = [f"Team {i + 1}" for i in range(num_teams)]
+    rounds = circle_method_rounds(teams)
+    assert len(rounds) == num_teams - 1 + num_teams % 2
+    for round_pairs in rounds:
+        playing = [team for pair in round_pairs for team in pair]
+        assert len(playing) == len(set(playing)) == num_teams - num_teams % 2
+    pairs = [frozenset(pair) for round_pairs in rounds for pair in round_pairs]
+    assert len(pairs) == len(set(pairs)) == num_teams * (num_teams - 1) // 2
+
+
+@pytest.mark.parametrize('num_teams', [3, 5, 7, 9])
+def test_odd_leagues_give_each_team_one_bye(num_teams):
+    teams = [f"Team {i + 1}" for i in range(num_teams)]
+    byes = Counter(team for round_pairs in circle_method_rounds(teams) for team in set(teams) - {t for pair in round_pairs for t in pair})
+    assert byes == Counter(teams)
+
+
+@pytest.mark.parametrize('num_teams', [4, 5, 6, 9, 10, 16, 17])
+def test_home_counts_differ_by_at_most_one(num_teams):
+    teams = [f"Team {i + 1}" for i in range(num_teams)]
+    home = Counter(home for round_pairs in circle_method_rounds(teams) for home, _ in round_pairs)
+    counts = [home.get(team, 0) for team in teams]
+    assert max(counts) - min(counts) <= 1
+
+
+def test_league_rounds_are_played_in_order():
+    teams = [f"Team {i + 1}" for i in range(8)]; venues = ["North", "South"]
+    with fixtures_app.app.app_context():
+        fixtures, last_date = fixtures_app.generate_round_robin_fixtures(teams, venues, {team: venues[i % 2] for i, team in enumerate(teams)}, START, START + timedelta(days=120), 2, rng=random.Random(3))
+    assert len(fixtures) == 28 and last_date == max(f['date'] for f in fixtures)
+    for team in teams:
+        played = sorted((f['date'], f['round']) for f in fixtures if team in (f['team1'], f['team2']))
+        assert [round_num for _, round_num in played] == list(range(1, 8))
+
+
+def test_second_leg_reverses_every_first_leg_fixture():
+    teams = [f"Team {i + 1}" for i in range(6)]; venues = [f"Ground {i + 1}" for i in range(6)]
+    with fixtures_app.app.app_context():
+        fixtures, _ = fixtures_app.generate_double_round_robin_fixtures(teams, venues, dict(zip(teams, venues)), START, START + timedelta(days=200), 2, rng=random.Random(5))
+    legs = {stage: {(f['team1'], f['team2']) for f in fixtures if f['stage'] == stage} for stage in ("League (Leg 1)", "League (Leg 2)")}
+    assert len(legs["League (Leg 1)"]) == 15 and legs["League (Leg 2)"] == {(away, home) for home, away in legs["League (Leg 1)"]}
+    assert all(f['venue'] == dict(zip(teams, venues))[f['team1']] for f in fixtures)
@@ -0,0 +1,59 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+import app as fixtures_app
+from app import ConstraintProfile, get_available_slots
+
+MONDAY = date(2025, 1, 6)
+
+
+def test_day_limits_apply_holidays_and_global_blackouts():
+    profile = ConstraintProfile.from_mapping({'weekday_limit': 2, 'weekend_limit': 4, 'holidays': ['2025-01-08'], 'holiday_limit': 1,
+                                              'blackouts': ['2025-01-10..2025-01-11']})
+    assert list(profile.day_limits(MONDAY, MONDAY + timedelta(days=7))) == [2, 2, 1, 2, 0, 0, 4, 2]
+    assert profile.day_limits(MONDAY, MONDAY + timedelta(days=7)) is profile.day_limits(MONDAY, MONDAY + timedelta(days=7))
+
+
+def test_holiday_limits_default_to_the_weekend_limit():
+    profile = ConstraintProfile.from_mapping({'weekend_limit': 3, 'holidays': {'2025-01-07': '', '2025-01-09': 0}})
+    assert list(profile.day_limits(MONDAY, MONDAY + timedelta(days=3))) == [1, 3, 1, 0]
+
+
+def test_venue_blackouts_and_capacity_shape_the_slot_table():
+    profile = ConstraintProfile.from_mapping({'weekday_limits': [3] * 7, 'venue_capacity': {'North': 1}, 'venue_blackouts': {'South': ['2025-01-07']}})
+    slots = get_available_slots(["North", "South"], MONDAY, MONDAY + timedelta(days=2), profile)
+    booked = []
+    while (slot := slots.next_free()) is not None: slots.assign(slot); booked.append((slots.date_of(slot), slots.venue_of(slot)))
+    assert booked == [(MONDAY, "North"), (MONDAY, "South"), (MONDAY, "South"), (MONDAY + timedelta(days=1), "North"),
+                      (MONDAY + timedelta(days=2), "North"), (MONDAY + timedelta(days=2), "South"), (MONDAY + timedelta(days=2), "South")]
+
+
+def test_generated_fixtures_avoid_blacked_out_days_and_venues():
+    teams = [f"Team {i}" for i in range(6)]; venues = ["North", "South"]
+    profile = ConstraintProfile.from_mapping({'min_rest_days': 1, 'blackouts': ['2025-01-11..2025-01-12'], 'holidays': {'2025-01-15': 0}, 'venue_blackouts': {'North': ['2025-01-06..2025-01-31']}})
+    with fixtures_app.app.app_context():
+        fixtures, _ = fixtures_app.generate_round_robin_fixtures(teams, venues, {team: venues[i % 2] for i, team in enumerate(teams)}, MONDAY, MONDAY + timedelta(days=90), profile.min_rest_days, rng=random.Random(2), constraints=profile)
+    assert len(fixtures) == 15
+    assert not [f for f in fixtures if f['date'] in (date(2025, 1, 11), date(2025, 1, 12), date(2025, 1, 15))]
+    assert not [f for f in fixtures if f['venue'] == "North" and f['date'] <= date(2025, 1, 31)]
+
+
+def test_roster_venue_rules_merge_and_explicit_capacity_wins():
+    profile = ConstraintProfile.from_mapping({'venue_capacity': {'North': 2}}, {'North': {'capacity': 1, 'blackouts': [(date(2025, 2, 1), date(2025, 2, 2))]}, 'South': {'capacity': 3, 'blackouts': []}})
+    assert profile.venue_day_capacity('North') == 2 and profile.venue_day_capacity('South') == 3 and profile.venue_day_capacity('East') == 2
+    assert profile.venue_blackouts == {'North': [(date(2025, 2, 1), date(2025, 2, 2))]}
+    assert ConstraintProfile.from_mapping(profile.to_json()).to_json() == profile.to_json()
+
+
+@pytest.mark.parametrize('fields, message', [
+    ({'min_rest_days': 'two'}, "'min_rest_days' must be a whole number"),
+    ({'weekday_limits': [1, 2]}, "'weekday_limits' must list 7 limits"),
+    ({'weekday_limits': {'funday': 1}}, "keys must be day names"),
+    ({'holidays': ['2025-02-30']}, "'holidays' entries must be YYYY-MM-DD"),
+    ({'venue_capacity': {'North': 0}}, "'venue_capacity' for 'North'"),
+    ({'venue_blackouts': ['2025-01-01']}, "'venue_blackouts' must map venue names"),
+])
+def test_invalid_fields_are_rejected(fields, message):
+    with pytest.raises(ValueError, match=message): ConstraintProfile.from_mapping(fields)
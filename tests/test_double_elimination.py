@@ -0,0 +1,45 @@
+import random
+import re
+from datetime import date, timedelta
+
+import pytest
+
+import app as fixtures_app
+from app import DEFAULT_CONSTRAINTS
+
+
+def generate(num_teams, seed=1):
+    teams = [f"Team {i + 1}" for i in range(num_teams)]
+    with fixtures_app.app.app_context():
+        fixtures, _ = fixtures_app.generate_double_elimination_fixtures(teams, ["Ground 1", "Ground 2"], {}, date(2025, 1, 1), date(2025, 1, 1) + timedelta(days=365), DEFAULT_CONSTRAINTS.min_rest_days, rng=random.Random(seed), constraints=DEFAULT_CONSTRAINTS)
+    return fixtures
+
+
+def possible_teams(fixtures):
+    """ Every side's set of real teams that could fill it, resolved through Winner/Loser placeholders. """
+    by_label = {}
+    for f in fixtures:
+        label = {'Winners Bracket': 'W', 'Losers Bracket': 'L'}.get(f['stage'])
+        if label: by_label[f"{label}{f['round']}M{f['match_number']}"] = f
+    def resolve(side):
+        match = re.fullmatch(r"(?:Winner|Loser) (\w+)", side)
+        if not match: return {side}
+        feeder = by_label[match.group(1)]
+        return resolve(feeder['team1']) | resolve(feeder['team2'])
+    return resolve
+
+
+@pytest.mark.parametrize('num_teams', [8, 16, 32])
+def test_first_drops_cannot_meet_their_first_round_opponents(num_teams):
+    # Losers from winners round 2 join losers round 2 from the other half, as in standard brackets
+    fixtures = generate(num_teams); resolve = possible_teams(fixtures)
+    for f in fixtures:
+        if f['stage'] == 'Losers Bracket' and f['round'] == 2:
+            assert not resolve(f['team1']) & resolve(f['team2']), f
+
+
+@pytest.mark.parametrize('num_teams', [5, 8, 13, 16])
+def test_bracket_sizes(num_teams):
+    fixtures = generate(num_teams)
+    # Every team but the champion loses twice: 2n - 2 matches, plus the grand final reset
+    assert len(fixtures) == 2 * num_teams - 1
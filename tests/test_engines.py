@@ -0,0 +1,123 @@
+import random
+import time
+from datetime import date, timedelta
+
+import pytest
+
+import app as fixtures_app
+from app import DEFAULT_CONSTRAINTS, SolverTimeout, get_available_slots, schedule_matches, solve_matches
+
+GENERATORS = {
+    'round_robin': fixtures_app.generate_round_robin_fixtures,
+    'double_round_robin': fixtures_app.generate_double_round_robin_fixtures,
+    'single_elimination': fixtures_app.generate_single_elimination_fixtures,
+    'double_elimination': fixtures_app.generate_double_elimination_fixtures,
+    'group_knockout': fixtures_app.generate_group_stage_knockout_fixtures,
+}
+START = date(2025, 1, 6)
+
+
+def run(tournament_type, num_teams, num_venues, days, engine, seed):
+    teams = [f"Team {i + 1}" for i in range(num_teams)]; venues = [f"Ground {j + 1}" for j in range(num_venues)]
+    team_venue_map = {team: venues[i % num_venues] for i, team in enumerate(teams)}
+    with fixtures_app.app.app_context():
+        return GENERATORS[tournament_type](teams, venues, team_venue_map, START, START + timedelta(days=days), DEFAULT_CONSTRAINTS.min_rest_days, engine=engine, rng=random.Random(seed), constraints=DEFAULT_CONSTRAINTS)
+
+
+def succeeds(*args):
+    try: run(*args)
+    except ValueError: return False
+    return True
+
+
+def test_backtrack_solves_league_greedy_solves():
+    # 8 teams in 26 days: greedy fits it, the old whole-season solve ran out of nodes
+    for seed in (1, 2, 3):
+        assert succeeds('round_robin', 8, 4, 26, 'greedy', seed)
+        started = time.monotonic()
+        assert succeeds('round_robin', 8, 4, 26, 'backtrack', seed)
+        assert time.monotonic() - started < 1
+
+
+@pytest.mark.parametrize('tournament_type', sorted(GENERATORS))
+def test_backtrack_succeeds_wherever_greedy_does(tournament_type):
+    # Odd counts give every round a bye, the case where solving round by round can paint itself into a corner
+    for num_teams in (4, 5, 6, 7, 8, 9, 11, 12, 16):
+        for num_venues in (1, 4):
+            for days in (14, 20, 25, 26, 40, 49):
+                for seed in (0, 1, 2):
+                    case = (tournament_type, num_teams, num_venues, days)
+                    if succeeds(*case, 'greedy', seed): assert succeeds(*case, 'backtrack', seed), case + (seed,)
+
+
+@pytest.mark.parametrize('num_teams, days', [(7, 25), (11, 49)])
+def test_round_dead_end_reschedules_the_stage_greedily(num_teams, days):
+    # Rounds solved earliest-first leave no rested days for a later round; the stage restarts on the greedy engine
+    for seed in range(6):
+        assert run('round_robin', num_teams, 1, days, 'backtrack', seed) == run('round_robin', num_teams, 1, days, 'greedy', seed)
+
+
+def test_stage_fallback_undoes_the_abandoned_rounds():
+    teams = [f"Team {i + 1}" for i in range(7)]; progress = {}
+    def record(stage, planned=0, scheduled=0):
+        counts = progress.setdefault(stage, [0, 0]); counts[0] += planned; counts[1] += scheduled
+    slots = get_available_slots(["Ground 1"], START, START + timedelta(days=25), DEFAULT_CONSTRAINTS)
+    token = fixtures_app._progress_hook.set(record)
+    try:
+        with fixtures_app.app.app_context():
+            fixtures, next_number, _, _ = fixtures_app.schedule_rounds(fixtures_app.circle_method_rounds(teams), teams, slots, 2, {team: "Ground 1" for team in teams}, engine='backtrack', rng=random.Random(0))
+    finally: fixtures_app._progress_hook.reset(token)
+    assert len(fixtures) == slots.assigned_total == 21 and next_number == 22
+    assert sorted(f['match_number'] for f in fixtures) == list(range(1, 22))
+    assert progress == {"League": [21, 21]}
+
+
+def test_backtrack_respects_rest_days():
+    fixtures, _ = run('double_round_robin', 8, 2, 90, 'backtrack', 5)
+    last_played = {}
+    for fixture in sorted(fixtures, key=lambda f: (f['date'], f['time_slot'])):
+        for team in (fixture['team1'], fixture['team2']):
+            if team in last_played: assert (fixture['date'] - last_played[team]).days > DEFAULT_CONSTRAINTS.min_rest_days
+            last_played[team] = fixture['date']
+
+
+def test_solver_timeout_undoes_its_bookings():
+    teams = [f"Team {i + 1}" for i in range(16)]; pairs = [(a, b) for i, a in enumerate(teams) for b in teams[i + 1:]]
+    slots = get_available_slots(["Ground 1"], START, START + timedelta(days=365), DEFAULT_CONSTRAINTS)
+    with pytest.raises(SolverTimeout):
+        solve_matches(pairs, teams, slots, 2, {team: "Ground 1" for team in teams}, deadline=time.monotonic() - 1)
+    assert slots.assigned_total == 0
+
+
+def solver_progress(pairs, deadline=None):
+    teams = sorted({team for pair in pairs for team in pair}); totals = []
+    slots = get_available_slots(["Ground 1"], START, START + timedelta(days=365), DEFAULT_CONSTRAINTS)
+    def hook(stage, planned=0, scheduled=0): totals.append((totals[-1] if totals else 0) + scheduled)
+    token = fixtures_app._progress_hook.set(hook)
+    try: solve_matches(pairs, teams, slots, 2, {team: "Ground 1" for team in teams}, deadline=deadline)
+    except SolverTimeout: pass
+    finally: fixtures_app._progress_hook.reset(token)
+    return totals
+
+
+def test_solver_reports_placements_while_it_searches():
+    teams = [f"Team {i + 1}" for i in range(12)]; pairs = [(a, b) for i, a in enumerate(teams) for b in teams[i + 1:]]
+    totals = solver_progress(pairs)
+    assert totals[-1] == len(pairs) and any(0 < total < len(pairs) for total in totals[:-1])
+    assert solver_progress(pairs, deadline=time.monotonic() - 1)[-1] == 0 # A timed-out solve withdraws what it reported
+
+
+def test_backtrack_falls_back_to_greedy_when_out_of_time():
+    teams = [f"Team {i + 1}" for i in range(16)]; pairs = [(a, b) for i, a in enumerate(teams) for b in teams[i + 1:]]
+    slots = get_available_slots(["Ground 1"], START, START + timedelta(days=365), DEFAULT_CONSTRAINTS)
+    with fixtures_app.app.app_context():
+        fixtures, _, _, _ = schedule_matches(pairs, teams, slots, 2, {team: "Ground 1" for team in teams}, engine='backtrack', rng=random.Random(1), deadline=time.monotonic() - 1)
+    assert len(fixtures) == len(pairs) == slots.assigned_total
+
+
+def test_solver_proves_infeasibility():
+    teams = ["A", "B", "C", "D"]; pairs = [("A", "B"), ("A", "C"), ("A", "D")]
+    slots = get_available_slots(["Ground 1"], START, START + timedelta(days=4), DEFAULT_CONSTRAINTS)
+    with pytest.raises(ValueError) as excinfo:
+        solve_matches(pairs, teams, slots, 2, {team: "Ground 1" for team in teams})
+    assert not isinstance(excinfo.value, SolverTimeout)
@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+import re
+from datetime import date, datetime, timezone
+
+import pytest
+
+import app as fixtures_app
+from app import EXPORT_FIELDS, export_csv, export_ics, export_ndjson, ics_line, ics_text
+
+REQUEST = {'tournament_name': "Winter League", 'tournament_type': 'double_round_robin', 'teams_venues': "Lions, North\nTigers, South\nBears, North\nWolves, South",
+           'start_date': '2025-01-06', 'end_date': '2025-05-31', 'seed': 4}
+
+
+def fixture(number, stage="League", day=6, **fields):
+    return dict({'match_number': number, 'stage': stage, 'round': 1, 'match_type': None, 'date': date(2025, 1, day), 'time_slot': 1, 'venue': "North", 'team1': "Lions", 'team2': "Tigers"}, **fields)
+
+
+STAGES = [("League", [fixture(1), fixture(2, day=7)]), ("Playoffs", [fixture(3, stage="Playoffs", day=20, round=None, match_type="Final")])]
+
+
+def failing_after_first_stage():
+    yield STAGES[0]
+    raise ValueError("Could not schedule playoff match: Final.")
+
+
+@pytest.fixture
+def client():
+    return fixtures_app.app.test_client()
+
+
+def test_csv_sends_the_header_then_one_chunk_per_stage():
+    chunks = list(export_csv(iter(STAGES)))
+    assert len(chunks) == 3 and chunks[0] == ",".join(EXPORT_FIELDS) + "\r\n"
+    rows = list(csv.DictReader(io.StringIO("".join(chunks))))
+    assert [(r['match_number'], r['stage'], r['date'], r['match_type']) for r in rows] == [("1", "League", "2025-01-06", ""), ("2", "League", "2025-01-07", ""), ("3", "Playoffs", "2025-01-20", "Final")]
+
+
+def test_ndjson_ends_a_failed_generation_with_an_error_line():
+    lines = "".join(export_ndjson(failing_after_first_stage())).splitlines()
+    assert [json.loads(line).get('match_number') for line in lines[:2]] == [1, 2]
+    assert json.loads(lines[-1]) == {'error': "Could not schedule playoff match: Final."}
+
+
+def test_ics_has_one_all_day_event_per_fixture():
+    text = "".join(export_ics(iter(STAGES), "Winter; League"))
+    assert text.startswith("BEGIN:VCALENDAR\r\n") and text.endswith("END:VCALENDAR\r\n")
+    assert text.count("BEGIN:VEVENT") == 3 and "X-WR-CALNAME:Winter\\; League\r\n" in text
+    assert "DTSTART;VALUE=DATE:20250120\r\nDTEND;VALUE=DATE:20250121\r\n" in text and "SUMMARY:Lions vs Tigers (Final)" in text
+    assert "SUMMARY:Lions vs Tigers (League R1)" in text
+    assert len(set(line for line in text.split("\r\n") if line.startswith("UID:"))) == 3
+
+
+def test_ics_stamps_every_event_with_the_same_utc_time():
+    stamps = set(re.findall(r"DTSTAMP:(\d{8}T\d{6})Z\r\n", "".join(export_ics(iter(STAGES), "Winter League"))))
+    assert len(stamps) == 1
+    assert abs((datetime.now(timezone.utc) - datetime.strptime(stamps.pop(), '%Y%m%dT%H%M%S').replace(tzinfo=timezone.utc)).total_seconds()) < 60
+
+
+def test_ics_escapes_text_and_folds_long_lines_on_character_boundaries():
+    assert ics_text("a,b;c\\d\ne") == "a\\,b\\;c\\\\d\\ne"
+    folded = ics_line("SUMMARY:" + "é" * 60)
+    physical = folded.split("\r\n")[:-1]
+    assert len(physical) == 2 and all(len(line.encode('utf-8')) <= 75 for line in physical) and physical[1].startswith(" ")
+    assert "".join(line[1:] if i else line for i, line in enumerate(physical)) == "SUMMARY:" + "é" * 60
+
+
+def test_export_endpoint_streams_every_fixture(client):
+    response = client.post('/api/fixtures/export.csv', json=REQUEST)
+    assert response.status_code == 200 and response.is_streamed
+    assert response.headers['Content-Disposition'] == 'attachment; filename="Winter_League.csv"'
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == 12 and {r['stage'] for r in rows} == {"League (Leg 1)", "League (Leg 2)"}
+    lines = client.post('/api/fixtures/export.ndjson', json=REQUEST).get_data(as_text=True).splitlines()
+    assert sorted((f['date'], f['team1'], f['team2']) for f in map(json.loads, lines)) == sorted((r['date'], r['team1'], r['team2']) for r in rows)
+
+
+def test_export_endpoint_errors_before_streaming(client):
+    assert client.post('/api/fixtures/export.xlsx', json=REQUEST).status_code == 404
+    response = client.post('/api/fixtures/export.ics', json=dict(REQUEST, end_date='2025-01-08'))
+    assert response.status_code == 400 and "error" in response.get_json()
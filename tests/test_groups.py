@@ -0,0 +1,31 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+import app as fixtures_app
+from app import DEFAULT_CONSTRAINTS, split_into_groups
+
+
+@pytest.mark.parametrize('num_teams, teams_per_group, sizes', [
+    (16, 4, [4, 4, 4, 4]), (10, 4, [4, 3, 3]), (5, 4, [3, 2]), (13, 4, [4, 3, 3, 3]), (6, 2, [2, 2, 2]), (5, 2, [3, 2]), (7, 8, [7]),
+])
+def test_split_into_groups(num_teams, teams_per_group, sizes):
+    teams = [f"Team {i + 1}" for i in range(num_teams)]
+    groups = split_into_groups(teams, teams_per_group)
+    assert [len(group) for group in groups] == sizes
+    assert [team for group in groups for team in group] == teams
+
+
+@pytest.mark.parametrize('num_teams', [6, 10, 13])
+def test_uneven_groups_play_full_round_robins(num_teams):
+    teams = [f"Team {i + 1}" for i in range(num_teams)]; venues = ["Ground 1", "Ground 2"]
+    with fixtures_app.app.app_context():
+        fixtures, _ = fixtures_app.generate_group_stage_knockout_fixtures(teams, venues, {team: venues[i % 2] for i, team in enumerate(teams)}, date(2025, 1, 1), date(2025, 4, 1), DEFAULT_CONSTRAINTS.min_rest_days, rng=random.Random(2), constraints=DEFAULT_CONSTRAINTS)
+    groups = {}
+    for fixture in fixtures:
+        if fixture['stage'].startswith('Group'): groups.setdefault(fixture['stage'], set()).update((fixture['team1'], fixture['team2']))
+    group_matches = sum(1 for f in fixtures if f['stage'].startswith('Group'))
+    assert sorted(len(members) for members in groups.values()) == sorted(len(group) for group in split_into_groups(teams, 4))
+    assert group_matches == sum(len(members) * (len(members) - 1) // 2 for members in groups.values())
+    assert max(f['date'] for f in fixtures if f['stage'].startswith('Group')) < min(f['date'] for f in fixtures if f['stage'] == 'Knockout')
@@ -0,0 +1,38 @@
+import time
+
+from app import JobManager, build_generation_spec
+
+FORM = {'tournament_type': 'round_robin', 'teams_venues': "\n".join(f"Team {i}, Ground {i % 2}" for i in range(4)), 'start_date': '2025-01-01', 'end_date': '2025-02-28'}
+
+
+def wait_for(manager, job_ids, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        counts = manager.counts()
+        if not counts['queued'] and not counts['running']: return
+        time.sleep(0.01)
+    raise AssertionError("jobs did not finish")
+
+
+def test_finished_jobs_are_capped_oldest_first():
+    manager = JobManager(max_workers=1, max_finished=3)
+    job_ids = [manager.submit(build_generation_spec(dict(FORM, tournament_name=f"Cup {i}")), seed=i) for i in range(8)]
+    wait_for(manager, job_ids)
+    assert sum(manager.counts().values()) == 3
+    assert [manager.get(job_id) is not None for job_id in job_ids] == [False] * 5 + [True] * 3
+    assert manager.get(job_ids[-1], include_result=True)['result']['fixtures']
+
+
+def test_finished_jobs_expire():
+    manager = JobManager(max_workers=1, retention_seconds=-1)
+    job_id = manager.submit(build_generation_spec(dict(FORM, tournament_name="Cup")), seed=1)
+    wait_for(manager, [job_id])
+    assert manager.get(job_id) is None
+
+
+def test_seed_search_reports_each_finished_seed():
+    manager = JobManager(max_workers=1)
+    job_id = manager.submit(build_generation_spec(dict(FORM, tournament_name="Cup")), seed=1, search_seeds=3)
+    wait_for(manager, [job_id])
+    job = manager.get(job_id)
+    assert job['status'] == 'done' and job['progress'] == {'Seed search': {'planned': 3, 'scheduled': 3}}
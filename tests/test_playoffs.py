@@ -0,0 +1,94 @@
+from datetime import date, timedelta
+
+import pytest
+
+import app as fixtures_app
+from app import PLAYOFF_FINAL_WEEKDAY, PLAYOFF_FORMATS, build_generation_spec, generate_playoffs, generate_tournament, playoff_participants
+
+LEAGUE_END = date(2025, 3, 5)
+TEAMS = [f"Team {i}" for i in range(1, 9)]; VENUES = ["North", "South"]
+TEAM_VENUE_MAP = {team: VENUES[i % 2] for i, team in enumerate(TEAMS)}
+
+
+def run(playoff_format, min_rest_days=2):
+    ranked = TEAMS[:PLAYOFF_FORMATS[playoff_format]['teams']]
+    with fixtures_app.app.app_context():
+        return generate_playoffs(playoff_format, ranked, LEAGUE_END, VENUES, TEAM_VENUE_MAP, min_rest_days)
+
+
+@pytest.mark.parametrize('playoff_format', sorted(PLAYOFF_FORMATS))
+def test_bracket_is_scheduled_with_rest_and_a_weekend_final(playoff_format):
+    fixtures, last_date = run(playoff_format)
+    matches = PLAYOFF_FORMATS[playoff_format]['matches']; participants = playoff_participants(playoff_format)
+    assert [f['match_number'] for f in fixtures] == list(range(1, len(matches) + 1))
+    by_type = {f['match_type']: f for f in fixtures}
+    assert set(by_type) == {match_type for _, match_type, _, _ in matches}
+    assert min(f['date'] for f in fixtures) >= LEAGUE_END + timedelta(days=fixtures_app.PLAYOFF_START_GAP_DAYS)
+    assert by_type['Final']['date'] == last_date == max(f['date'] for f in fixtures) and last_date.weekday() == PLAYOFF_FINAL_WEEKDAY
+    last_played = {}
+    for match_id, match_type, *_ in sorted(matches, key=lambda m: by_type[m[1]]['date']):
+        for rank in participants[match_id]:
+            if rank in last_played: assert (by_type[match_type]['date'] - last_played[rank]).days > 2, (match_type, rank)
+            last_played[rank] = by_type[match_type]['date']
+
+
+def test_seeded_sides_and_feeders():
+    top8 = {f['match_type']: (f['team1'], f['team2']) for f in run('top8')[0]}
+    assert top8['Quarter-final 1'] == ("Team 1", "Team 8") and top8['Quarter-final 3'] == ("Team 2", "Team 7")
+    assert top8['Semi-final 1'] == ("Winner(QF1)", "Winner(QF2)") and top8['Final'] == ("Winner(SF1)", "Winner(SF2)")
+    top6 = {f['match_type']: (f['team1'], f['team2']) for f in run('top6')[0]}
+    assert top6['Elimination Final 1'] == ("Team 3", "Team 6") and top6['Semi-final 1'] == ("Team 1", "Winner(EF2)")
+    assert {f['match_type']: f['team2'] for f in run('top4')[0]}['Qualifier 2'] == "Winner(Elim.)"
+
+
+def test_formats_only_accept_their_team_count():
+    with fixtures_app.app.app_context():
+        assert generate_playoffs('top6', TEAMS[:4], LEAGUE_END, VENUES, TEAM_VENUE_MAP, 2) == ([], LEAGUE_END)
+
+
+def test_league_with_top8_playoffs():
+    form = {'tournament_type': 'round_robin', 'teams_venues': "\n".join(f"{team}, {venue}" for team, venue in TEAM_VENUE_MAP.items()),
+            'start_date': '2025-01-06', 'end_date': '2025-04-30', 'include_playoffs': 'yes', 'playoff_format': 'top8', 'top_teams': TEAMS[::-1]}
+    spec = build_generation_spec(form)
+    with fixtures_app.app.app_context():
+        result = generate_tournament(spec, 3)
+    playoffs = [f for f in result['fixtures'] if f['stage'] == "Playoffs"]
+    assert len(playoffs) == 7 and len(result['fixtures']) == 28 + 7
+    assert min(f['date'] for f in playoffs) > max(f['date'] for f in result['fixtures'] if f['stage'] == "League")
+    assert ("Team 8", "Team 1") in {(f['team1'], f['team2']) for f in playoffs}
+
+
+@pytest.mark.parametrize('fields, message', [
+    ({'playoff_format': 'top5'}, "Invalid playoff format"),
+    ({'playoff_format': 'top6', 'top_teams': TEAMS[:5]}, "Must select all Top 6 teams"),
+    ({'playoff_format': 'top6', 'top_teams': TEAMS[:5] + TEAMS[:1]}, "must be unique"),
+])
+def test_playoff_selection_is_validated(fields, message):
+    form = dict({'tournament_type': 'round_robin', 'teams_venues': "\n".join(f"{team}, North" for team in TEAMS), 'start_date': '2025-01-06', 'end_date': '2025-04-30', 'include_playoffs': 'yes'}, **fields)
+    with pytest.raises(ValueError, match=message): build_generation_spec(form)
+
+
+@pytest.mark.parametrize('tournament_type', ['double_elimination', 'group_knockout'])
+def test_bracket_types_share_their_slot_table_with_playoffs(tournament_type):
+    form = {'tournament_type': tournament_type, 'teams_venues': "\n".join(f"{team}, {venue}" for team, venue in TEAM_VENUE_MAP.items()),
+            'start_date': '2025-01-06', 'end_date': '2025-04-30', 'include_playoffs': 'yes', 'playoff_format': 'top4', 'top_teams': TEAMS[:4]}
+    spec = build_generation_spec(form)
+    with fixtures_app.app.app_context():
+        result = generate_tournament(spec, 3)
+    playoffs = [f for f in result['fixtures'] if f['stage'] == "Playoffs"]; main = [f for f in result['fixtures'] if f['stage'] != "Playoffs"]
+    assert len(playoffs) == 4 and result['last_date'] == max(f['date'] for f in playoffs) <= spec['end_date']
+    assert min(f['date'] for f in playoffs) >= max(f['date'] for f in main) + timedelta(days=fixtures_app.PLAYOFF_START_GAP_DAYS)
+    assert len({(f['date'], f['venue'], f['time_slot']) for f in result['fixtures']}) == len(result['fixtures'])
+
+
+def test_shared_table_playoffs_must_fit_the_window():
+    form = {'tournament_type': 'double_elimination', 'teams_venues': "\n".join(f"{team}, North" for team in TEAMS),
+            'start_date': '2025-01-06', 'end_date': '2025-01-31', 'include_playoffs': 'yes', 'playoff_format': 'top8', 'top_teams': TEAMS}
+    with fixtures_app.app.app_context(), pytest.raises(ValueError, match="Could not schedule playoff match"):
+        generate_tournament(build_generation_spec(form), 3)
+
+
+def test_single_elimination_ignores_playoffs():
+    form = {'tournament_type': 'single_elimination', 'teams_venues': "\n".join(f"{team}, North" for team in TEAMS),
+            'start_date': '2025-01-06', 'end_date': '2025-04-30', 'include_playoffs': 'yes', 'top_teams': TEAMS[:4]}
+    assert build_generation_spec(form)['top_teams'] == []
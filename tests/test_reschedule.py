@@ -0,0 +1,84 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+import app as fixtures_app
+from app import ConstraintProfile, DEFAULT_CONSTRAINTS, reschedule_fixtures
+
+REST = timedelta(days=DEFAULT_CONSTRAINTS.min_rest_days + 1)
+
+
+def generate(generator, num_teams, num_venues, start, days, constraints=DEFAULT_CONSTRAINTS, seed=1):
+    teams = [f"Team {i + 1}" for i in range(num_teams)]; venues = [f"Ground {j + 1}" for j in range(num_venues)]
+    with fixtures_app.app.app_context():
+        fixtures, _ = generator(teams, venues, {team: venues[i % num_venues] for i, team in enumerate(teams)}, start, start + timedelta(days=days), constraints.min_rest_days, rng=random.Random(seed), constraints=constraints)
+    return fixtures
+
+
+def reschedule(fixtures, blackouts, constraints=DEFAULT_CONSTRAINTS):
+    with fixtures_app.app.app_context():
+        return reschedule_fixtures(fixtures, blackouts, constraints.min_rest_days, constraints=constraints)
+
+
+def assert_rested(fixtures):
+    last_played = {}
+    for fixture in sorted(fixtures, key=lambda f: (f['date'], f['time_slot'] or 0)):
+        for team in (fixture['team1'], fixture['team2']):
+            if team in last_played: assert fixture['date'] - last_played[team] >= REST, fixture
+            last_played[team] = fixture['date']
+
+
+def test_league_blackout_only_moves_matches_forward():
+    weekly = ConstraintProfile(weekday_limits=(0, 0, 0, 0, 0, 4, 0)) # Saturdays only
+    fixtures = generate(fixtures_app.generate_round_robin_fixtures, 8, 4, date(2025, 1, 4), 120, weekly)
+    blackout_day = sorted({f['date'] for f in fixtures})[5]
+    updated, changes = reschedule(fixtures, [(None, blackout_day, blackout_day)]) # Weekdays are open when re-slotting
+    assert changes and len(changes) == sum(f['date'] == blackout_day for f in fixtures)
+    for change in changes:
+        assert change['to']['date'] > change['from']['date']
+    for fixture, original in zip(updated, fixtures):
+        if fixture['date'] != original['date']:
+            previous_rounds = [f['date'] for f in fixtures if f['round'] is not None and f['round'] < fixture['round'] and f['date'] != blackout_day]
+            assert fixture['date'] >= max(previous_rounds, default=fixture['date'])
+    assert_rested(updated)
+
+
+def test_group_blackout_stays_before_knockout():
+    fixtures = generate(fixtures_app.generate_group_stage_knockout_fixtures, 8, 2, date(2025, 1, 1), 45)
+    last_group_match = max((f for f in fixtures if f['stage'].startswith('Group')), key=lambda f: f['date'])
+    knockout_start = min(f['date'] for f in fixtures if f['stage'] == 'Knockout')
+    blackout = (last_group_match['venue'], last_group_match['date'], last_group_match['date'])
+    with fixtures_app.app.app_context():
+        updated, changes = reschedule_fixtures(fixtures, [blackout], DEFAULT_CONSTRAINTS.min_rest_days, allow_venue_change=True)
+    assert changes
+    for change in changes:
+        assert last_group_match['date'] <= change['to']['date'] <= knockout_start - REST
+    assert_rested(updated)
+    # With every ground closed there is no day left between the groups and the knockout
+    with pytest.raises(ValueError):
+        reschedule(fixtures, [(None, last_group_match['date'], last_group_match['date'])])
+
+
+def test_knockout_blackout_keeps_group_stage_first():
+    fixtures = generate(fixtures_app.generate_group_stage_knockout_fixtures, 8, 2, date(2025, 1, 1), 45)
+    group_end = max(f['date'] for f in fixtures if f['stage'].startswith('Group'))
+    knockout = [f for f in fixtures if f['stage'] == 'Knockout']; final = max(knockout, key=lambda f: f['round'])
+    updated, changes = reschedule(fixtures, [(None, final['date'], final['date'])])
+    assert [change['to']['date'] > final['date'] for change in changes] == [True]
+    semi_final_end = max(f['date'] for f in knockout if f['round'] < final['round'])
+    moved_final = next(f for f in updated if f['stage'] == 'Knockout' and f['round'] == final['round'])
+    assert moved_final['date'] >= max(group_end, semi_final_end) + REST
+    # The first knockout day cannot move back into the group stage, and there is no room before the next round
+    knockout_start = min(f['date'] for f in knockout)
+    with pytest.raises(ValueError):
+        reschedule(fixtures, [(None, knockout_start, knockout_start)])
+
+
+def test_unaffected_fixtures_are_untouched():
+    fixtures = generate(fixtures_app.generate_double_round_robin_fixtures, 6, 2, date(2025, 3, 1), 90)
+    venue_day = fixtures[3]
+    updated, changes = reschedule(fixtures, [(venue_day['venue'], venue_day['date'], venue_day['date'])])
+    moved = {(c['team1'], c['team2'], c['from']['date']) for c in changes}
+    for fixture, original in zip(updated, fixtures):
+        if (original['team1'], original['team2'], original['date']) not in moved: assert fixture == original
@@ -0,0 +1,98 @@
+import io
+import json
+from datetime import date
+
+import pytest
+
+from app import MAX_ROSTER_ERRORS, RosterError, parse_roster, parse_roster_binary, parse_team_venue_pairs, roster_format_for
+
+
+def parse(text, fmt):
+    return parse_roster(io.StringIO(text), fmt)
+
+
+def test_csv_with_extra_columns_and_multiple_home_venues():
+    teams, venues, team_venue_map, venue_rules = parse(
+        "Club,Home Venues,Capacity,Blackout Dates\n"
+        "Lions,North Park;South Oval,2,2025-03-01..2025-03-03\n"
+        "Tigers,North Park,,2025-03-02;2025-04-10\n"
+        "\n"
+        '"Bears, Senior",East Ground,,\n', 'csv')
+    assert teams == ["Lions", "Tigers", "Bears, Senior"]
+    assert venues == ["North Park", "South Oval", "East Ground"]
+    assert team_venue_map == {"Lions": ("North Park", "South Oval"), "Tigers": "North Park", "Bears, Senior": "East Ground"}
+    assert venue_rules["North Park"] == {'capacity': 2, 'blackouts': [(date(2025, 3, 1), date(2025, 3, 3)), (date(2025, 4, 10), date(2025, 4, 10))]}
+    assert venue_rules["South Oval"]['capacity'] == 2 and "East Ground" not in venue_rules
+
+
+def test_csv_reports_every_bad_row_together():
+    with pytest.raises(RosterError) as excinfo:
+        parse("team,venue,capacity,blackouts\n"
+              "Lions,North Park,0,\n"
+              ",South Oval,,\n"
+              "Tigers,,,2025-13-01\n"
+              "Wolves,North Park,3,\n"
+              "Bears,West,1,,extra\n"
+              "Wolves,East Ground,,\n", 'csv')
+    error = excinfo.value
+    assert [e['line'] for e in error.errors] == [2, 3, 4, 4, 6, 7]
+    assert error.error_count == 6 and "Duplicate team name: 'Wolves' on line 7 (first on line 5)." in error.errors[5]['message']
+
+
+def test_csv_header_problems():
+    with pytest.raises(RosterError) as excinfo: parse("team,colour\nLions,red\n", 'csv')
+    assert [e['line'] for e in excinfo.value.errors] == [1, 1]
+    with pytest.raises(ValueError): parse("", 'csv')
+
+
+def test_conflicting_capacity_for_a_shared_venue():
+    with pytest.raises(RosterError, match="conflicts with 2 on line 2"):
+        parse("team,venue,capacity\nLions,North Park,2\nTigers,North Park,3\n", 'csv')
+
+
+def test_json_array_and_object_forms():
+    rows = [{"team": "Lions", "venues": ["North Park", "South Oval"], "capacity": 2}, {"club": "Tigers", "home_venue": "North Park", "blackouts": ["2025-05-01"]}]
+    for text in (json.dumps(rows), json.dumps({"teams": rows})):
+        teams, venues, team_venue_map, venue_rules = parse(text, 'json')
+        assert teams == ["Lions", "Tigers"] and team_venue_map["Lions"] == ("North Park", "South Oval")
+        assert venue_rules["North Park"] == {'capacity': 2, 'blackouts': [(date(2025, 5, 1), date(2025, 5, 1))]}
+
+
+def test_malformed_json():
+    with pytest.raises(RosterError, match="Invalid JSON"): parse('[{"team": "Lions",', 'json')
+    with pytest.raises(RosterError) as excinfo: parse('[{"team": "Lions", "venue": "A"}, "Tigers", {"team": "Bears", "venue": "B", "colour": "red"}]', 'json')
+    assert [e['line'] for e in excinfo.value.errors] == [2, 3]
+
+
+def test_ndjson_reports_bad_lines_and_skips_blank_ones():
+    with pytest.raises(RosterError) as excinfo:
+        parse('{"team": "Lions", "venue": "A"}\n\n{"team": "Tigers", "venue": \n{"team": "Bears"}\n[1, 2]\n', 'ndjson')
+    assert [(e['line'], e['message']) for e in excinfo.value.errors] == [
+        (3, "Line 3: not valid JSON."), (4, "Line 4: at least one home venue is required."), (5, "Line 5: expected an object with team and venue fields.")]
+    teams, _, _, _ = parse('{"team": "Lions", "venue": "A"}\n\n{"team": "Tigers", "venue": "B"}\n', 'ndjson')
+    assert teams == ["Lions", "Tigers"]
+
+
+def test_error_list_is_capped_but_counted():
+    text = "team,venue\n" + "".join(f"Team {i},\n" for i in range(MAX_ROSTER_ERRORS + 20))
+    with pytest.raises(RosterError) as excinfo: parse(text, 'csv')
+    assert len(excinfo.value.errors) == MAX_ROSTER_ERRORS and excinfo.value.error_count == MAX_ROSTER_ERRORS + 20
+    assert "(and 115 more)" in str(excinfo.value)
+
+
+def test_binary_uploads_decode_utf8_with_bom():
+    teams, _, _, _ = parse_roster_binary(io.BytesIO("﻿team,venue\r\nLöwen,Nordpark\r\nTigers,Nordpark\r\n".encode('utf-8')), 'csv')
+    assert teams == ["Löwen", "Tigers"]
+    with pytest.raises(ValueError, match="UTF-8"): parse_roster_binary(io.BytesIO(b"team,venue\n\xff\xfe,x\n"), 'csv')
+
+
+def test_roster_format_detection():
+    assert [roster_format_for(name) for name in ("clubs.CSV", "clubs.json", "clubs.jsonl", "clubs.ndjson", "clubs.txt")] == ['csv', 'json', 'ndjson', 'ndjson', None]
+    assert roster_format_for("upload", "application/x-ndjson") == 'ndjson' and roster_format_for("upload", "text/csv") == 'csv'
+    with pytest.raises(ValueError, match="Unsupported roster format"): parse("", 'xml')
+
+
+def test_textarea_reports_every_bad_line():
+    with pytest.raises(RosterError) as excinfo: parse_team_venue_pairs("Lions, North Park\nTigers\nLions, South Oval\n, East")
+    assert [e['line'] for e in excinfo.value.errors] == [2, 3, 4]
+    assert parse_team_venue_pairs("Lions, North Park\n\nTigers, North Park") == (["Lions", "Tigers"], ["North Park"], {"Lions": "North Park", "Tigers": "North Park"})
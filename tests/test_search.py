@@ -0,0 +1,46 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app import Metrics, _generate_for_seed, build_generation_spec, count_slot_probes, generate_tournament, search_best_schedule
+
+SPEC = build_generation_spec({'tournament_name': "Cup", 'tournament_type': 'double_round_robin', 'teams_venues': "\n".join(f"Team {i}, Ground {i % 3}" for i in range(8)), 'start_date': '2025-01-01', 'end_date': '2025-06-30'})
+
+
+def test_worker_stops_once_the_deadline_has_passed():
+    result = _generate_for_seed(SPEC, 1, deadline=time.time() - 1)
+    assert 'time limit' in result['error']
+
+
+def test_worker_returns_its_counters():
+    result = _generate_for_seed(SPEC, 1)
+    _, probes = result['worker_counters']
+    assert result['fixtures'] and probes > 0
+
+
+def test_search_merges_worker_probes():
+    best = search_best_schedule(SPEC, 3, base_seed=10)
+    assert best['search']['completed'] == 3 and 'worker_counters' not in best
+    assert best['search']['slot_checks'] == sum(_generate_for_seed(SPEC, seed)['worker_counters'][1] for seed in range(10, 13))
+
+
+def probes_for(seed):
+    with count_slot_probes() as slot_probes:
+        generate_tournament(SPEC, seed=seed)
+        return slot_probes()
+
+
+def test_concurrent_runs_count_only_their_own_probes():
+    sequential = [probes_for(seed) for seed in range(4)]
+    with ThreadPoolExecutor(4) as pool: concurrent = list(pool.map(probes_for, range(4)))
+    assert sequential == concurrent and all(sequential)
+
+
+def test_metrics_delta_and_merge():
+    worker = Metrics(); worker.describe('jobs_total', 'counter', "Jobs."); worker.describe('job_seconds', 'histogram', "Job time.")
+    worker.inc('jobs_total', 2, kind='a'); before = worker.snapshot()
+    worker.inc('jobs_total', 3, kind='a'); worker.inc('jobs_total', kind='b'); worker.observe('job_seconds', 0.2)
+    parent = Metrics(); parent.describe('jobs_total', 'counter', "Jobs."); parent.describe('job_seconds', 'histogram', "Job time.")
+    parent.inc('jobs_total', kind='a')
+    parent.merge(worker.delta_since(before)); parent.merge(worker.delta_since(before))
+    text = parent.render()
+    assert 'jobs_total{kind="a"} 7' in text and 'jobs_total{kind="b"} 2' in text and 'job_seconds_count 2' in text
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+import app as fixtures_app
+from app import MAX_SEED, FixtureStore, build_generation_spec, generate_tournament
+
+FORM = {'teams_venues': "\n".join(f"Team {i}, Ground {i % 3}" for i in range(8)), 'start_date': '2025-01-06', 'end_date': '2025-08-31'}
+
+
+def signature(result): return [(f['date'], f['time_slot'], f['venue'], f['team1'], f['team2'], f['stage']) for f in result['fixtures']]
+
+
+@pytest.mark.parametrize('tournament_type', fixtures_app.TOURNAMENT_TYPES)
+def test_same_seed_gives_the_same_fixtures(tournament_type):
+    spec = build_generation_spec(dict(FORM, tournament_type=tournament_type))
+    with fixtures_app.app.app_context():
+        first = generate_tournament(spec, 1234); again = generate_tournament(spec, 1234)
+        others = [signature(generate_tournament(spec, seed)) for seed in (1, 2, 3)]
+    assert first['seed'] == 1234 and signature(again) == signature(first)
+    assert any(other != signature(first) for other in others)
+
+
+def test_unseeded_runs_report_a_replayable_seed_and_leave_the_module_rng_alone():
+    spec = build_generation_spec(dict(FORM, tournament_type='round_robin'))
+    random.seed(99); state = random.getstate()
+    with fixtures_app.app.app_context():
+        result = generate_tournament(spec)
+        assert random.getstate() == state
+        assert 0 <= result['seed'] <= MAX_SEED and signature(generate_tournament(spec, result['seed'])) == signature(result)
+
+
+def test_seeds_are_validated_and_echoed():
+    client = fixtures_app.app.test_client(); request = dict(FORM, tournament_type='round_robin', tournament_name="Seeded")
+    for bad_seed in (-1, MAX_SEED + 1, "x"):
+        response = client.post('/api/fixtures', json=dict(request, seed=bad_seed))
+        assert response.status_code == 400 and "Seed must be a whole number" in response.get_json()['error']
+    assert client.post('/api/fixtures', json=dict(request, seed=MAX_SEED)).get_json()['seed'] == MAX_SEED
+    assert client.post('/api/fixtures/export.csv', json=dict(request, seed=42)).headers['X-Fixture-Seed'] == "42"
+    assert client.post('/api/fixtures/export.csv', json=dict(request, seed=42, search_seeds=2)).headers['X-Fixture-Base-Seed'] == "42"
+
+
+def test_stored_tournament_replays_identically(tmp_path, monkeypatch):
+    monkeypatch.setattr(fixtures_app, 'fixture_store', FixtureStore(str(tmp_path / 'fixtures.db')))
+    client = fixtures_app.app.test_client()
+    stored = client.post('/api/fixtures', json=dict(FORM, tournament_type='double_elimination', tournament_name="Replayed")).get_json()
+    replay = client.post(f"/api/tournaments/{stored['tournament_id']}/replay")
+    assert replay.status_code == 200
+    payload = replay.get_json()
+    assert payload['identical'] and payload['seed'] == stored['seed'] and payload['fixture_count'] == stored['fixture_count']
+    assert client.post('/api/tournaments/missing/replay').status_code == 404
@@ -0,0 +1,39 @@
+from datetime import date, timedelta
+
+from app import SlotIndex, get_available_slots
+
+MONDAY = date(2025, 1, 6)
+
+
+def test_slot_ids_follow_date_time_slot_venue_order():
+    slots = get_available_slots(["North", "South"], MONDAY, MONDAY + timedelta(days=6))
+    assert len(slots) == 7 * 2 * 2 == slots.remaining()
+    assert [(slots.date_of(slot), slots.time_slot_of(slot), slots.venue_of(slot)) for slot in range(6)] == [
+        (MONDAY, 1, "North"), (MONDAY, 1, "South"), (MONDAY, 2, "North"), (MONDAY, 2, "South"),
+        (MONDAY + timedelta(days=1), 1, "North"), (MONDAY + timedelta(days=1), 1, "South")]
+
+
+def test_next_free_skips_days_at_their_match_limit():
+    slots = SlotIndex(["North", "South"], MONDAY, MONDAY + timedelta(days=13))
+    booked = []
+    for _ in range(9):
+        slot = slots.next_free(MONDAY); slots.assign(slot); booked.append(slots.date_of(slot))
+    # One match per weekday across all venues, two on Saturday and Sunday
+    assert booked == [MONDAY + timedelta(days=day) for day in (0, 1, 2, 3, 4, 5, 5, 6, 6)]
+    assert slots.matches_on(MONDAY + timedelta(days=5)) == 2 and slots.matches_on(MONDAY + timedelta(days=7)) == 0
+    assert slots.remaining() == len(slots) - 9
+
+
+def test_next_free_honours_earliest_date_and_venue():
+    slots = SlotIndex(["North", "South"], MONDAY, MONDAY + timedelta(days=13))
+    slot = slots.next_free(MONDAY + timedelta(days=2), "South")
+    assert (slots.date_of(slot), slots.venue_of(slot), slots.time_slot_of(slot)) == (MONDAY + timedelta(days=2), "South", 1)
+    slots.assign(slot)
+    slot = slots.next_free(MONDAY + timedelta(days=2), "North")
+    assert slots.date_of(slot) == MONDAY + timedelta(days=3) # Wednesday already has its one match
+    assert slots.next_free(MONDAY + timedelta(days=14)) is None
+
+
+def test_empty_window_has_no_slots():
+    slots = SlotIndex(["North"], MONDAY, MONDAY - timedelta(days=1))
+    assert len(slots) == 0 and slots.next_free() is None
@@ -0,0 +1,27 @@
+from datetime import date
+
+import app as fixtures_app
+from app import FixtureStore, build_generation_spec, generate_tournament
+
+FORM = {'tournament_type': 'round_robin', 'teams_venues': "\n".join(f"Team {i}, Ground {i % 3}" for i in range(6)), 'start_date': '2025-01-01', 'end_date': '2025-03-31'}
+
+
+def generate(name, seed=7):
+    spec = build_generation_spec(dict(FORM, tournament_name=name))
+    with fixtures_app.app.app_context():
+        return spec, generate_tournament(spec, seed)
+
+
+def test_same_submission_is_stored_once(tmp_path):
+    store = FixtureStore(str(tmp_path / 'fixtures.db'))
+    spec, result = generate("Alpha")
+    assert store.save(spec, result) == store.save(spec, result)
+    assert len(store.tournaments()) == 1
+
+
+def test_tournaments_with_the_same_inputs_keep_their_own_names(tmp_path):
+    store = FixtureStore(str(tmp_path / 'fixtures.db'))
+    alpha_id = store.save(*generate("Alpha")); beta_id = store.save(*generate("Beta"))
+    assert alpha_id != beta_id
+    assert store.tournament(alpha_id)['name'] == "Alpha" and store.tournament(beta_id)['name'] == "Beta"
+    assert store.tournament(beta_id)['fixtures'][0]['date'] >= date(2025, 1, 1)
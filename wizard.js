@@ -11,8 +11,11 @@
     const progressBar = document.getElementById('progressBar');
     const progressStep4 = document.getElementById('progressStep4'); // Progress bar marker for Step 4
     const includePlayoffsSelect = document.getElementById('include_playoffs');
+    const playoffFormatSelect = document.getElementById('playoff_format'); // top2 / top4 / top6 / top8
     const step4Div = document.getElementById('step4'); // The actual Step 4 content div
     const teamsVenuesTextarea = document.getElementById('teams_venues');
+    const rosterFileInput = document.getElementById('roster_file');
+    let rosterFileTeams = null; // Team names read from an uploaded roster file (replaces the textarea when set)
 
     // --- Initialization ---
     document.addEventListener('DOMContentLoaded', function() {
@@ -30,15 +33,24 @@
 
         // Update progress bar and required fields when playoff choice changes
         includePlayoffsSelect.addEventListener('change', handlePlayoffChoiceChange);
+        // Show only as many placing dropdowns as the chosen playoff format needs
+        if (playoffFormatSelect) {
+            playoffFormatSelect.addEventListener('change', togglePlayoffStepVisibility);
+        }
 
-        // Update Top 4 dropdown options when team/venue input changes (debounced)
+        // Update playoff dropdown options when team/venue input changes (debounced)
         if (teamsVenuesTextarea) {
             // Update options after user pauses typing (500ms delay)
              teamsVenuesTextarea.addEventListener('input', debounce(updateTop4OptionsFromTextarea, 500));
              // Also update immediately on load in case the field is pre-populated (e.g., form error reload)
              updateTop4OptionsFromTextarea();
         } else {
-             console.warn("Teams/Venues textarea not found. Dynamic Top 4 options will not update.");
+             console.warn("Teams/Venues textarea not found. Dynamic playoff team options will not update.");
+        }
+
+        // A roster file replaces the textarea: it is no longer required and playoff team options come from the file
+        if (rosterFileInput) {
+            rosterFileInput.addEventListener('change', handleRosterFileChange);
         }
 
     }); // End DOMContentLoaded
@@ -177,25 +189,47 @@
     function handlePlayoffChoiceChange() {
         togglePlayoffStepVisibility(); // Update required fields and step visibility
         updateProgressBar(); // Recalculate progress bar based on new total steps
-        // If turning playoffs ON, update the options in the Top 4 dropdowns
+        // If turning playoffs ON, update the options in the playoff dropdowns
         if (includePlayoffsSelect.value === 'yes') {
              updateTop4OptionsFromTextarea();
         }
     }
 
+    // Number of placings the selected playoff format takes (e.g. 'top6' -> 6)
+    function playoffTeamCount() {
+        const format = playoffFormatSelect ? playoffFormatSelect.value : 'top4';
+        return parseInt(format.replace('top', ''), 10) || 4;
+    }
+
+    // The Top N select elements the current playoff format needs, in finishing order
+    function playoffSelects() {
+        const selects = [];
+        for (let rank = 1; rank <= playoffTeamCount(); rank++) {
+            const select = document.getElementById(`top${rank}_team`);
+            if (select) selects.push(select);
+        }
+        return selects;
+    }
+
     // Updates the visibility and requirement status of Step 4 elements
     function togglePlayoffStepVisibility() {
         const includePlayoffs = includePlayoffsSelect.value === 'yes';
+        const teamCount = playoffTeamCount();
 
         // Toggle the visibility class on the progress bar marker for Step 4
         progressStep4.classList.toggle('visible', includePlayoffs);
 
-        // Enable or disable the 'required' attribute on Step 4's select inputs
-        const step4Selects = step4Div.querySelectorAll('select');
+        // Enable or disable the 'required' attribute on Step 4's select inputs;
+        // placings beyond the chosen format are hidden and never required
+        const step4Selects = step4Div.querySelectorAll('select[name^="top"]');
         step4Selects.forEach(select => {
-            select.required = includePlayoffs; // Only required if playoffs are included
+            const rank = parseInt(select.name.replace('top', ''), 10);
+            const inFormat = rank <= teamCount;
+            select.required = includePlayoffs && inFormat; // Only required if playoffs are included
+            select.disabled = !inFormat; // Disabled selects are not submitted
+            if (select.parentElement) select.parentElement.classList.toggle('hidden', !inFormat);
             // If hiding Step 4, remove any lingering validation error styles
-            if (!includePlayoffs) {
+            if (!includePlayoffs || !inFormat) {
                  select.style.border = ''; // Reset border style
             }
         });
@@ -207,6 +241,47 @@
         }
     }
 
+     // --- Roster File Upload ---
+     function handleRosterFileChange() {
+         const file = rosterFileInput.files && rosterFileInput.files[0];
+         rosterFileTeams = null;
+         if (teamsVenuesTextarea) teamsVenuesTextarea.required = !file;
+         if (!file) { updateTop4OptionsFromTextarea(); return; }
+         const reader = new FileReader();
+         reader.onload = function() {
+             rosterFileTeams = teamNamesFromRoster(file.name, reader.result);
+             updateTop4OptionsFromTextarea();
+         };
+         reader.readAsText(file);
+     }
+
+     // Best-effort team names for the playoff dropdowns; the server does the real validation
+     function teamNamesFromRoster(fileName, text) {
+         const names = [];
+         const lowerName = fileName.toLowerCase();
+         try {
+             if (lowerName.endsWith('.json')) {
+                 const data = JSON.parse(text);
+                 (Array.isArray(data) ? data : (data.teams || [])).forEach(row => names.push(row.team || row.team_name || row.club));
+             } else if (lowerName.endsWith('.ndjson') || lowerName.endsWith('.jsonl')) {
+                 text.split('\n').forEach(line => {
+                     if (!line.trim()) return;
+                     const row = JSON.parse(line);
+                     names.push(row.team || row.team_name || row.club);
+                 });
+             } else {
+                 const lines = text.split(/\r?\n/);
+                 const header = lines.shift().split(',').map(cell => cell.trim().toLowerCase().replace(/ /g, '_'));
+                 const teamColumn = header.findIndex(cell => ['team', 'team_name', 'club'].includes(cell));
+                 if (teamColumn < 0) return [];
+                 lines.forEach(line => { if (line.trim()) names.push(line.split(',')[teamColumn]); });
+             }
+         } catch (e) {
+             console.warn("Could not read team names from the roster file:", e);
+         }
+         return [...new Set(names.filter(Boolean).map(name => String(name).replace(/^"|"$/g, '').trim()).filter(Boolean))];
+     }
+
      // --- Dynamic Top 4 Dropdown Population ---
      function updateTop4OptionsFromTextarea() {
          // Don't run if the textarea doesn't exist
@@ -216,8 +291,8 @@
          // We update the options regardless, but JS validation will only trigger if required/visible
          // const shouldBeVisible = includePlayoffsSelect.value === 'yes';
 
-         const inputString = teamsVenuesTextarea.value;
-         let teamsList = [];
+         const inputString = rosterFileTeams ? '' : teamsVenuesTextarea.value;
+         let teamsList = rosterFileTeams ? rosterFileTeams.slice() : [];
          const lines = inputString.split('\n'); // Split into lines
          const seenTeams = new Set();
 
@@ -299,41 +374,39 @@
 
          // Perform special validation for Step 4 (Playoff selections) ONLY if it's active and required
          if (stepNum === 4 && includePlayoffsSelect.value === 'yes') {
-             const top1Select = document.getElementById('top1_team');
-             const top2Select = document.getElementById('top2_team');
-             const top3Select = document.getElementById('top3_team');
-             const top4Select = document.getElementById('top4_team');
+             const teamCount = playoffTeamCount();
+             const placingSelects = playoffSelects();
 
              // Check if elements exist before accessing value
-             if(top1Select && top2Select && top3Select && top4Select) {
-                 const selections = [top1Select.value, top2Select.value, top3Select.value, top4Select.value];
+             if (placingSelects.length === teamCount) {
+                 const selections = placingSelects.map(sel => sel.value);
 
                  // First, ensure all are selected (required check handles most, but double-check)
                  if (selections.some(s => !s)) {
                      if (isValid) { // Only flag as primary error if no other empty required field was found
                         isValid = false;
-                        if (!firstInvalidElement) firstInvalidElement = [top1Select, top2Select, top3Select, top4Select].find(s => !s.value);
+                        if (!firstInvalidElement) firstInvalidElement = placingSelects.find(s => !s.value);
                      }
                      // Mark empty selects specifically?
-                     [top1Select, top2Select, top3Select, top4Select].forEach(sel => {
-                         if (sel && !sel.value) sel.style.border = '2px solid #dc3545'; // Check sel exists
+                     placingSelects.forEach(sel => {
+                         if (!sel.value) sel.style.border = '2px solid #dc3545';
                      });
 
                  } else {
                      // If all are selected, check for uniqueness
-                     if (new Set(selections).size !== 4) {
+                     if (new Set(selections).size !== teamCount) {
                          isValid = false;
-                         // Indicate error on all 4 selects for uniqueness issue
-                         [top1Select, top2Select, top3Select, top4Select].forEach(sel => {
-                            if(sel) sel.style.border = '2px solid #dc3545'
+                         // Indicate error on every placing select for uniqueness issue
+                         placingSelects.forEach(sel => {
+                            sel.style.border = '2px solid #dc3545'
                          });
-                         if (!firstInvalidElement) firstInvalidElement = top1Select; // Focus the first one
+                         if (!firstInvalidElement) firstInvalidElement = placingSelects[0]; // Focus the first one
                          // Use a more user-friendly notification than alert if possible
-                         setTimeout(() => alert("Playoff Error: Please select a unique team for each Top 4 position."), 10);
+                         setTimeout(() => alert(`Playoff Error: Please select a unique team for each Top ${teamCount} position.`), 10);
                      }
                  }
              } else {
-                 console.error("Validation Error: Could not find all Top 4 select elements.");
+                 console.error(`Validation Error: Could not find all Top ${teamCount} select elements.`);
                  isValid = false; // Cannot validate if elements are missing
              }
          }